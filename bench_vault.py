@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 规模基准测试
+功能: 用固定种子生成合成保险库，按不同规模测量加载、迁移、保存、搜索、导入和导出的耗时，
+     结果输出为JSON，便于比较不同版本
+
+用法:
+    python3 bench_vault.py                                # 1k / 10k / 100k / 1M 个账户
+    python3 bench_vault.py --sizes 1000 10000 -o before.json
+    python3 bench_vault.py --backend sqlite --cjk 0.5 --accounts-per-site 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from vault_engine import ImportReader, VaultEngine
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+BACKEND_FILES = {'json': 'passwords.json', 'sqlite': 'passwords.db', 'binary': 'passwords.vault'}
+
+_ASCII = 'abcdefghijklmnopqrstuvwxyz0123456789'
+_CJK = '网站邮箱银行购物社交视频音乐游戏工作学习云盘论坛新闻地图支付旅行外卖'
+_DOMAINS = ('com', 'net', 'org', 'io', 'cn')
+
+
+class SyntheticVault:
+    """确定性的合成数据生成器（同样的参数总是生成同样的数据）
+
+    accounts_per_site: 每个网站的账户数；name_length / username_length /
+    password_length / description_length: 各字段的长度；
+    cjk: 网站名和描述使用中文的比例（0~1）。
+    """
+
+    def __init__(self, seed=0, accounts_per_site=2, name_length=10, username_length=12,
+                 password_length=16, description_length=20, cjk=0.2):
+        self.seed = seed
+        self.accounts_per_site = accounts_per_site
+        self.name_length = name_length
+        self.username_length = username_length
+        self.password_length = password_length
+        self.description_length = description_length
+        self.cjk = cjk
+
+    def params(self):
+        return dict(vars(self))
+
+    def _text(self, rng, length, cjk=False):
+        if cjk:
+            return ''.join(rng.choice(_CJK) for _ in range(max(1, length // 2)))
+        return ''.join(rng.choice(_ASCII) for _ in range(length))
+
+    def _site_name(self, rng, i):
+        # 序号保证网站名不重复
+        if rng.random() < self.cjk:
+            return f"{self._text(rng, self.name_length, cjk=True)}{i}"
+        return f"{self._text(rng, self.name_length)}{i}.{rng.choice(_DOMAINS)}"
+
+    def _account(self, rng):
+        return {
+            'username': f"{self._text(rng, self.username_length)}@example.com",
+            'password': self._text(rng, self.password_length),
+            'description': self._text(rng, self.description_length, cjk=rng.random() < self.cjk),
+            'created_time': f"20{rng.randint(15, 25):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+        }
+
+    def sites(self, accounts, start=0, seed_offset=0):
+        """生成共 accounts 个账户的网站列表（网站序号从 start 开始）"""
+        rng = random.Random(self.seed + seed_offset)
+        sites = []
+        i = start
+        while accounts > 0:
+            count = min(self.accounts_per_site, accounts)
+            sites.append({
+                'website': self._site_name(rng, i),
+                'accounts': [self._account(rng) for _ in range(count)],
+            })
+            accounts -= count
+            i += 1
+        return sites
+
+    def legacy_sites(self, accounts):
+        """旧版单账户格式的记录（每条直接包含 website / username / password）"""
+        rng = random.Random(self.seed + 1)
+        legacy = []
+        for i in range(accounts):
+            account = self._account(rng)
+            legacy.append({'website': self._site_name(rng, i), 'username': account['username'],
+                           'password': account['password'], 'created_time': account['created_time']})
+        return legacy
+
+    def search_queries(self, sites):
+        """按数据生成查询：短前缀、网站名片段、账号片段、中文、不存在的串"""
+        rng = random.Random(self.seed + 2)
+        site = rng.choice(sites)
+        account = rng.choice(site['accounts'])
+        cjk_site = next((s for s in sites if not s['website'].isascii()), site)
+        return {
+            'prefix_1': site['website'][:1],
+            'prefix_2': site['website'][:2],
+            'substring_3': site['website'][1:4],
+            'website': site['website'],
+            'username': account['username'][2:10],
+            'cjk': cjk_site['website'][:2],
+            'miss': 'zzzz-no-such-entry',
+        }
+
+
+class Timer:
+    """收集各项耗时（秒）"""
+
+    def __init__(self):
+        self.results = {}
+
+    def measure(self, name, func, repeat=1):
+        times = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        self.results[name] = round(statistics.median(times), 6)
+        return result
+
+
+def _new_engine(directory, backend):
+    return VaultEngine(os.path.join(directory, BACKEND_FILES[backend]),
+                       key_file=os.path.join(directory, 'vault.key'))
+
+
+def _write_import_file(path, sites):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"export_info": {"total_websites": len(sites)}, "passwords": sites},
+                  f, ensure_ascii=False)
+
+
+def run_size(generator, accounts, backend, search_repeat=5):
+    """测量一种规模，返回 {项目: 秒数}"""
+    timer = Timer()
+    sites = generator.sites(accounts)
+    with tempfile.TemporaryDirectory(prefix='vault-bench-') as directory:
+        # 保存：重写全部数据，以及只修改一个网站
+        engine = _new_engine(directory, backend)
+        engine.passwords = sites
+
+        def save_all():
+            engine.save()
+            engine.store.flush()
+        timer.measure('save_full', save_all)
+
+        def save_one():
+            engine.save(changed=[sites[len(sites) // 2]])
+            engine.store.flush()
+        timer.measure('save_one_site', save_one, repeat=5)
+        engine.close()
+
+        # 加载（包含数据结构迁移、补ID、转换为记录对象和建立索引）
+        engine = _new_engine(directory, backend)
+        timer.measure('load', engine.load)
+        engine.close()
+
+        # 已经是最新数据结构版本时的加载（跳过迁移）
+        engine = _new_engine(directory, backend)
+        timer.measure('load_current', engine.load)
+
+        # 搜索：第一次搜索时建立倒排索引，之后每个查询取多次的中位数
+        queries = generator.search_queries(sites)
+        timer.measure('search_index_build', lambda: engine.search(''))
+        search_index = engine.index.search
+
+        def cold_search(query):
+            # 不使用上一次的结果缩小范围，测量的是直接输入（或粘贴）整个查询的情况
+            search_index._last = None
+            return engine.search(query)
+        for name, query in queries.items():
+            timer.measure(f'search_{name}', lambda: cold_search(query), repeat=search_repeat)
+
+        def typing():
+            # 逐字输入网站名，每输入一个字搜索一次
+            for end in range(1, len(queries['website']) + 1):
+                engine.search(queries['website'][:end])
+        timer.measure('search_typing', typing, repeat=search_repeat)
+
+        # 导出需要完整的密码，第一次会先取回延迟加载的密码
+        timer.measure('export_json', lambda: engine.export(os.path.join(directory, 'export.json')))
+        timer.measure('export_text', lambda: engine.export(os.path.join(directory, 'export.txt')))
+        timer.measure('export_json_gz', lambda: engine.export(os.path.join(directory, 'export.json.gz')))
+
+        # 导入：一半与现有网站重名（合并账户），一半是新网站
+        half = accounts // 2
+        incoming = (generator.sites(half, seed_offset=0)
+                    + generator.sites(accounts - half, start=len(sites), seed_offset=3))
+        import_file = os.path.join(directory, 'import.json')
+        _write_import_file(import_file, incoming)
+        timer.measure('import_scan', lambda: ImportReader(import_file).scan())
+        timer.measure('import_merge', lambda: engine.import_file(import_file, "merge"))
+        engine.store.flush()
+        timer.measure('import_replace', lambda: engine.import_file(import_file, "replace"))
+        engine.close()
+
+    with tempfile.TemporaryDirectory(prefix='vault-bench-') as directory:
+        # 迁移旧版单账户格式（同一遍中转换为多账户并分配ID，之后重写全部数据）
+        engine = _new_engine(directory, backend)
+        # 先打开空的存储（二进制存储要先建立文件才能写入）；不经过 engine.load()，
+        # 否则空数据会先被标记为最新版本，迁移什么也不做
+        engine.store.load()
+        engine.passwords = generator.legacy_sites(accounts)
+
+        def migrate_and_save():
+            engine.migrate_data_structure()
+            engine.store.flush()
+        timer.measure('migrate', migrate_and_save)
+        if engine.stats.errors:
+            raise RuntimeError("迁移后保存失败，结果无效")
+        engine.close()
+    return timer.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="密码保险库基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="账户数量")
+    parser.add_argument('--backend', choices=sorted(BACKEND_FILES), default='json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--accounts-per-site', type=int, default=2)
+    parser.add_argument('--name-length', type=int, default=10)
+    parser.add_argument('--username-length', type=int, default=12)
+    parser.add_argument('--password-length', type=int, default=16)
+    parser.add_argument('--description-length', type=int, default=20)
+    parser.add_argument('--cjk', type=float, default=0.2, help="中文网站名和描述的比例")
+    parser.add_argument('-o', '--output', help="结果文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticVault(seed=args.seed, accounts_per_site=args.accounts_per_site,
+                               name_length=args.name_length, username_length=args.username_length,
+                               password_length=args.password_length,
+                               description_length=args.description_length, cjk=args.cjk)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'generator': generator.params(),
+        'results': {},
+    }
+    for accounts in args.sizes:
+        print(f"测量 {accounts} 个账户...", file=sys.stderr)
+        report['results'][str(accounts)] = run_size(generator, accounts, args.backend)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
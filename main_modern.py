@@ -6,71 +6,171 @@
 功能: 安全存储和管理密码，完全离线运行
 """
 
+import time
+
+# --profile-startup 从这里开始计时，“导入”阶段包含下面所有模块的导入
+_IMPORT_START = time.perf_counter()
+
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
+import gc
 import json
+import logging
 import os
+import queue
 import threading
-import time
-import subprocess
-import platform
+
+from vault_auth import AUTH_SUCCESS, auth_message, open_authenticator
+from vault_crypto import InvalidPasswordError, crypto_available
+from vault_engine import (ImportCancelled, ImportFormatError, ImportReader, LockReport, VaultEngine,
+                          count_accounts, memory_usage)
+from vault_storage import password_length
+from vault_table import VirtualTable
+
+logger = logging.getLogger(__name__)
+
+# 停止输入多久后才执行搜索（毫秒）
+SEARCH_DELAY_MS = 150
+# 后台导入时检查进度队列的间隔（毫秒）
+IMPORT_POLL_MS = 100
+# 后台认证时检查结果的间隔（毫秒）
+AUTH_POLL_MS = 100
+# 空闲多少分钟后自动锁定（0 表示不自动锁定）
+AUTO_LOCK_MINUTES = float(os.environ.get('VAULT_LOCK_MINUTES', '5'))
+# 锁定后多少分钟内通过系统认证即可解锁（使用保留的会话密钥），
+# 超过后需要重新输入主密码；0 表示总是需要主密码
+RESUME_MINUTES = float(os.environ.get('VAULT_RESUME_MINUTES', '60'))
+# 检查是否空闲的间隔（毫秒）
+IDLE_CHECK_MS = 5000
+
+# 启动阶段 -> 显示名称（按发生的顺序）
+STARTUP_PHASES = {
+    'imports': "导入模块",
+    'tk_init': "Tk初始化",
+    'theme': "主题",
+    'auth_prompt': "显示认证对话框",
+    'widgets': "创建主界面",
+    'auth': "等待认证",
+    'unlock': "解锁",
+    'load': "加载数据",
+    'first_paint': "首次绘制",
+}
+
+
+class StartupProfile:
+    """启动各阶段的耗时（--profile-startup）
+
+    mark(阶段) 记录从上一次 mark 到现在的时间；数据第一次绘制完成后 report()
+    输出分解表，指定了 output 时再把结果作为一行JSON追加到文件中，便于跟踪冷启动时间。
+    """
+
+    def __init__(self, start, enabled=False, output=None):
+        self.start = self.last = start
+        self.enabled = enabled
+        self.output = output
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        if self.reported:
+            return  # 启动已结束（例如锁定后再次解锁）
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def until(self, phase):
+        """从开始到 phase 结束的时间（秒），没有这个阶段时返回 None"""
+        total = 0.0
+        for name, seconds in self.phases:
+            total += seconds
+            if name == phase:
+                return total
+        return None
+
+    def summary(self):
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases},
+            'auth_prompt': round(self.until('auth_prompt') or 0.0, 6),
+            'total': round(self.last - self.start, 6),
+        }
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("启动耗时:")
+        for name, seconds in self.phases:
+            print(f"  {seconds * 1000:9.1f} ms  {STARTUP_PHASES.get(name, name)}")
+        summary = self.summary()
+        print(f"  显示认证对话框前共 {summary['auth_prompt'] * 1000:.1f} ms，"
+              f"到首次绘制共 {summary['total'] * 1000:.1f} ms")
+        if self.output:
+            with open(self.output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+
 
 class ModernPasswordVault:
-    def __init__(self):
+    def __init__(self, profile=None):
+        self.profile = profile or StartupProfile(time.perf_counter())
+        self.profile.mark('imports')
         self.root = tk.Tk()
         self.root.title("🔐 密码保险库")
         self.root.geometry("1000x700")
         self.root.minsize(800, 600)
         
-        # 数据文件路径
-        self.data_file = "passwords.json"
+        # 数据的加载、保存和修改都由引擎完成（界面只负责对话框和显示）；
+        # 写盘在后台线程完成，出错时回到Tk线程提示
+        self.engine = VaultEngine(on_error=lambda e: self.root.after(0, self.on_save_error, e))
+        self.data_file = self.engine.data_file
+        # 系统认证后端（macOS 上为 Touch ID，VAULT_AUTH_HELPER 可指定其他辅助程序）
+        self.authenticator = open_authenticator()
+        self.profile.mark('tk_init')
         
         # 认证状态
         self.is_unlocked = False
-        self.passwords = []
+        # 进行中的认证（取消标志），没有认证在进行时为 None
+        self._auth_pending = None
+        # 等待执行的搜索（root.after 返回的任务ID）
+        self._search_job = None
         self.show_passwords = False
+        # 主界面是否已创建
+        self._interface_built = False
+        # 最后一次键盘或鼠标操作的时间（time.monotonic），用于空闲自动锁定
+        self._last_activity = time.monotonic()
         
         # 设置现代化主题
         self.setup_modern_theme()
+        self.profile.mark('theme')
         
-        # 创建界面
-        self.create_modern_interface()
-        
-        # 使用系统认证保护应用
+        # 使用系统认证保护应用：先显示认证对话框，主界面在对话框显示之后、
+        # 等待认证的空闲时间里再创建
         self.system_auth_on_startup()
+        self.root.update_idletasks()
+        self.profile.mark('auth_prompt')
+        self.root.after_idle(self.build_interface)
     
-    def is_touchid_available(self):
-        """检查Touch ID是否可用"""
-        if platform.system() != 'Darwin':
-            return False
-        
-        # 检查TouchID可执行文件是否存在
-        touchid_path = os.path.join(os.path.dirname(__file__), 'touchid_test')
-        if not os.path.exists(touchid_path):
-            # 如果没有可执行文件，尝试编译
-            try:
-                self._compile_touchid_binary()
-            except:
-                return False
-            
-        try:
-            # 使用我们的TouchID测试程序检查可用性（不进行认证）
-            result = subprocess.run([touchid_path], 
-                                  capture_output=True, text=True, timeout=3)
-            return 'TOUCHID_AVAILABLE' in result.stdout
-        except:
-            return False
+    @property
+    def passwords(self):
+        """网站记录列表（导入替换时引擎会换成新的列表）"""
+        return self.engine.passwords
+    
+    @property
+    def index(self):
+        """网站 / 账户索引（导入完成时与数据一起换成新的）"""
+        return self.engine.index
     
     def system_auth_on_startup(self):
         """应用启动时使用系统认证"""
         self.show_auth_dialog()
     
-    def show_auth_dialog(self):
-        """显示认证对话框"""
+    def show_auth_dialog(self, auto_start=True):
+        """显示认证对话框（auto_start 为 False 时等用户点击按钮再开始验证）"""
         # 创建认证对话框
         auth_dialog = tk.Toplevel(self.root)
         auth_dialog.title("系统认证")
-        auth_dialog.geometry("400x300")
+        auth_dialog.geometry("500x300")
         auth_dialog.resizable(False, False)
         auth_dialog.configure(bg=self.colors['light'])
         
@@ -108,9 +208,19 @@ class ModernPasswordVault:
                             fg=self.colors['text'],
                             relief='flat', bd=1,
                             cursor='hand2',
-                            command=lambda: self.perform_auth(auth_dialog, status_label))
+                            command=lambda: self.perform_auth(auth_dialog, status_label, auth_btn, cancel_btn))
         auth_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=20, ipady=8)
         
+        cancel_btn = tk.Button(button_frame, text="取消验证", 
+                              font=("SF Pro Text", 12, "bold"),
+                              bg=self.colors['surface'],
+                              fg=self.colors['text'],
+                              relief='flat', bd=1,
+                              cursor='hand2',
+                              state=tk.DISABLED,
+                              command=lambda: self.cancel_auth(status_label, auth_btn, cancel_btn))
+        cancel_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=20, ipady=8)
+        
         exit_btn = tk.Button(button_frame, text="退出", 
                             font=("SF Pro Text", 12, "bold"),
                             bg=self.colors['surface'],
@@ -120,90 +230,161 @@ class ModernPasswordVault:
                             command=self.root.quit)
         exit_btn.pack(side=tk.LEFT, ipadx=20, ipady=8)
         
-        # 自动开始第一次验证
-        self.root.after(500, lambda: self.perform_auth(auth_dialog, status_label))
+        # 对话框显示后自动开始第一次验证
+        if auto_start:
+            self.root.after_idle(lambda: self.perform_auth(auth_dialog, status_label, auth_btn, cancel_btn))
     
-    def perform_auth(self, dialog, status_label):
-        """执行认证"""
+    def perform_auth(self, dialog, status_label, auth_btn, cancel_btn):
+        """执行认证
+        
+        等待辅助程序的结果在工作线程中进行，界面保持响应；结果由 root.after 定期
+        取回，在Tk线程中继续。取消时结束辅助程序，之后到达的结果被丢弃。
+        """
+        if self._auth_pending is not None:
+            return  # 已经在验证中
         status_label.config(text="正在验证...")
-        self.root.update()
+        auth_btn.config(state=tk.DISABLED)
+        cancel_btn.config(state=tk.NORMAL)
+        results = queue.Queue()
+        cancelled = threading.Event()
+        self._auth_pending = cancelled
         
-        if self.verify_touchid("请验证身份以使用密码保险库"):
-            # 认证成功
-            dialog.destroy()
-            self.is_unlocked = True
-            self.status_indicator.config(text="🔓 已通过系统认证", fg=self.colors['success'])
-            self.enable_buttons()
-            self.load_passwords()
-        else:
-            # 认证失败，显示重试选项
-            status_label.config(text="认证失败，请重试或退出应用")
-    
-    def _compile_touchid_binary(self):
-        """编译TouchID验证二进制文件"""
-        touchid_source = os.path.join(os.path.dirname(__file__), 'touchid_test.m')
-        touchid_binary = os.path.join(os.path.dirname(__file__), 'touchid_test')
-        
-        if not os.path.exists(touchid_source):
-            raise Exception("TouchID源文件不存在")
-        
-        # 编译Objective-C源文件
-        result = subprocess.run([
-            'clang',
-            '-framework', 'Foundation',
-            '-framework', 'LocalAuthentication',
-            touchid_source,
-            '-o', touchid_binary
-        ], capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            raise Exception(f"编译TouchID程序失败: {result.stderr}")
-    
-    def verify_touchid(self, reason="验证身份以访问密码保险库"):
-        """使用Touch ID验证身份"""
-        if not self.is_touchid_available():
-            return False
+        def worker():
+            results.put(self.verify_touchid("请验证身份以使用密码保险库", cancelled))
         
-        try:
-            # 使用真正的Touch ID硬件验证
-            touchid_path = os.path.join(os.path.dirname(__file__), 'touchid_test')
-            
-            if not os.path.exists(touchid_path):
-                print("TouchID程序不存在，尝试编译...")
-                self._compile_touchid_binary()
-            
-            # 调用我们的TouchID验证程序（带--auth参数进行真正的认证）
-            result = subprocess.run([touchid_path, '--auth'], 
-                                  capture_output=True, text=True, timeout=60)
-            
-            output = result.stdout.strip()
-            print(f"TouchID验证结果: {output}")
-            
-            if output == "TOUCHID_SUCCESS":
-                return True
-            elif output == "TOUCHID_CANCELLED":
-                print("用户取消了Touch ID验证")
-                return False
-            elif output == "TOUCHID_FALLBACK":
-                print("用户选择了密码验证")
-                return False
-            elif output == "TOUCHID_NOT_AVAILABLE":
-                print("Touch ID不可用")
-                return False
-            elif output == "TOUCHID_NOT_ENROLLED":
-                print("未设置Touch ID")
-                return False
-            elif output == "TOUCHID_LOCKOUT":
-                print("Touch ID被锁定")
-                return False
+        def poll():
+            if cancelled.is_set():
+                return
+            try:
+                success = results.get_nowait()
+            except queue.Empty:
+                self.root.after(AUTH_POLL_MS, poll)
+                return
+            self._auth_pending = None
+            if success:
+                # 认证成功，立即解锁并加载
+                self.profile.mark('auth')
+                dialog.destroy()
+                self.finish_auth()
             else:
-                print(f"Touch ID验证错误: {output}")
+                # 认证失败，显示重试选项
+                status_label.config(text="认证失败，请重试或退出应用")
+                auth_btn.config(state=tk.NORMAL)
+                cancel_btn.config(state=tk.DISABLED)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(AUTH_POLL_MS, poll)
+    
+    def cancel_auth(self, status_label, auth_btn, cancel_btn):
+        """取消进行中的认证（结束辅助程序）"""
+        if self._auth_pending is None:
+            return
+        self._auth_pending.set()
+        self._auth_pending = None
+        self.authenticator.cancel()
+        status_label.config(text="已取消验证，可以重试或退出应用")
+        auth_btn.config(state=tk.NORMAL)
+        cancel_btn.config(state=tk.DISABLED)
+    
+    def finish_auth(self):
+        """系统认证通过后解锁保险库并加载数据"""
+        # 主界面通常已在等待认证时创建
+        self.build_interface()
+        start = time.perf_counter()
+        # 自动锁定后在允许的时间内用保留的会话密钥解锁，不必重新输入主密码
+        resumed = self.engine.locked and self.engine.resume(RESUME_MINUTES * 60)
+        if not resumed and not self.unlock_vault():
+            self.root.quit()
+            return
+        self.profile.mark('unlock')
+        self.is_unlocked = True
+        self._last_activity = time.monotonic()
+        self.status_indicator.config(text="🔓 已通过系统认证", fg=self.colors['success'])
+        self.enable_buttons()
+        self.load_passwords()
+        if resumed:
+            logger.info("锁定后快速解锁并加载，用时 %.3f秒", time.perf_counter() - start)
+        self.profile.mark('load')
+        self.root.after_idle(self.on_first_paint)
+    
+    def on_first_paint(self):
+        """加载后的第一次绘制完成（启动计时到此结束）"""
+        self.root.update_idletasks()
+        self.profile.mark('first_paint')
+        self.profile.report()
+    
+    def on_activity(self, event=None):
+        """键盘或鼠标操作：重新开始空闲计时"""
+        self._last_activity = time.monotonic()
+    
+    def check_idle(self):
+        """定期检查：空闲超时后锁定；锁定期间超过允许快速解锁的时间就丢弃保留的会话密钥"""
+        self.root.after(IDLE_CHECK_MS, self.check_idle)
+        if self.engine.locked:
+            self.engine.expire_session(RESUME_MINUTES * 60)
+        elif (self.is_unlocked and AUTO_LOCK_MINUTES > 0
+              and time.monotonic() - self._last_activity >= AUTO_LOCK_MINUTES * 60
+              and self.root.grab_current() is None):
+            # 有对话框（编辑、导入等）打开时不锁定
+            self.lock_vault()
+    
+    def lock_vault(self):
+        """锁定：清空内存中的数据、索引和表格（只保留加密后的会话密钥），重新显示认证对话框"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        before = memory_usage()
+        self.is_unlocked = False
+        self.engine.lock()
+        self.table.set_rows([])
+        gc.collect()
+        logger.info(LockReport(before, memory_usage()).summary())
+        self.update_stats()
+        self.add_btn.config(state='disabled')
+        self.status_indicator.config(text="🔒 已锁定", fg=self.colors['danger'])
+        self.status_label.config(text=f"空闲超过 {AUTO_LOCK_MINUTES:g} 分钟，已自动锁定")
+        # 用户回来后点击按钮再验证，不在无人时弹出系统认证
+        self.show_auth_dialog(auto_start=False)
+    
+    def unlock_vault(self):
+        """解锁加密存储：主密钥每次会话只派生一次，之后缓存在存储对象中"""
+        if not crypto_available():
+            if self.engine.is_encrypted():
+                messagebox.showerror("错误", "保险库已加密，但未安装 cryptography，无法打开")
                 return False
-            
-        except Exception as e:
-            print(f"Touch ID验证错误: {e}")
-            return False
+            return True
+        
+        from vault_dialogs import VaultSetupDialog, VaultUnlockDialog
+        if self.engine.is_encrypted():
+            while True:
+                dialog = VaultUnlockDialog(self.root, self.colors)
+                if not dialog.result:
+                    return False
+                try:
+                    self.engine.unlock(dialog.result)
+                    return True
+                except InvalidPasswordError:
+                    messagebox.showerror("错误", "主密码错误，请重试")
+        
+        # 首次使用：设置主密码，已有的明文数据会在加载后整体加密
+        dialog = VaultSetupDialog(self.root, self.colors)
+        if dialog.result:
+            self.engine.set_master_password(dialog.result)
+        else:
+            self.status_label.config(text="未设置主密码，数据以明文保存")
+        return True
     
+    def verify_touchid(self, reason="验证身份以访问密码保险库", cancelled=None):
+        """使用Touch ID验证身份（辅助程序常驻，只在第一次认证时启动）
+
+        cancelled 是这次请求的取消标志，在工作线程开始认证前取消也会生效。
+        """
+        code = self.authenticator.authenticate(reason, cancelled)
+        print(f"TouchID验证结果: {code}")
+        if code == AUTH_SUCCESS:
+            return True
+        print(auth_message(code))
+        return False
     
     def setup_modern_theme(self):
         """设置现代化主题和颜色"""
@@ -263,6 +444,18 @@ class ModernPasswordVault:
         # 配置根窗口
         self.root.configure(bg=self.colors['background'])
     
+    def build_interface(self):
+        """创建主界面（只创建一次）"""
+        if self._interface_built:
+            return
+        self._interface_built = True
+        self.create_modern_interface()
+        # 任何键盘或鼠标操作都重新开始空闲计时
+        for sequence in ('<Key>', '<Button>', '<Motion>', '<MouseWheel>'):
+            self.root.bind_all(sequence, self.on_activity, add='+')
+        self.root.after(IDLE_CHECK_MS, self.check_idle)
+        self.profile.mark('widgets')
+    
     def create_modern_interface(self):
         """创建Streamlit风格的用户界面"""
         # 主容器
@@ -344,7 +537,7 @@ class ModernPasswordVault:
         self.search_entry.pack(fill=tk.X, ipady=8, pady=(0, 20))
         
         # 搜索功能绑定
-        self.search_var.trace_add('write', lambda *args: self.filter_entries())
+        self.search_var.trace_add('write', self.on_search_change)
         
         # 右侧：按钮组 - 改为横向排列
         button_frame = tk.Frame(toolbar_frame, bg=self.colors['background'])
@@ -451,6 +644,9 @@ class ModernPasswordVault:
         h_scrollbar = ttk.Scrollbar(table_container, orient=tk.HORIZONTAL, command=self.tree.xview)
         
         self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        # 行数很多时只在Treeview中保留可见的行，滚动时重新绑定内容
+        self.table = VirtualTable(self.tree, v_scrollbar, self._row_values,
+                                  row_key=self._row_key, row_group=self._row_group)
         
         # 使用pack布局
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=2, pady=2)
@@ -637,6 +833,8 @@ class ModernPasswordVault:
         
         self.tree.configure(yscrollcommand=v_scrollbar.set, 
                            xscrollcommand=h_scrollbar.set)
+        self.table = VirtualTable(self.tree, v_scrollbar, self._row_values,
+                                  row_key=self._row_key, row_group=self._row_group)
         
         # 布局
         self.tree.grid(row=0, column=0, sticky='nsew')
@@ -671,7 +869,16 @@ class ModernPasswordVault:
         version_label.pack(side=tk.RIGHT, padx=15, pady=5)
     
     def on_search_change(self, *args):
-        """搜索框内容变化事件"""
+        """搜索框内容变化事件
+
+        连续输入时只在停顿后搜索一次，尚未执行的旧查询直接取消。
+        """
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DELAY_MS, self._run_search)
+    
+    def _run_search(self):
+        self._search_job = None
         self.filter_entries()
     
     def on_search_focus_in(self, event):
@@ -722,101 +929,92 @@ class ModernPasswordVault:
     def load_passwords(self):
         """加载密码数据"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.passwords = json.load(f)
-            else:
-                self.passwords = []
-            
-            # 确保数据结构正确（向后兼容）
-            self.migrate_data_structure()
+            self.engine.load(fill_passwords=self.show_passwords)
             self.update_password_list()
             self.update_stats()
         except Exception as e:
             messagebox.showerror("错误", f"加载密码数据失败: {str(e)}")
     
-    def migrate_data_structure(self):
-        """迁移数据结构以支持多账户"""
-        migrated = False
-        for item in self.passwords:
-            # 检查是否是旧格式（直接包含website, username, password）
-            if 'website' in item and 'username' in item and 'password' in item:
-                # 转换为新格式
-                website = item['website']
-                username = item['username']
-                password = item['password']
-                created_time = item.get('created_time', time.strftime('%Y-%m-%d %H:%M'))
-                
-                # 创建新的数据结构
-                new_item = {
-                    'website': website,
-                    'accounts': [{
-                        'username': username,
-                        'password': password,
-                        'created_time': created_time,
-                        'description': ''
-                    }]
-                }
-                
-                # 替换旧项目
-                index = self.passwords.index(item)
-                self.passwords[index] = new_item
-                migrated = True
-        
-        if migrated:
-            self.save_passwords()
-    
-    def save_passwords(self):
-        """保存密码数据"""
-        try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.passwords, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            messagebox.showerror("错误", f"保存密码数据失败: {str(e)}")
+    def on_save_error(self, error):
+        """后台保存失败"""
+        self.status_label.config(text="保存失败")
+        messagebox.showerror("错误", f"保存密码数据失败: {str(error)}")
     
     def update_password_list(self):
         """更新密码列表显示"""
-        # 清空现有项目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 添加密码项目 - 每个账户显示为独立行
-        for password_data in self.passwords:
-            website = password_data.get('website', '')
-            accounts = password_data.get('accounts', [])
-            
-            if accounts:
-                for i, account in enumerate(accounts):
-                    username = account.get('username', '')
-                    password = account.get('password', '')
-                    created_time = account.get('created_time', '')
-                    description = account.get('description', '')
-                    
-                    # 根据显示设置决定密码显示方式
-                    display_password = password if self.show_passwords else '•' * len(password)
-                    
-                    # 网站名显示：第一个账户显示完整网站名，其他账户显示缩进
-                    display_website = website if i == 0 else f"  └─ {website}"
-                    
-                    self.tree.insert('', 'end', values=(display_website, username, display_password, description, created_time))
+        self.table.set_rows(self._rows_for(self.passwords))
+    
+    def _rows_for(self, sites):
+        """网站列表 -> 表格行 (网站, 账户, 账户序号)，每个账户显示为独立行"""
+        return [(site, account, i)
+                for site in sites
+                for i, account in enumerate(site.get('accounts', []))]
+    
+    def patch_password_list(self, changed=(), removed=()):
+        """只更新被修改的网站对应的行，其他行、滚动位置和选中项保持不变
+
+        changed 是修改过或新增的网站记录，removed 是已删除的网站记录。
+        正在搜索时，修改后不再匹配的网站从结果中移除。
+        """
+        search_term = self._search_term()
+        for password_data in removed:
+            self.table.update_group(password_data, [])
+        for password_data in changed:
+            if search_term and not self.index.search.matches(password_data, search_term):
+                rows = []
+            else:
+                rows = self._rows_for([password_data])
+            self.table.update_group(password_data, rows)
+    
+    def _selected_row(self):
+        """当前选中的表格行 (网站, 账户, 序号)，没有选中时返回 None"""
+        selection = self.tree.selection()
+        return self.table.item_row(selection[0]) if selection else None
+    
+    @staticmethod
+    def _row_key(row):
+        # 账户ID同时用作普通模式下的Treeview项目ID
+        return row[1].get('id') or id(row[1])
+    
+    @staticmethod
+    def _row_group(row):
+        return row[0]
+    
+    def _row_values(self, row):
+        """表格行在各列显示的值（虚拟表格滚动时按需调用）"""
+        password_data, account, i = row
+        website = password_data.get('website', '')
+        username = account.get('username', '')
+        created_time = account.get('created_time', '')
+        description = account.get('description', '')
+        
+        # 根据显示设置决定密码显示方式（隐藏时只需要长度，不必读取密码）
+        if self.show_passwords:
+            display_password = account.get('password', '')
+        else:
+            display_password = '•' * password_length(account)
+        
+        # 网站名显示：第一个账户显示完整网站名，其他账户显示缩进
+        display_website = website if i == 0 else f"  └─ {website}"
+        
+        return (display_website, username, display_password, description, created_time)
     
     def update_stats(self):
         """更新统计信息"""
         website_count = len(self.passwords)
-        total_accounts = sum(len(item.get('accounts', [])) for item in self.passwords)
+        total_accounts = self.engine.account_count()
         self.stats_label.config(text=f"{website_count} 个网站/应用，{total_accounts} 个账户")
     
-    def filter_entries(self):
-        """过滤密码条目"""
-        search_term = self.search_var.get().lower()
-        
-        # 如果搜索框是占位符文本，显示所有项目
+    def _search_term(self):
+        """搜索框中的查询（占位符文本视为空）"""
+        search_term = self.search_var.get()
         if search_term == "搜索网站、应用或账号...":
             search_term = ""
-        
-        # 清空现有项目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        return search_term
+    
+    def filter_entries(self):
+        """过滤密码条目"""
+        search_term = self._search_term()
         
         # 如果没有搜索词，显示所有项目
         if not search_term:
@@ -824,42 +1022,12 @@ class ModernPasswordVault:
             self.update_stats()
             return
         
-        # 过滤并添加匹配的项目 - 与update_password_list保持相同的显示格式
-        filtered_websites = 0
-        filtered_accounts = 0
-        for password_data in self.passwords:
-            website = password_data.get('website', '')
-            accounts = password_data.get('accounts', [])
-            
-            # 检查网站名称或任何账户是否匹配
-            matches = False
-            if search_term in website.lower():
-                matches = True
-            else:
-                for account in accounts:
-                    username = account.get('username', '').lower()
-                    if search_term in username:
-                        matches = True
-                        break
-            
-            if matches and accounts:
-                filtered_websites += 1
-                filtered_accounts += len(accounts)
-                
-                # 使用与update_password_list相同的显示格式 - 每个账户显示为独立行
-                for i, account in enumerate(accounts):
-                    username = account.get('username', '')
-                    password = account.get('password', '')
-                    created_time = account.get('created_time', '')
-                    description = account.get('description', '')
-                    
-                    # 根据显示设置决定密码显示方式
-                    display_password = password if self.show_passwords else '•' * len(password)
-                    
-                    # 网站名显示：第一个账户显示完整网站名，其他账户显示缩进
-                    display_website = website if i == 0 else f"  └─ {website}"
-                    
-                    self.tree.insert('', 'end', values=(display_website, username, display_password, description, created_time))
+        # 通过倒排索引查找匹配网站名、账号或描述的网站，显示格式与update_password_list相同
+        matches = self.engine.search(search_term)
+        rows = self._rows_for(matches)
+        self.table.set_rows(rows)
+        filtered_websites = len(matches)
+        filtered_accounts = len(rows)
         
         # 更新统计信息
         if search_term:
@@ -869,202 +1037,81 @@ class ModernPasswordVault:
     
     def add_password(self):
         """添加密码"""
+        from vault_dialogs import PasswordDialog
         dialog = PasswordDialog(self.root, self.colors, "添加密码")
         if dialog.result:
             website = dialog.result['website']
-            username = dialog.result['username']
-            password = dialog.result['password']
-            description = dialog.result.get('description', '')
-            
-            # 检查是否已存在该网站
-            existing_item = None
-            for item in self.passwords:
-                if item.get('website', '').lower() == website.lower():
-                    existing_item = item
-                    break
-            
-            if existing_item:
-                # 添加新账户到现有网站
-                new_account = {
-                    'username': username,
-                    'password': password,
-                    'created_time': time.strftime('%Y-%m-%d %H:%M'),
-                    'description': description
-                }
-                existing_item['accounts'].append(new_account)
-                self.status_label.config(text=f"已为 {website} 添加新账户")
-            else:
-                # 创建新的网站条目
-                new_item = {
-                    'website': website,
-                    'accounts': [{
-                        'username': username,
-                        'password': password,
-                        'created_time': time.strftime('%Y-%m-%d %H:%M'),
-                        'description': description
-                    }]
-                }
-                self.passwords.append(new_item)
+            changed_item, created = self.engine.add_account(
+                website, dialog.result['username'], dialog.result['password'],
+                dialog.result.get('description', ''))
+            if created:
                 self.status_label.config(text=f"已添加新网站 {website}")
-            
-            self.save_passwords()
-            self.update_password_list()
+            else:
+                self.status_label.config(text=f"已为 {website} 添加新账户")
+            self.patch_password_list(changed=[changed_item])
             self.update_stats()
     
     def quick_edit_account(self):
         """快速编辑单个账户（双击）"""
-        selection = self.tree.selection()
-        if not selection:
+        row = self._selected_row()
+        if row is None:
             return
         
-        item = self.tree.item(selection[0])
-        display_website = str(item['values'][0])
-        username = str(item['values'][1])
-        
-        # 处理缩进的网站名
-        website = display_website.replace("  └─ ", "").strip()
-        
-        # 找到对应的账户数据
-        for pwd in self.passwords:
-            if str(pwd.get('website', '')) == website:
-                accounts = pwd.get('accounts', [])
-                for account in accounts:
-                    if str(account.get('username', '')) == username:
-                        # 直接编辑这个账户（支持修改网站名称并搬移账户）
-                        dialog = PasswordDialog(self.root, self.colors, f"编辑 {website} 的账户", {
-                            'website': website,
-                            'username': account['username'],
-                            'password': account['password'],
-                            'description': account.get('description', '')
-                        })
-                        if dialog.result:
-                            new_website = dialog.result['website'].strip()
-                            # 如果网站名未变化，原地更新
-                            if new_website.lower() == website.lower():
-                                account['username'] = dialog.result['username']
-                                account['password'] = dialog.result['password']
-                                account['description'] = dialog.result.get('description', '')
-                                account['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
-                            else:
-                                # 从原网站移除该账户
-                                updated_accounts = [acc for acc in accounts if str(acc.get('username', '')) != username]
-                                pwd['accounts'] = updated_accounts
-                                # 将账户搬移到目标网站（合并或创建新网站）
-                                target_item = None
-                                for item in self.passwords:
-                                    if str(item.get('website', '')).lower() == new_website.lower():
-                                        target_item = item
-                                        break
-                                moved_account = {
-                                    'username': dialog.result['username'],
-                                    'password': dialog.result['password'],
-                                    'description': dialog.result.get('description', ''),
-                                    'created_time': account.get('created_time', time.strftime('%Y-%m-%d %H:%M')),
-                                    'modified_time': time.strftime('%Y-%m-%d %H:%M')
-                                }
-                                if target_item:
-                                    # 若存在相同用户名则覆盖，否则追加
-                                    replaced = False
-                                    for existing_acc in target_item['accounts']:
-                                        if existing_acc.get('username') == moved_account['username']:
-                                            existing_acc.update(moved_account)
-                                            replaced = True
-                                            break
-                                    if not replaced:
-                                        target_item['accounts'].append(moved_account)
-                                else:
-                                    self.passwords.append({
-                                        'website': new_website,
-                                        'accounts': [moved_account]
-                                    })
-                                # 如果原网站下没有账户了，删除原网站
-                                if not pwd['accounts']:
-                                    self.passwords = [item for item in self.passwords if item is not pwd]
-                            self.save_passwords()
-                            self.update_password_list()
-                            self.update_stats()
-                            self.status_label.config(text="账户已更新")
-                        return
+        # 选中的行直接对应账户记录
+        pwd, account, _ = row
+        website = pwd['website']
+        
+        # 直接编辑这个账户（支持修改网站名称并搬移账户）
+        self.engine.fill_passwords([pwd])
+        from vault_dialogs import PasswordDialog
+        dialog = PasswordDialog(self.root, self.colors, f"编辑 {website} 的账户", {
+            'website': website,
+            'username': account['username'],
+            'password': account['password'],
+            'description': account.get('description', '')
+        })
+        if dialog.result:
+            changed, removed = self.engine.edit_account(
+                pwd, account, dialog.result['website'].strip(), dialog.result['username'],
+                dialog.result['password'], dialog.result.get('description', ''))
+            self.patch_password_list(changed=changed, removed=removed)
+            self.update_stats()
+            self.status_label.config(text="账户已更新")
     
     def edit_password(self):
         """编辑密码"""
-        selection = self.tree.selection()
-        if not selection:
+        row = self._selected_row()
+        if row is None:
             messagebox.showwarning("警告", "请先选择要编辑的密码条目")
             return
         
-        item = self.tree.item(selection[0])
-        display_website = str(item['values'][0])
-        
-        # 处理缩进的网站名
-        website = display_website.replace("  └─ ", "").strip()
-        
-        # 找到对应的密码数据
-        password_data = None
-        for pwd in self.passwords:
-            if str(pwd.get('website', '')) == website:
-                password_data = pwd
-                break
+        password_data = row[0]
+        website = password_data['website']
         
         if password_data:
             # 显示账户管理对话框（支持网站名重命名）
+            self.engine.fill_passwords([password_data])
+            from vault_dialogs import AccountManagerDialog
             dialog = AccountManagerDialog(self.root, self.colors, website, password_data['accounts'])
             if dialog.result:
-                new_website = dialog.result.get('website', website).strip()
-                new_accounts = dialog.result.get('accounts', password_data['accounts'])
-                if new_website.lower() == website.lower():
-                    password_data['accounts'] = new_accounts
-                    password_data['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
-                else:
-                    # 将整个网站重命名或合并到已存在网站
-                    target_item = None
-                    for item in self.passwords:
-                        if str(item.get('website', '')).lower() == new_website.lower():
-                            target_item = item
-                            break
-                    if target_item:
-                        # 合并账户（相同用户名覆盖）
-                        for acc in new_accounts:
-                            merged = False
-                            for existing in target_item['accounts']:
-                                if existing.get('username') == acc.get('username'):
-                                    existing.update(acc)
-                                    merged = True
-                                    break
-                            if not merged:
-                                target_item['accounts'].append(acc)
-                        # 删除旧网站项
-                        self.passwords = [item for item in self.passwords if item is not password_data]
-                        target_item['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
-                    else:
-                        # 直接重命名
-                        password_data['website'] = new_website
-                        password_data['accounts'] = new_accounts
-                        password_data['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
-                self.save_passwords()
-                self.update_password_list()
+                changed_item = self.engine.update_site(
+                    password_data, dialog.result.get('website', website).strip(),
+                    dialog.result.get('accounts', password_data['accounts']))
+                # 合并到其他网站时原网站的行要去掉
+                self.patch_password_list(changed=[changed_item],
+                                         removed=[password_data] if changed_item is not password_data else [])
                 self.update_stats()
                 self.status_label.config(text="密码已更新")
     
     def delete_password(self):
         """删除密码"""
-        selection = self.tree.selection()
-        if not selection:
+        row = self._selected_row()
+        if row is None:
             messagebox.showwarning("警告", "请先选择要删除的密码条目")
             return
         
-        item = self.tree.item(selection[0])
-        display_website = str(item['values'][0])
-        
-        # 处理缩进的网站名
-        website = display_website.replace("  └─ ", "").strip()
-        
-        # 找到对应的密码数据
-        password_data = None
-        for pwd in self.passwords:
-            if str(pwd.get('website', '')) == website:
-                password_data = pwd
-                break
+        password_data = row[0]
+        website = password_data['website']
         
         if password_data:
             account_count = len(password_data['accounts'])
@@ -1078,29 +1125,27 @@ class ModernPasswordVault:
                 
                 if choice is True:
                     # 删除整个网站
-                    self.passwords = [pwd for pwd in self.passwords if pwd['website'] != website]
-                    self.save_passwords()
-                    self.update_password_list()
+                    self.engine.delete_site(password_data)
+                    self.patch_password_list(removed=[password_data])
                     self.update_stats()
                     self.status_label.config(text="网站及其所有账户已删除")
                 elif choice is False:
                     # 显示账户选择对话框
+                    from vault_dialogs import AccountDeleteDialog
                     dialog = AccountDeleteDialog(self.root, self.colors, website, password_data['accounts'])
                     if dialog.result:
-                        password_data['accounts'] = dialog.result
-                        if not password_data['accounts']:
-                            # 如果没有账户了，删除整个网站
-                            self.passwords = [pwd for pwd in self.passwords if pwd['website'] != website]
-                        self.save_passwords()
-                        self.update_password_list()
+                        # 如果没有账户了，删除整个网站
+                        if self.engine.set_accounts(password_data, dialog.result):
+                            self.patch_password_list(removed=[password_data])
+                        else:
+                            self.patch_password_list(changed=[password_data])
                         self.update_stats()
                         self.status_label.config(text="账户已删除")
             else:
                 # 只有一个账户，直接删除整个网站
                 if messagebox.askyesno("确认删除", f"确定要删除 '{website}' 及其账户吗？"):
-                    self.passwords = [pwd for pwd in self.passwords if pwd['website'] != website]
-                    self.save_passwords()
-                    self.update_password_list()
+                    self.engine.delete_site(password_data)
+                    self.patch_password_list(removed=[password_data])
                     self.update_stats()
                     self.status_label.config(text="网站已删除")
     
@@ -1108,13 +1153,15 @@ class ModernPasswordVault:
         """切换密码显示/隐藏"""
         self.show_passwords = not self.show_passwords
         if self.show_passwords:
+            self.engine.fill_passwords()
             self.toggle_btn.config(text="🙈 隐藏密码")
             self.status_label.config(text="密码已显示")
         else:
             self.toggle_btn.config(text="👁️ 显示密码")
             self.status_label.config(text="密码已隐藏")
         
-        self.update_password_list()
+        # 只需刷新已显示的行，搜索结果和滚动位置保持不变
+        self.table.refresh()
     
     def refresh_list(self):
         """刷新列表"""
@@ -1133,7 +1180,10 @@ class ModernPasswordVault:
             defaultextension=".json",
             filetypes=[
                 ("JSON文件", "*.json"),
+                ("压缩的JSON文件", "*.json.gz *.json.xz"),
                 ("文本文件", "*.txt"),
+                ("压缩的文本文件", "*.txt.gz *.txt.xz"),
+                ("CSV文件（浏览器密码管理器格式）", "*.csv"),
                 ("所有文件", "*.*")
             ]
         )
@@ -1142,48 +1192,7 @@ class ModernPasswordVault:
             return  # 用户取消了选择
         
         try:
-            # 准备导出数据
-            export_data = {
-                "export_info": {
-                    "export_time": time.strftime('%Y-%m-%d %H:%M:%S'),
-                    "total_websites": len(self.passwords),
-                    "total_accounts": sum(len(item.get('accounts', [])) for item in self.passwords),
-                    "app_version": "2.0.0"
-                },
-                "passwords": self.passwords
-            }
-            
-            # 根据文件扩展名决定导出格式
-            if file_path.lower().endswith('.json'):
-                # JSON格式导出
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
-            else:
-                # 文本格式导出（便于阅读）
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("密码保险库 - 数据导出\n")
-                    f.write("=" * 50 + "\n")
-                    f.write(f"导出时间: {export_data['export_info']['export_time']}\n")
-                    f.write(f"网站数量: {export_data['export_info']['total_websites']}\n")
-                    f.write(f"账户总数: {export_data['export_info']['total_accounts']}\n")
-                    f.write("=" * 50 + "\n\n")
-                    
-                    for website_data in self.passwords:
-                        website = website_data.get('website', '')
-                        accounts = website_data.get('accounts', [])
-                        
-                        f.write(f"🌐 网站: {website}\n")
-                        f.write(f"   账户数量: {len(accounts)}\n")
-                        f.write("-" * 40 + "\n")
-                        
-                        for i, account in enumerate(accounts, 1):
-                            f.write(f"   账户 {i}:\n")
-                            f.write(f"     用户名: {account.get('username', '')}\n")
-                            f.write(f"     密码: {account.get('password', '')}\n")
-                            f.write(f"     描述: {account.get('description', '无')}\n")
-                            f.write(f"     创建时间: {account.get('created_time', '未知')}\n")
-                            f.write("\n")
-                        f.write("\n")
+            self.engine.export(file_path)
             
             messagebox.showinfo("导出成功", f"数据已成功导出到：\n{file_path}")
             self.status_label.config(text=f"数据已导出到: {os.path.basename(file_path)}")
@@ -1193,12 +1202,13 @@ class ModernPasswordVault:
             self.status_label.config(text="数据导出失败")
     
     def import_data(self):
-        """从JSON文件导入密码数据"""
+        """从JSON或CSV文件导入密码数据"""
         # 选择导入文件
         file_path = filedialog.askopenfilename(
-            title="选择要导入的JSON文件",
+            title="选择要导入的文件",
             filetypes=[
-                ("JSON文件", "*.json"),
+                ("JSON文件", "*.json *.json.gz *.json.xz"),
+                ("CSV文件（浏览器密码管理器格式）", "*.csv *.csv.gz *.csv.xz"),
                 ("所有文件", "*.*")
             ]
         )
@@ -1206,109 +1216,113 @@ class ModernPasswordVault:
         if not file_path:
             return  # 用户取消了选择
         
+        # 解析、校验和合并都在后台线程中进行，界面保持响应
         try:
-            # 读取JSON文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
-            
-            # 验证数据格式
-            if not isinstance(import_data, dict):
-                messagebox.showerror("导入失败", "文件格式不正确：必须是JSON对象")
-                return
-            
-            # 检查是否是我们的导出格式
-            if 'passwords' in import_data and 'export_info' in import_data:
-                # 标准导出格式
-                passwords_to_import = import_data['passwords']
-                import_info = import_data['export_info']
-                total_websites = import_info.get('total_websites', 0)
-                total_accounts = import_info.get('total_accounts', 0)
-                export_time = import_info.get('export_time', '未知')
-            elif isinstance(import_data, list):
-                # 直接是密码列表
-                passwords_to_import = import_data
-                total_websites = len(passwords_to_import)
-                total_accounts = sum(len(item.get('accounts', [])) for item in passwords_to_import)
-                export_time = "未知"
-            else:
-                # 检查是否是单个密码对象格式
-                if 'website' in import_data:
-                    passwords_to_import = [import_data]
-                    total_websites = 1
-                    total_accounts = len(import_data.get('accounts', []))
-                    export_time = "未知"
-                else:
-                    messagebox.showerror("导入失败", "无法识别的JSON格式")
-                    return
-            
-            # 验证密码数据格式
-            if not self._validate_import_data(passwords_to_import):
-                return
-            
+            reader = ImportReader(file_path)
+        except OSError as e:
+            self._show_import_error(e)
+            return
+        
+        def scan(report, cancelled):
+            return reader.scan(lambda done, total: report(done / total if total else 1, "正在检查导入文件..."),
+                               cancelled)
+        
+        def after_scan(result):
+            total_websites, total_accounts, export_time = result
             # 询问导入选项
             import_option = self._show_import_options_dialog(total_websites, total_accounts, export_time)
             if import_option is None:
+                self.status_label.config(text="导入已取消")
                 return  # 用户取消
+            self._start_import(reader, import_option)
+        
+        self._run_import_task("检查导入文件", scan, after_scan)
+    
+    def _start_import(self, reader, import_option):
+        """在后台准备导入结果，完成后才换入当前数据"""
+        read_fraction = [0.0]
+        
+        def on_read(done, total):
+            read_fraction[0] = done / total if total else 1
+        
+        def stage(report, cancelled):
+            def on_progress(processed, merged, added):
+                report(read_fraction[0], f"已处理 {processed} 个网站（合并 {merged}，新增 {added}）")
+            return self.engine.stage_import(reader.sites(on_read, cancelled), import_option,
+                                            on_progress, cancelled)
+        
+        def after_stage(staged):
+            self.engine.commit_import(staged)
+            imported_count, merged_count = staged.imported_count, staged.merged_count
             
-            # 执行导入
-            imported_count, merged_count = self._perform_import(passwords_to_import, import_option)
-            
-            # 更新界面
-            self.update_password_list()
-            self.save_passwords()
+            # 更新界面（搜索结果按新数据重新计算）
+            self.filter_entries()
             
             # 显示导入结果
             if import_option == "replace":
-                message = f"导入完成！\n\n替换了所有数据：\n- 网站数量: {imported_count}\n- 总账户数: {sum(len(item.get('accounts', [])) for item in self.passwords)}"
+                message = f"导入完成！\n\n替换了所有数据：\n- 网站数量: {imported_count}\n- 总账户数: {count_accounts(self.passwords)}"
             else:
-                message = f"导入完成！\n\n导入统计：\n- 新增网站: {imported_count}\n- 合并网站: {merged_count}\n- 当前总网站数: {len(self.passwords)}\n- 当前总账户数: {sum(len(item.get('accounts', [])) for item in self.passwords)}"
+                message = f"导入完成！\n\n导入统计：\n- 新增网站: {imported_count}\n- 合并网站: {merged_count}\n- 当前总网站数: {len(self.passwords)}\n- 当前总账户数: {count_accounts(self.passwords)}\n\n{staged.report.summary()}"
             
             self._show_import_success_dialog(message)
             self.status_label.config(text=f"成功导入 {imported_count} 个网站的数据")
-            
-        except json.JSONDecodeError as e:
-            messagebox.showerror("导入失败", f"JSON文件格式错误：\n{str(e)}")
-            self.status_label.config(text="JSON文件格式错误")
-        except Exception as e:
-            messagebox.showerror("导入失败", f"导入数据时发生错误：\n{str(e)}")
-            self.status_label.config(text="数据导入失败")
+        
+        self._run_import_task("正在导入", stage, after_stage)
     
-    def _validate_import_data(self, passwords_data):
-        """验证导入数据的格式"""
-        if not isinstance(passwords_data, list):
-            messagebox.showerror("导入失败", "密码数据必须是列表格式")
-            return False
-        
-        for i, item in enumerate(passwords_data):
-            if not isinstance(item, dict):
-                messagebox.showerror("导入失败", f"第 {i+1} 项数据格式不正确：必须是对象")
-                return False
-            
-            if 'website' not in item:
-                messagebox.showerror("导入失败", f"第 {i+1} 项缺少 'website' 字段")
-                return False
-            
-            if 'accounts' not in item:
-                messagebox.showerror("导入失败", f"第 {i+1} 项缺少 'accounts' 字段")
-                return False
-            
-            if not isinstance(item['accounts'], list):
-                messagebox.showerror("导入失败", f"第 {i+1} 项的 'accounts' 必须是列表")
-                return False
-            
-            # 验证账户数据
-            for j, account in enumerate(item['accounts']):
-                if not isinstance(account, dict):
-                    messagebox.showerror("导入失败", f"第 {i+1} 项的第 {j+1} 个账户格式不正确")
-                    return False
-                
-                required_fields = ['username', 'password']
-                for field in required_fields:
-                    if field not in account:
-                        messagebox.showerror("导入失败", f"第 {i+1} 项的第 {j+1} 个账户缺少 '{field}' 字段")
-                        return False
+    def _run_import_task(self, title, task, on_done):
+        """在工作线程中运行 task(report, cancelled)，完成后在Tk线程中调用 on_done(结果)
         
-        return True
+        工作线程通过 report(完成比例, 说明) 把进度放进队列，由 root.after 定期取出显示；
+        取消时 cancelled() 返回 True，task 抛出 ImportCancelled，数据保持不变。
+        """
+        messages = queue.Queue()
+        cancel = threading.Event()
+        from vault_dialogs import ImportProgressDialog
+        dialog = ImportProgressDialog(self.root, self.colors, title, cancel.set)
+        
+        def worker():
+            try:
+                result = task(lambda fraction, text: messages.put(('progress', (fraction, text))),
+                              cancel.is_set)
+                messages.put(('done', result))
+            except ImportCancelled:
+                messages.put(('cancelled', None))
+            except Exception as e:
+                messages.put(('error', e))
+        
+        def poll():
+            try:
+                while True:
+                    kind, payload = messages.get_nowait()
+                    if kind == 'progress':
+                        dialog.update_progress(*payload)
+                        continue
+                    dialog.close()
+                    if kind == 'done':
+                        on_done(payload)
+                    elif kind == 'cancelled':
+                        self.status_label.config(text="导入已取消，数据未改变")
+                    else:
+                        self._show_import_error(payload)
+                    return
+            except queue.Empty:
+                pass
+            self.root.after(IMPORT_POLL_MS, poll)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(IMPORT_POLL_MS, poll)
+    
+    def _show_import_error(self, error):
+        """导入失败提示"""
+        if isinstance(error, json.JSONDecodeError):
+            messagebox.showerror("导入失败", f"JSON文件格式错误：\n{str(error)}")
+            self.status_label.config(text="JSON文件格式错误")
+        elif isinstance(error, ImportFormatError):
+            messagebox.showerror("导入失败", str(error))
+            self.status_label.config(text="数据导入失败")
+        else:
+            messagebox.showerror("导入失败", f"导入数据时发生错误：\n{str(error)}")
+            self.status_label.config(text="数据导入失败")
     
     def _show_import_options_dialog(self, total_websites, total_accounts, export_time):
         """显示导入选项对话框"""
@@ -1490,798 +1504,60 @@ class ModernPasswordVault:
         
         dialog.wait_window()
     
-    def _perform_import(self, import_passwords, import_mode):
-        """执行数据导入"""
-        imported_count = 0
-        merged_count = 0
-        
-        if import_mode == "replace":
-            # 替换所有数据
-            self.passwords = import_passwords.copy()
-            imported_count = len(self.passwords)
-        else:
-            # 合并数据
-            for import_item in import_passwords:
-                import_website = import_item['website']
-                import_accounts = import_item['accounts']
-                
-                # 查找现有网站
-                existing_item = None
-                for existing in self.passwords:
-                    if existing['website'] == import_website:
-                        existing_item = existing
-                        break
-                
-                if existing_item:
-                    # 合并账户
-                    merged_count += 1
-                    existing_accounts = existing_item['accounts']
-                    
-                    for import_account in import_accounts:
-                        # 检查是否已存在相同用户名的账户
-                        account_exists = False
-                        for existing_account in existing_accounts:
-                            if existing_account['username'] == import_account['username']:
-                                # 更新密码和其他信息
-                                existing_account.update(import_account)
-                                account_exists = True
-                                break
-                        
-                        if not account_exists:
-                            # 添加新账户，确保有创建时间
-                            new_account = import_account.copy()
-                            if 'created_time' not in new_account:
-                                new_account['created_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
-                            existing_accounts.append(new_account)
-                else:
-                    # 添加新网站
-                    imported_count += 1
-                    new_item = import_item.copy()
-                    
-                    # 确保所有账户都有创建时间
-                    for account in new_item['accounts']:
-                        if 'created_time' not in account:
-                            account['created_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    self.passwords.append(new_item)
-        
-        return imported_count, merged_count
-    
     def copy_password(self):
         """复制密码"""
-        selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            display_website = str(item['values'][0])
+        row = self._selected_row()
+        if row is not None:
+            pwd, account, _ = row
+            self.engine.fill_passwords([pwd])
+            password = account.get('password', '')
             
-            # 处理缩进的网站名
-            website = display_website.replace("  └─ ", "").strip()
-            
-            username = str(item['values'][1])
-            
-            for pwd in self.passwords:
-                if str(pwd.get('website', '')) == website:
-                    accounts = pwd.get('accounts', [])
-                    # 找到匹配的账户
-                    for account in accounts:
-                        if str(account.get('username', '')) == username:
-                            password = account.get('password', '')
-                            
-                            self.root.clipboard_clear()
-                            self.root.clipboard_append(password)
-                            self.status_label.config(text="密码已复制到剪贴板")
-                            return
-                    break
+            self.root.clipboard_clear()
+            self.root.clipboard_append(password)
+            self.status_label.config(text="密码已复制到剪贴板")
     
     def copy_username(self):
         """复制账号"""
-        selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            website = str(item['values'][0])
-            
-            for pwd in self.passwords:
-                if pwd['website'] == website:
-                    accounts = pwd.get('accounts', [])
-                    if accounts:
-                        # 复制第一个账户的用户名
-                        first_account = accounts[0]
-                        username = first_account.get('username', '')
-                        self.root.clipboard_clear()
-                        self.root.clipboard_append(username)
-                        self.status_label.config(text="账号已复制到剪贴板")
-                    break
+        row = self._selected_row()
+        if row is not None:
+            # 复制选中行的账户的用户名
+            username = row[1].get('username', '')
+            if username:
+                self.root.clipboard_clear()
+                self.root.clipboard_append(username)
+                self.status_label.config(text="账号已复制到剪贴板")
     
     def run(self):
         """运行应用"""
-        self.root.mainloop()
-
-class VaultSetupDialog:
-    """保险库设置对话框"""
-    def __init__(self, parent, colors):
-        self.result = None
-        self.colors = colors
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("设置主密码")
-        self.dialog.geometry("520x450")
-        self.dialog.resizable(False, False)
-        self.dialog.configure(bg=colors['light'])
-        
-        # 居中显示
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.create_widgets()
-        self.dialog.wait_window()
-    
-    def create_widgets(self):
-        """创建对话框组件"""
-        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
-        
-        # 标题
-        title_label = tk.Label(main_frame, text="🔐 设置主密码", 
-                              font=("SF Pro Display", 18, "bold"),
-                              fg=self.colors['text_primary'],
-                              bg=self.colors['light'])
-        title_label.pack(pady=(0, 10))
-        
-        desc_label = tk.Label(main_frame, text="请设置一个强密码来保护您的密码库", 
-                             font=("SF Pro Text", 11),
-                             fg=self.colors['text_secondary'],
-                             bg=self.colors['light'])
-        desc_label.pack(pady=(0, 30))
-        
-        # 密码输入框
-        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        password_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        tk.Label(password_frame, text="主密码:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.password_entry = tk.Entry(password_frame, show="*", 
-                                      font=("SF Pro Text", 12),
-                                      relief='flat', bd=1,
-                                      bg=self.colors['white'])
-        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 确认密码输入框
-        confirm_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        confirm_frame.pack(fill=tk.X, pady=(0, 30))
-        
-        tk.Label(confirm_frame, text="确认密码:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.confirm_entry = tk.Entry(confirm_frame, show="*", 
-                                     font=("SF Pro Text", 12),
-                                     relief='flat', bd=1,
-                                     bg=self.colors['white'])
-        self.confirm_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 按钮
-        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        button_frame.pack(fill=tk.X)
-        
-        cancel_btn = tk.Button(button_frame, text="取消", 
-                              font=("SF Pro Text", 12, 'bold'),
-                              bg=self.colors['surface'],
-                              fg='#262730',
-                              relief='flat', bd=1,
-                              cursor='hand2',
-                              command=self.cancel)
-        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
-        
-        ok_btn = tk.Button(button_frame, text="确定", 
-                          font=("SF Pro Text", 12, "bold"),
-                          bg=self.colors['surface'],
-                          fg='#262730',
-                          relief='flat', bd=1,
-                          cursor='hand2',
-                          command=self.ok)
-        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
-        
-        # 绑定回车键
-        self.dialog.bind('<Return>', lambda e: self.ok())
-        self.password_entry.focus()
-    
-    def ok(self):
-        """确定按钮"""
-        password = self.password_entry.get()
-        confirm = self.confirm_entry.get()
-        
-        if not password:
-            messagebox.showerror("错误", "请输入主密码")
-            return
-        
-        if password != confirm:
-            messagebox.showerror("错误", "两次输入的密码不一致")
-            return
-        
-        if len(password) < 6:
-            messagebox.showerror("错误", "密码长度至少6位")
-            return
-        
-        self.result = password
-        self.dialog.destroy()
-    
-    def cancel(self):
-        """取消按钮"""
-        self.dialog.destroy()
-
-class VaultUnlockDialog:
-    """保险库解锁对话框"""
-    def __init__(self, parent, colors):
-        self.result = None
-        self.colors = colors
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("解锁保险库")
-        self.dialog.geometry("350x200")
-        self.dialog.resizable(False, False)
-        self.dialog.configure(bg=colors['light'])
-        
-        # 居中显示
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.create_widgets()
-        self.dialog.wait_window()
-    
-    def create_widgets(self):
-        """创建对话框组件"""
-        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
-        
-        # 标题
-        title_label = tk.Label(main_frame, text="🔓 解锁保险库", 
-                              font=("SF Pro Display", 18, "bold"),
-                              fg=self.colors['text_primary'],
-                              bg=self.colors['light'])
-        title_label.pack(pady=(0, 20))
-        
-        # 密码输入框
-        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        password_frame.pack(fill=tk.X, pady=(0, 30))
-        
-        tk.Label(password_frame, text="主密码:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.password_entry = tk.Entry(password_frame, show="*", 
-                                      font=("SF Pro Text", 12),
-                                      relief='flat', bd=1,
-                                      bg=self.colors['white'])
-        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 按钮
-        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        button_frame.pack(fill=tk.X)
-        
-        cancel_btn = tk.Button(button_frame, text="取消", 
-                              font=("SF Pro Text", 12, 'bold'),
-                              bg=self.colors['surface'],
-                              fg='#262730',
-                              relief='flat', bd=1,
-                              cursor='hand2',
-                              command=self.cancel)
-        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
-        
-        ok_btn = tk.Button(button_frame, text="解锁", 
-                          font=("SF Pro Text", 12, "bold"),
-                          bg=self.colors['primary'],
-                          fg='#262730',
-                          relief='flat', bd=0,
-                          cursor='hand2',
-                          command=self.ok)
-        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
-        
-        # 绑定回车键
-        self.dialog.bind('<Return>', lambda e: self.ok())
-        self.password_entry.focus()
-    
-    def ok(self):
-        """确定按钮"""
-        password = self.password_entry.get()
-        
-        if not password:
-            messagebox.showerror("错误", "请输入主密码")
-            return
-        
-        self.result = password
-        self.dialog.destroy()
-    
-    def cancel(self):
-        """取消按钮"""
-        self.dialog.destroy()
-
-class PasswordDialog:
-    """密码编辑对话框"""
-    def __init__(self, parent, colors, title, password_data=None):
-        self.result = None
-        self.colors = colors
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(title)
-        self.dialog.geometry("600x640")
-        self.dialog.resizable(False, False)
-        self.dialog.configure(bg=colors['light'])
-        
-        # 居中显示
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.create_widgets(password_data)
-        self.dialog.wait_window()
-    
-    def create_widgets(self, password_data):
-        """创建对话框组件"""
-        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
-        
-        # 标题
-        title_label = tk.Label(main_frame, text="📝 密码信息", 
-                              font=("SF Pro Display", 16, "bold"),
-                              fg=self.colors['text_primary'],
-                              bg=self.colors['light'])
-        title_label.pack(pady=(0, 20))
-        
-        # 网站/应用
-        website_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        website_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        tk.Label(website_frame, text="网站/应用:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.website_entry = tk.Entry(website_frame, 
-                                     font=("SF Pro Text", 12),
-                                     relief='flat', bd=1,
-                                     bg=self.colors['white'])
-        self.website_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 账号
-        username_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        username_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        tk.Label(username_frame, text="账号:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.username_entry = tk.Entry(username_frame, 
-                                      font=("SF Pro Text", 12),
-                                      relief='flat', bd=1,
-                                      bg=self.colors['white'])
-        self.username_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 密码
-        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        password_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        tk.Label(password_frame, text="密码:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.password_entry = tk.Entry(password_frame, show="*", 
-                                      font=("SF Pro Text", 12),
-                                      relief='flat', bd=1,
-                                      bg=self.colors['white'])
-        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 显示/隐藏密码按钮
-        toggle_btn = tk.Button(password_frame, text="👁️ 显示密码", 
-                              font=("SF Pro Text", 10, 'bold'),
-                              bg=self.colors['surface'],
-                              fg=self.colors['text'],
-                              relief='flat', bd=1,
-                              cursor='hand2',
-                              command=self.toggle_password_visibility)
-        toggle_btn.pack(anchor=tk.W, pady=(5, 0), ipadx=12, ipady=6)
-        
-        # 描述
-        desc_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        desc_frame.pack(fill=tk.X, pady=(0, 20))
-        
-        tk.Label(desc_frame, text="描述 (可选):", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        
-        self.desc_entry = tk.Entry(desc_frame, 
-                                  font=("SF Pro Text", 12),
-                                  relief='flat', bd=1,
-                                  bg=self.colors['white'])
-        self.desc_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        
-        # 按钮
-        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        button_frame.pack(fill=tk.X, pady=(20, 0))
-        
-        cancel_btn = tk.Button(button_frame, text="取消", 
-                              font=("SF Pro Text", 12, 'bold'),
-                              bg=self.colors['surface'],
-                              fg='#262730',
-                              relief='flat', bd=1,
-                              cursor='hand2',
-                              command=self.cancel)
-        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
-        
-        ok_btn = tk.Button(button_frame, text="确定", 
-                          font=("SF Pro Text", 12, "bold"),
-                          bg=self.colors['surface'],
-                          fg='#262730',
-                          relief='flat', bd=1,
-                          cursor='hand2',
-                          command=self.ok)
-        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
-        
-        # 如果提供了现有数据，填充表单
-        if password_data:
-            self.website_entry.insert(0, password_data.get('website', ''))
-            self.username_entry.insert(0, password_data.get('username', ''))
-            self.password_entry.insert(0, password_data.get('password', ''))
-            self.desc_entry.insert(0, password_data.get('description', ''))
-        
-        # 绑定回车键
-        self.dialog.bind('<Return>', lambda e: self.ok())
-        self.website_entry.focus()
-    
-    def toggle_password_visibility(self):
-        """切换密码显示/隐藏"""
-        if self.password_entry.cget('show') == '*':
-            self.password_entry.config(show='')
-        else:
-            self.password_entry.config(show='*')
-    
-    def ok(self):
-        """确定按钮"""
-        website = self.website_entry.get().strip()
-        username = self.username_entry.get().strip()
-        password = self.password_entry.get().strip()
-        description = self.desc_entry.get().strip()
-        
-        if not website:
-            messagebox.showerror("错误", "请输入网站/应用名称")
-            return
-        
-        if not username:
-            messagebox.showerror("错误", "请输入账号")
-            return
-        
-        if not password:
-            messagebox.showerror("错误", "请输入密码")
-            return
-        
-        self.result = {
-            'website': website,
-            'username': username,
-            'password': password,
-            'description': description
-        }
-        self.dialog.destroy()
-    
-    def cancel(self):
-        """取消按钮"""
-        self.dialog.destroy()
-
-class AccountManagerDialog:
-    """账户管理对话框"""
-    def __init__(self, parent, colors, website, accounts):
-        self.result = None
-        self.colors = colors
-        self.website = website
-        self.accounts = accounts.copy()
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(f"管理 {website} 的账户")
-        self.dialog.geometry("720x560")
-        self.dialog.resizable(False, False)
-        self.dialog.configure(bg=colors['light'])
-        
-        # 居中显示
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.create_widgets()
-        self.dialog.wait_window()
-    
-    def create_widgets(self):
-        """创建对话框组件"""
-        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
-        
-        # 标题
-        title_label = tk.Label(main_frame, text=f"📱 {self.website} 账户管理", 
-                              font=("SF Pro Display", 16, "bold"),
-                              fg=self.colors['text_primary'],
-                              bg=self.colors['light'])
-        title_label.pack(pady=(0, 20))
+        try:
+            self.root.mainloop()
+        finally:
+            # 退出前写入所有待保存的修改（写盘失败时已重试一次）
+            try:
+                self.engine.close()
+            except Exception as e:
+                logger.error("退出时保存失败，修改没有写入: %s", e)
+            finally:
+                self.authenticator.close()
+            logger.debug("保存统计: %s", self.engine.stats.summary())
+            logger.debug("认证统计: %s", self.authenticator.stats.summary())
 
-        # 可编辑的网站/应用名称
-        website_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        website_frame.pack(fill=tk.X, pady=(0, 15))
-        tk.Label(website_frame, text="网站/应用:", 
-                font=("SF Pro Text", 12),
-                fg=self.colors['text_primary'],
-                bg=self.colors['light']).pack(anchor=tk.W)
-        self.website_entry = tk.Entry(website_frame, 
-                                     font=("SF Pro Text", 12),
-                                     relief='flat', bd=1,
-                                     bg=self.colors['white'])
-        self.website_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
-        self.website_entry.insert(0, self.website)
-        
-        # 账户列表
-        list_frame = tk.Frame(main_frame, bg=self.colors['white'], relief='flat', bd=0)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
-        
-        # 创建Treeview显示账户
-        columns = ('账号', '密码', '描述', '创建时间')
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
-        
-        self.tree.heading('账号', text='账号')
-        self.tree.heading('密码', text='密码')
-        self.tree.heading('描述', text='描述')
-        self.tree.heading('创建时间', text='创建时间')
-        
-        self.tree.column('账号', width=180)
-        self.tree.column('密码', width=140)
-        self.tree.column('描述', width=220)
-        self.tree.column('创建时间', width=150)
-        
-        # 滚动条
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 更新账户列表
-        self.update_account_list()
-        
-        # 按钮区域
-        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        button_frame.pack(fill=tk.X)
-        
-        # 左侧按钮
-        left_buttons = tk.Frame(button_frame, bg=self.colors['light'])
-        left_buttons.pack(side=tk.LEFT)
-        
-        add_btn = tk.Button(left_buttons, text="➕ 添加账户", 
-                           font=("SF Pro Text", 11, 'bold'),
-                           bg=self.colors['surface'],
-                           fg=self.colors['text'],
-                           relief='flat', bd=1,
-                           cursor='hand2',
-                           command=self.add_account)
-        add_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=15, ipady=8)
-        
-        edit_btn = tk.Button(left_buttons, text="✏️ 编辑", 
-                            font=("SF Pro Text", 11, 'bold'),
-                            bg=self.colors['surface'],
-                            fg=self.colors['text'],
-                            relief='flat', bd=1,
-                            cursor='hand2',
-                            command=self.edit_account)
-        edit_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=15, ipady=8)
-        
-        delete_btn = tk.Button(left_buttons, text="🗑️ 删除", 
-                              font=("SF Pro Text", 11, 'bold'),
-                              bg=self.colors['danger'],
-                              fg=self.colors['white'],
-                              relief='flat', bd=0,
-                              cursor='hand2',
-                              command=self.delete_account)
-        delete_btn.pack(side=tk.LEFT, ipadx=15, ipady=8)
-        
-        # 右侧按钮
-        right_buttons = tk.Frame(button_frame, bg=self.colors['light'])
-        right_buttons.pack(side=tk.RIGHT, padx=10)
-        
-        cancel_btn = tk.Button(right_buttons, text="取消", 
-                              font=("SF Pro Text", 11, 'bold'),
-                              bg='#6C757D',
-                              fg='#262730',
-                              relief='flat', bd=0,
-                              cursor='hand2',
-                              command=self.cancel)
-        cancel_btn.pack(side=tk.LEFT, padx=(10, 0), ipadx=25, ipady=8)
-        
-        ok_btn = tk.Button(right_buttons, text="确定", 
-                          font=("SF Pro Text", 11, "bold"),
-                          bg=self.colors['surface'],
-                          fg='#262730',
-                          relief='flat', bd=1,
-                          cursor='hand2',
-                          command=self.ok)
-        ok_btn.pack(side=tk.LEFT, ipadx=25, ipady=8)
-    
-    def update_account_list(self):
-        """更新账户列表"""
-        # 清空现有项目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 添加账户项目
-        for account in self.accounts:
-            username = account.get('username', '')
-            password = '•' * len(account.get('password', ''))
-            description = account.get('description', '')
-            created_time = account.get('created_time', '')
-            
-            self.tree.insert('', 'end', values=(username, password, description, created_time))
-    
-    def add_account(self):
-        """添加账户"""
-        dialog = PasswordDialog(self.dialog, self.colors, "添加账户")
-        if dialog.result:
-            new_account = {
-                'username': dialog.result['username'],
-                'password': dialog.result['password'],
-                'description': dialog.result['description'],
-                'created_time': time.strftime('%Y-%m-%d %H:%M')
-            }
-            self.accounts.append(new_account)
-            self.update_account_list()
-    
-    def edit_account(self):
-        """编辑账户"""
-        selection = self.tree.selection()
-        if not selection:
-            messagebox.showwarning("警告", "请先选择要编辑的账户")
-            return
-        
-        item = self.tree.item(selection[0])
-        username = str(item['values'][0])
-        
-        # 找到对应的账户
-        account = None
-        for acc in self.accounts:
-            if acc.get('username') == username:
-                account = acc
-                break
-        
-        if account:
-            dialog = PasswordDialog(self.dialog, self.colors, "编辑账户", account)
-            if dialog.result:
-                account.update(dialog.result)
-                account['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
-                self.update_account_list()
-    
-    def delete_account(self):
-        """删除账户"""
-        selection = self.tree.selection()
-        if not selection:
-            messagebox.showwarning("警告", "请先选择要删除的账户")
-            return
-        
-        item = self.tree.item(selection[0])
-        username = str(item['values'][0])
-        
-        if messagebox.askyesno("确认删除", f"确定要删除账户 '{username}' 吗？"):
-            self.accounts = [acc for acc in self.accounts if acc.get('username') != username]
-            self.update_account_list()
-    
-    def ok(self):
-        """确定按钮"""
-        new_website = self.website_entry.get().strip() or self.website
-        self.result = {
-            'website': new_website,
-            'accounts': self.accounts
-        }
-        self.dialog.destroy()
-    
-    def cancel(self):
-        """取消按钮"""
-        self.dialog.destroy()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="密码保险库")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="输出启动各阶段（导入、Tk初始化、主题、认证、加载、首次绘制）的耗时")
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help="把启动耗时作为一行JSON追加到文件（隐含 --profile-startup）")
+    # 打包成应用后系统可能传入额外的参数（如 -psn_...），忽略它们
+    args, _ = parser.parse_known_args(argv)
+    # 存储等模块的提示和错误输出到标准错误
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    profile = StartupProfile(_IMPORT_START, enabled=args.profile_startup or bool(args.profile_output),
+                             output=args.profile_output)
+    app = ModernPasswordVault(profile)
+    app.run()
 
-class AccountDeleteDialog:
-    """账户删除选择对话框"""
-    def __init__(self, parent, colors, website, accounts):
-        self.result = None
-        self.colors = colors
-        self.website = website
-        self.accounts = accounts.copy()
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(f"选择要删除的账户 - {website}")
-        self.dialog.geometry("500x400")
-        self.dialog.resizable(False, False)
-        self.dialog.configure(bg=colors['light'])
-        
-        # 居中显示
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.create_widgets()
-        self.dialog.wait_window()
-    
-    def create_widgets(self):
-        """创建对话框组件"""
-        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
-        
-        # 标题
-        title_label = tk.Label(main_frame, text=f"🗑️ 选择要删除的账户", 
-                              font=("SF Pro Display", 16, "bold"),
-                              fg=self.colors['text_primary'],
-                              bg=self.colors['light'])
-        title_label.pack(pady=(0, 10))
-        
-        desc_label = tk.Label(main_frame, text=f"网站/应用: {self.website}", 
-                             font=("SF Pro Text", 12),
-                             fg=self.colors['text_secondary'],
-                             bg=self.colors['light'])
-        desc_label.pack(pady=(0, 20))
-        
-        # 账户列表
-        list_frame = tk.Frame(main_frame, bg=self.colors['white'], relief='flat', bd=0)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
-        
-        # 创建Checkbox列表
-        self.checkboxes = []
-        for i, account in enumerate(self.accounts):
-            var = tk.BooleanVar()
-            username = account.get('username', '')
-            description = account.get('description', '')
-            
-            checkbox_frame = tk.Frame(list_frame, bg=self.colors['white'])
-            checkbox_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            cb = tk.Checkbutton(checkbox_frame, 
-                               text=f"{username} {f'({description})' if description else ''}",
-                               variable=var,
-                               font=("SF Pro Text", 11),
-                               bg=self.colors['white'],
-                               fg=self.colors['text_primary'])
-            cb.pack(anchor=tk.W)
-            
-            self.checkboxes.append((var, account))
-        
-        # 按钮区域
-        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
-        button_frame.pack(fill=tk.X)
-        
-        cancel_btn = tk.Button(button_frame, text="取消", 
-                              font=("SF Pro Text", 11, 'bold'),
-                              bg=self.colors['surface'],
-                              fg='#262730',
-                              relief='flat', bd=1,
-                              command=self.cancel)
-        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
-        
-        ok_btn = tk.Button(button_frame, text="删除选中", 
-                          font=("SF Pro Text", 11, "bold"),
-                          bg=self.colors['danger'],
-                          fg=self.colors['white'],
-                          relief='flat', bd=0,
-                          cursor='hand2',
-                          command=self.ok)
-        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
-    
-    def ok(self):
-        """确定按钮"""
-        # 获取未选中的账户（保留的账户）
-        remaining_accounts = []
-        for var, account in self.checkboxes:
-            if not var.get():  # 如果未选中，则保留
-                remaining_accounts.append(account)
-        
-        self.result = remaining_accounts
-        self.dialog.destroy()
-    
-    def cancel(self):
-        """取消按钮"""
-        self.dialog.destroy()
 
 if __name__ == "__main__":
-    app = ModernPasswordVault()
-    app.run()
+    main()
+
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""常驻辅助程序认证：用 touchid_fake.py 走完整的行协议"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from vault_auth import (AUTH_CANCELLED, AUTH_ERROR, AUTH_NOT_AVAILABLE, AUTH_SUCCESS,
+                        HelperAuthenticator)
+
+FAKE_HELPER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'touchid_fake.py')
+
+
+@pytest.fixture
+def make_authenticator(tmp_path, monkeypatch):
+    """按环境变量配置模拟辅助程序（辅助程序启动时读取），测试结束时关闭"""
+    created = []
+
+    def make(helper=FAKE_HELPER, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        authenticator = HelperAuthenticator([sys.executable, helper], helper, str(tmp_path / 'auth_cache.json'))
+        created.append(authenticator)
+        return authenticator
+
+    yield make
+    for authenticator in created:
+        authenticator.close()
+
+
+def _wait_for_process(authenticator, timeout=5):
+    deadline = time.monotonic() + timeout
+    while authenticator._process is None:
+        assert time.monotonic() < deadline, "辅助程序没有启动"
+        time.sleep(0.01)
+
+
+def test_helper_stays_resident_and_probe_is_cached(make_authenticator):
+    authenticator = make_authenticator()
+    assert authenticator.authenticate("test") == AUTH_SUCCESS
+    assert authenticator.authenticate("test") == AUTH_SUCCESS
+    stats = authenticator.stats
+    assert (stats.auths, stats.spawns, stats.probes, stats.last_spawns) == (2, 1, 1, 0)
+
+    # 新的实例（下次启动）直接使用缓存的可用性，不再发送 PROBE
+    again = make_authenticator()
+    assert again.available()
+    assert (again.stats.spawns, again.stats.probes, again.stats.probes_cached) == (0, 0, 1)
+
+
+def test_auth_result_is_passed_through(make_authenticator):
+    authenticator = make_authenticator(TOUCHID_FAKE_RESULT='TOUCHID_LOCKOUT')
+    assert authenticator.authenticate("test") == 'TOUCHID_LOCKOUT'
+
+
+def test_unavailable_helper_is_not_cached(make_authenticator):
+    authenticator = make_authenticator(TOUCHID_FAKE_AVAILABLE='0')
+    assert authenticator.authenticate("test") == AUTH_NOT_AVAILABLE
+    assert not authenticator.cache.is_available(authenticator.helper_hash())
+
+
+def test_helper_without_ready_handshake_is_unavailable(make_authenticator, tmp_path):
+    helper = tmp_path / 'old_helper.py'
+    helper.write_text("print('TOUCHID_AVAILABLE')\n", encoding='utf-8')
+    authenticator = make_authenticator(str(helper))
+    assert authenticator.authenticate("test") == AUTH_NOT_AVAILABLE
+    assert authenticator._process is None
+
+
+def test_cancel_before_request_does_not_send_auth(make_authenticator):
+    authenticator = make_authenticator()
+    assert authenticator.available()
+    spawns = authenticator.stats.spawns
+    cancelled = threading.Event()
+    cancelled.set()
+    authenticator.cancel()
+    assert authenticator.authenticate("test", cancelled) == AUTH_CANCELLED
+    assert authenticator.stats.spawns == spawns
+    # 取消只对那一次请求有效
+    assert authenticator.authenticate("test") == AUTH_SUCCESS
+
+
+def test_cancel_during_request(make_authenticator):
+    authenticator = make_authenticator(TOUCHID_FAKE_DELAY='10')
+    assert authenticator.available()
+    cancelled = threading.Event()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(authenticator.authenticate("test", cancelled)))
+    start = time.monotonic()
+    worker.start()
+    time.sleep(0.2)
+    cancelled.set()
+    authenticator.cancel()
+    worker.join(5)
+    assert result == [AUTH_CANCELLED]
+    assert time.monotonic() - start < 5
+
+
+def test_helper_is_restarted_after_crash(make_authenticator):
+    authenticator = make_authenticator()
+    assert authenticator.authenticate("test") == AUTH_SUCCESS
+    _wait_for_process(authenticator)
+    authenticator._process.kill()
+    authenticator._process.wait()
+    assert authenticator.authenticate("test") == AUTH_SUCCESS
+    assert authenticator.stats.spawns == 2
+
+
+def test_crash_during_request_reports_error(make_authenticator):
+    authenticator = make_authenticator(TOUCHID_FAKE_DELAY='10')
+    assert authenticator.available()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(authenticator.authenticate("test")))
+    worker.start()
+    time.sleep(0.2)
+    authenticator._process.kill()
+    worker.join(5)
+    assert result == [AUTH_ERROR]
+    assert authenticator._process is None
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""网站列表和内存索引"""
+
+import pytest
+
+from vault_index import COMPACT_MIN_HOLES, SiteList, VaultIndex
+from vault_model import Site
+
+
+def _site(website, *usernames):
+    return Site.from_dict({'website': website,
+                           'accounts': [{'username': name, 'password': 'pw'} for name in usernames]})
+
+
+def test_site_list_remove_keeps_order_and_compacts():
+    sites = [_site(f"site{i}.com") for i in range(COMPACT_MIN_HOLES * 4)]
+    site_list = SiteList(sites)
+    removed = sites[::2] + sites[1:COMPACT_MIN_HOLES:2]
+    for site in removed:
+        site_list.remove(site)
+    expected = [site for site in sites if not any(site is other for other in removed)]
+    assert len(site_list) == len(expected)
+    assert all(a is b for a, b in zip(site_list, expected))
+    assert site_list[0] is expected[0] and site_list[-1] is expected[-1]
+
+    site_list.append(sites[0])
+    assert site_list[-1] is sites[0]
+    site_list.remove(sites[0])
+    with pytest.raises(ValueError):
+        site_list.remove(sites[0])
+
+
+def test_site_list_removes_by_identity_not_equality():
+    first, twin = _site('a.com', 'u'), _site('a.com', 'u')
+    site_list = SiteList([first, twin])
+    site_list.remove(twin)
+    assert list(site_list) == [first] and next(iter(site_list)) is first
+
+
+def test_index_finds_sites_and_accounts_case_insensitively():
+    site = _site('GitHub.com', 'alice', 'bob')
+    index = VaultIndex([site])
+    assert index.find_site('github.COM') is site
+    assert index.find_account(site, 'bob')['username'] == 'bob'
+    index.remove_site(site)
+    assert index.find_site('github.com') is None
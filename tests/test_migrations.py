@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""数据结构迁移步骤"""
+
+from vault_migrations import SCHEMA_VERSION, migrate
+
+
+def test_flat_record_with_merged_accounts_is_converted():
+    # 加载时与同名网站合并过的旧记录：单账户字段还在，同时已有 accounts
+    site = {'website': 'github.com', 'username': 'alice', 'password': 'alice-pw',
+            'accounts': [{'username': 'bob', 'password': 'bob-pw'}]}
+    result = migrate([site], None)
+    assert result.to_version == SCHEMA_VERSION
+    assert result.changed == [site]
+    assert set(site) == {'website', 'accounts', 'id'}
+    assert [(account['username'], account['password']) for account in site['accounts']] == \
+        [('alice', 'alice-pw'), ('bob', 'bob-pw')]
+    assert all(account.get('id') for account in site['accounts'])
+
+
+def test_current_version_is_not_migrated():
+    site = {'website': 'github.com', 'accounts': []}
+    assert migrate([site], SCHEMA_VERSION) is None
+    assert site == {'website': 'github.com', 'accounts': []}
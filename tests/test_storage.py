@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""存储后端：加载、合并同名网站和旧格式数据的转换"""
+
+import json
+
+import pytest
+
+from vault_engine import VaultEngine
+from vault_storage import SaveScheduler, merge_duplicate_sites
+
+# 版本1的单账户记录，同一个网站有两个账号
+LEGACY_V1 = [
+    {'website': 'github.com', 'username': 'alice', 'password': 'alice-pw', 'created_time': '2020-01-01 10:00'},
+    {'website': 'example.com', 'username': 'carol', 'password': 'carol-pw', 'created_time': '2020-01-02 10:00'},
+    {'website': 'github.com', 'username': 'bob', 'password': 'bob-pw', 'created_time': '2020-01-03 10:00'},
+]
+
+
+def _accounts(engine):
+    return {site['website']: [(account['username'], account['password']) for account in site['accounts']]
+            for site in engine.passwords}
+
+
+def _load(directory, data_file):
+    engine = VaultEngine(str(directory / data_file), key_file=str(directory / 'vault.key'))
+    engine.load(fill_passwords=True)
+    return engine
+
+
+@pytest.mark.parametrize('data_file', ['passwords.json', 'passwords.db', 'passwords.vault'])
+def test_legacy_duplicate_websites_keep_all_accounts(tmp_path, data_file):
+    (tmp_path / 'passwords.json').write_text(json.dumps(LEGACY_V1), encoding='utf-8')
+    expected = {'github.com': [('alice', 'alice-pw'), ('bob', 'bob-pw')],
+                'example.com': [('carol', 'carol-pw')]}
+
+    engine = _load(tmp_path, data_file)
+    assert _accounts(engine) == expected
+    for site in engine.passwords:
+        assert 'username' not in site and 'password' not in site
+    engine.close()
+
+    # 转换后的数据已标记为最新版本，重新打开时内容不变
+    engine = _load(tmp_path, data_file)
+    assert engine.migration is None
+    assert _accounts(engine) == expected
+    engine.close()
+
+
+def test_merge_duplicate_sites_converts_flat_records():
+    sites = [dict(site) for site in LEGACY_V1]
+    merge_duplicate_sites(sites)
+    assert [site['website'] for site in sites] == ['github.com', 'example.com']
+    assert [account['username'] for account in sites[0]['accounts']] == ['alice', 'bob']
+    assert 'username' not in sites[0]
+
+
+class FlakyWriter:
+    """前 failures 次写盘抛出 OSError"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.writes = 0
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.writes += 1
+
+
+def test_scheduler_coalesces_marks_into_one_write():
+    writer = FlakyWriter()
+    scheduler = SaveScheduler(writer, delay=10, max_delay=10)
+    for _ in range(5):
+        scheduler.mark_dirty()
+    assert scheduler.flush()
+    assert writer.writes == 1
+    assert scheduler.stats.writes_avoided == 4
+    scheduler.close()
+
+
+def test_scheduler_keeps_failed_write_pending():
+    writer = FlakyWriter(failures=2)
+    errors = []
+    scheduler = SaveScheduler(writer, delay=10, max_delay=10, on_error=errors.append)
+    scheduler.mark_dirty()
+    assert not scheduler.flush()
+    assert not scheduler.flush()
+    # 连续失败只通知一次；修改仍待保存，关闭时重试成功
+    assert len(errors) == 1
+    scheduler.close()
+    assert writer.writes == 1
+
+
+def test_scheduler_close_raises_when_retry_fails():
+    writer = FlakyWriter(failures=99)
+    scheduler = SaveScheduler(writer, delay=10, max_delay=10, on_error=lambda error: None)
+    scheduler.mark_dirty()
+    with pytest.raises(OSError):
+        scheduler.close()
+    assert not scheduler._thread.is_alive()
+    assert writer.writes == 0
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""虚拟化表格的局部更新（用不需要显示器的 Treeview 替身）"""
+
+import itertools
+import random
+
+import pytest
+
+from vault_engine import VaultEngine
+from vault_table import REINDEX_SHIFTS, VirtualTable
+
+
+class FakeTree:
+    """记录项目顺序和内容的 Treeview 替身，只实现 VirtualTable 用到的方法"""
+
+    def __init__(self, height=10):
+        self.items = {}
+        self.order = []
+        self.height = height
+        self._selection = ()
+        self._ids = itertools.count()
+
+    def insert(self, parent, index, iid=None, values=()):
+        iid = iid if iid is not None else f"I{next(self._ids)}"
+        assert iid not in self.items, f"duplicate item {iid}"
+        self.items[iid] = values
+        self.order.insert(len(self.order) if index == 'end' else index, iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+            self.order.remove(iid)
+
+    def item(self, iid, values=None):
+        if values is not None:
+            self.items[iid] = values
+        return {'values': self.items[iid]}
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, items):
+        self._selection = (items,) if isinstance(items, str) else tuple(items)
+
+    def cget(self, option):
+        return self.height if option == 'height' else ''
+
+    def winfo_height(self):
+        return 1
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+    def yview(self, *args):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def focus(self, iid):
+        pass
+
+
+class FakeScrollbar:
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def _rows_for(sites):
+    # 与主界面相同：每个账户一行 (网站, 账户, 序号)
+    return [(site, account, i) for site in sites for i, account in enumerate(site.get('accounts', []))]
+
+
+def _table(rows, threshold=2000):
+    table = VirtualTable(FakeTree(), FakeScrollbar(),
+                         lambda row: (row[0]['website'], row[1]['username'], row[1].get('password', '')),
+                         row_key=lambda row: row[1].get('id') or id(row[1]),
+                         row_group=lambda row: row[0], threshold=threshold)
+    table.set_rows(rows)
+    return table
+
+
+def _shown(table):
+    return [table.tree.items[iid] for iid in table.tree.order]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = VaultEngine(str(tmp_path / 'passwords.json'), key_file=str(tmp_path / 'vault.key'))
+    engine.load()
+    engine.add_account('a.com', 'u', 'new-password')
+    engine.add_account('b.com', 'u', 'old-password')
+    engine.add_account('b.com', 'v', 'v-password')
+    yield engine
+    engine.close()
+
+
+def test_move_account_onto_existing_username_patches_rows(engine):
+    table = _table(_rows_for(engine.passwords))
+    site_a = engine.index.find_site('a.com')
+    site_b = engine.index.find_site('b.com')
+    target_id = engine.index.find_account(site_b, 'u')['id']
+
+    changed, removed = engine.edit_account(site_a, site_a['accounts'][0], 'b.com', 'u', 'new-password')
+    for site in removed:
+        table.update_group(site, [])
+    for site in changed:
+        table.update_group(site, _rows_for([site]))
+
+    # 目标账户保留自己的ID，表格中没有留下旧内容的重复项目
+    assert engine.index.find_account(site_b, 'u')['id'] == target_id
+    assert _shown(table) == [('b.com', 'u', 'new-password'), ('b.com', 'v', 'v-password')]
+    assert table.tree.order == [table._iid(row) for row in table.rows]
+
+
+def test_rename_site_onto_existing_site_keeps_target_ids(engine):
+    site_a = engine.index.find_site('a.com')
+    site_b = engine.index.find_site('b.com')
+    target_ids = [account['id'] for account in site_b['accounts']]
+    table = _table(_rows_for(engine.passwords))
+
+    result = engine.update_site(site_a, 'b.com', [account.to_dict() for account in site_a['accounts']])
+    table.update_group(site_a, [])
+    table.update_group(result, _rows_for([result]))
+
+    assert [account['id'] for account in result['accounts']] == target_ids
+    assert _shown(table) == [('b.com', 'u', 'new-password'), ('b.com', 'v', 'v-password')]
+
+
+class Group:
+    """测试用的组（相当于网站记录），按对象身份区分"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _group_table(rows, threshold, row_group=lambda row: row[0]):
+    table = VirtualTable(FakeTree(), FakeScrollbar(), lambda row: (row[0].name, row[1]),
+                         row_key=lambda row: row[1], row_group=row_group, threshold=threshold)
+    table.set_rows(rows)
+    return table
+
+
+@pytest.mark.parametrize('threshold', [10000, 0], ids=['normal', 'virtual'])
+def test_update_group_matches_full_rebuild(threshold):
+    rng = random.Random(7)
+    ids = itertools.count()
+    model = {}
+    for i in range(30):
+        model[Group(f"g{i}")] = [next(ids) for _ in range(rng.randint(1, 4))]
+    table = _group_table([(group, key) for group, keys in model.items() for key in keys], threshold)
+
+    def update(group):
+        table.update_group(group, [(group, key) for key in model.get(group, [])])
+
+    # 足够多的行数变化，中途会多次重建组位置表
+    for _ in range(REINDEX_SHIFTS * 8):
+        groups = list(model)
+        group = rng.choice(groups) if groups else None
+        action = rng.randrange(6) if groups else 0
+        if action == 0:
+            model[Group('new')] = [next(ids) for _ in range(rng.randint(1, 3))]
+            update(list(model)[-1])
+        elif action == 1:
+            model[group].append(next(ids))
+            update(group)
+        elif action == 2 and len(model[group]) > 1:
+            model[group].pop(rng.randrange(len(model[group])))
+            update(group)
+        elif action == 3:
+            del model[group]
+            update(group)
+        elif action == 4 and len(groups) > 1:
+            # 账户搬到另一个网站：先更新目标组，再更新原来的组（与主界面相同）
+            source, target = rng.sample(groups, 2)
+            key = model[source].pop(rng.randrange(len(model[source])))
+            model[target].append(key)
+            update(target)
+            if not model[source]:
+                del model[source]
+            update(source)
+        else:
+            update(group)
+        expected = [key for keys in model.values() for key in keys]
+        assert [row[1] for row in table.rows] == expected
+        if not table.virtual:
+            assert table.tree.order == [str(key) for key in expected]
+
+
+def test_single_edit_does_not_scan_all_rows():
+    calls = []
+
+    def row_group(row):
+        calls.append(row)
+        return row[0]
+
+    groups = [Group(f"g{i}") for i in range(10000)]
+    table = _group_table([(group, i * 2 + j) for i, group in enumerate(groups) for j in range(2)],
+                         threshold=100000, row_group=row_group)
+    calls.clear()
+    table.update_group(groups[5000], [(groups[5000], 10000), (groups[5000], 10001)])
+    table.update_group(groups[7000], [(groups[7000], 14000)])
+    assert len(calls) < 10
+    assert [row[1] for row in table.rows[10000:10003]] == [10000, 10001, 10002]
+    assert len(table.rows) == len(table.tree.order) == 19999
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 模拟的 Touch ID 认证程序
+功能: 与 touchid_test 的命令行参数和常驻模式的行协议相同，
+     用于在没有 Touch ID 的环境（如 Linux）中测试完整的认证流程
+
+环境变量:
+    TOUCHID_FAKE_RESULT     认证结果（默认 TOUCHID_SUCCESS，也可以是 TOUCHID_CANCELLED 等）
+    TOUCHID_FAKE_AVAILABLE  设为 0 时报告不可用
+    TOUCHID_FAKE_DELAY      每次认证前等待的秒数（模拟用户按指纹）
+
+用法:
+    VAULT_AUTH_HELPER=touchid_fake.py python3 main_modern.py
+"""
+
+import os
+import sys
+import time
+
+
+def probe():
+    if os.environ.get('TOUCHID_FAKE_AVAILABLE', '1') == '0':
+        return "TOUCHID_NOT_AVAILABLE: fake helper"
+    return "TOUCHID_AVAILABLE"
+
+
+def authenticate(reason):
+    if not probe().startswith("TOUCHID_AVAILABLE"):
+        return "TOUCHID_NOT_AVAILABLE"
+    time.sleep(float(os.environ.get('TOUCHID_FAKE_DELAY', '0')))
+    return os.environ.get('TOUCHID_FAKE_RESULT', "TOUCHID_SUCCESS")
+
+
+def reply(line):
+    sys.stdout.write(line + '\n')
+    sys.stdout.flush()
+
+
+def serve():
+    reply("TOUCHID_READY")
+    for line in sys.stdin:
+        line = line.rstrip('\n')
+        if line == 'QUIT':
+            break
+        elif line == 'PROBE':
+            reply(probe())
+        elif line.startswith('AUTH'):
+            reply(authenticate(line[4:].strip()))
+        else:
+            reply("TOUCHID_ERROR: unknown command")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--serve']:
+        serve()
+    elif sys.argv[1:2] == ['--auth']:
+        reply(authenticate(' '.join(sys.argv[2:])))
+    else:
+        reply(probe())
@@ -1,64 +1,109 @@
 #import <Foundation/Foundation.h>
 #import <LocalAuthentication/LocalAuthentication.h>
 
-int main(int argc, const char * argv[]) {
-    @autoreleasepool {
-        LAContext *context = [[LAContext alloc] init];
-        NSError *error = nil;
-        
-        // 检查生物识别是否可用
-        if ([context canEvaluatePolicy:LAPolicyDeviceOwnerAuthenticationWithBiometrics error:&error]) {
-            // 只有一个参数时才进行认证，否则只检查可用性
-            if (argc > 1 && strcmp(argv[1], "--auth") == 0) {
-                NSString *reason = @"验证身份以访问密码保险库";
-                
-                [context evaluatePolicy:LAPolicyDeviceOwnerAuthenticationWithBiometrics
-                        localizedReason:reason
-                                  reply:^(BOOL success, NSError * _Nullable error) {
-                    if (success) {
-                        printf("TOUCHID_SUCCESS\n");
-                    } else {
-                        if (error) {
-                            switch (error.code) {
-                                case LAErrorUserCancel:
-                                    printf("TOUCHID_CANCELLED\n");
-                                    break;
-                                case LAErrorUserFallback:
-                                    printf("TOUCHID_FALLBACK\n");
-                                    break;
-                                case LAErrorBiometryNotAvailable:
-                                    printf("TOUCHID_NOT_AVAILABLE\n");
-                                    break;
-                                case LAErrorBiometryNotEnrolled:
-                                    printf("TOUCHID_NOT_ENROLLED\n");
-                                    break;
-                                case LAErrorBiometryLockout:
-                                    printf("TOUCHID_LOCKOUT\n");
-                                    break;
-                                default:
-                                    printf("TOUCHID_ERROR: %s\n", [error.localizedDescription UTF8String]);
-                                    break;
-                            }
-                        } else {
-                            printf("TOUCHID_ERROR\n");
-                        }
-                    }
-                    exit(0);
-                }];
-                
-                // 保持程序运行直到回调完成
-                [[NSRunLoop mainRunLoop] run];
+// 用法:
+//   touchid_test                 只检查可用性，输出 TOUCHID_AVAILABLE / TOUCHID_NOT_AVAILABLE
+//   touchid_test --auth [原因]   进行一次认证，输出认证结果
+//   touchid_test --serve         常驻模式：先输出 TOUCHID_READY，之后每读到一行命令输出一行结果
+//                                （PROBE 检查可用性，AUTH 原因 进行认证，QUIT 或输入结束时退出）
+
+static NSString *probe(void) {
+    LAContext *context = [[LAContext alloc] init];
+    NSError *error = nil;
+    if ([context canEvaluatePolicy:LAPolicyDeviceOwnerAuthenticationWithBiometrics error:&error]) {
+        return @"TOUCHID_AVAILABLE";
+    }
+    if (error) {
+        return [NSString stringWithFormat:@"TOUCHID_NOT_AVAILABLE: %@", error.localizedDescription];
+    }
+    return @"TOUCHID_NOT_AVAILABLE";
+}
+
+static NSString *resultCode(BOOL success, NSError *error) {
+    if (success) {
+        return @"TOUCHID_SUCCESS";
+    }
+    if (!error) {
+        return @"TOUCHID_ERROR";
+    }
+    switch (error.code) {
+        case LAErrorUserCancel:
+            return @"TOUCHID_CANCELLED";
+        case LAErrorUserFallback:
+            return @"TOUCHID_FALLBACK";
+        case LAErrorBiometryNotAvailable:
+            return @"TOUCHID_NOT_AVAILABLE";
+        case LAErrorBiometryNotEnrolled:
+            return @"TOUCHID_NOT_ENROLLED";
+        case LAErrorBiometryLockout:
+            return @"TOUCHID_LOCKOUT";
+        default:
+            return [NSString stringWithFormat:@"TOUCHID_ERROR: %@", error.localizedDescription];
+    }
+}
+
+static NSString *authenticate(NSString *reason) {
+    // 每次认证使用新的 LAContext，上一次的认证结果不会被复用
+    LAContext *context = [[LAContext alloc] init];
+    NSError *error = nil;
+    if (![context canEvaluatePolicy:LAPolicyDeviceOwnerAuthenticationWithBiometrics error:&error]) {
+        return resultCode(NO, error);
+    }
+
+    __block NSString *result = nil;
+    dispatch_semaphore_t done = dispatch_semaphore_create(0);
+    [context evaluatePolicy:LAPolicyDeviceOwnerAuthenticationWithBiometrics
+            localizedReason:reason
+                      reply:^(BOOL success, NSError * _Nullable authError) {
+        result = resultCode(success, authError);
+        dispatch_semaphore_signal(done);
+    }];
+    // 回调在系统的私有队列上执行，这里等待它完成
+    dispatch_semaphore_wait(done, DISPATCH_TIME_FOREVER);
+    return result;
+}
+
+static void reply(NSString *line) {
+    printf("%s\n", [line UTF8String]);
+    fflush(stdout);
+}
+
+static void serve(void) {
+    reply(@"TOUCHID_READY");
+    char buffer[4096];
+    while (fgets(buffer, sizeof(buffer), stdin)) {
+        @autoreleasepool {
+            NSString *line = [[NSString stringWithUTF8String:buffer]
+                              stringByTrimmingCharactersInSet:[NSCharacterSet newlineCharacterSet]];
+            if ([line isEqualToString:@"QUIT"]) {
+                break;
+            } else if ([line isEqualToString:@"PROBE"]) {
+                reply(probe());
+            } else if ([line hasPrefix:@"AUTH"]) {
+                NSString *reason = [[line substringFromIndex:4]
+                                    stringByTrimmingCharactersInSet:[NSCharacterSet whitespaceCharacterSet]];
+                if (reason.length == 0) {
+                    reason = @"验证身份以访问密码保险库";
+                }
+                reply(authenticate(reason));
             } else {
-                // 只检查可用性，不进行认证
-                printf("TOUCHID_AVAILABLE\n");
+                reply(@"TOUCHID_ERROR: unknown command");
             }
-            
+        }
+    }
+}
+
+int main(int argc, const char * argv[]) {
+    @autoreleasepool {
+        if (argc > 1 && strcmp(argv[1], "--serve") == 0) {
+            serve();
+        } else if (argc > 1 && strcmp(argv[1], "--auth") == 0) {
+            NSString *reason = argc > 2 ? [NSString stringWithUTF8String:argv[2]]
+                                        : @"验证身份以访问密码保险库";
+            reply(authenticate(reason));
         } else {
-            if (error) {
-                printf("TOUCHID_NOT_AVAILABLE: %s\n", [error.localizedDescription UTF8String]);
-            } else {
-                printf("TOUCHID_NOT_AVAILABLE\n");
-            }
+            // 只检查可用性，不进行认证
+            reply(probe());
         }
     }
     return 0;
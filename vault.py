@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 命令行工具
+功能: 不启动图形界面，直接对保险库做批量操作（搜索、导入、导出）
+
+用法:
+    python3 vault.py search github
+    python3 vault.py import backup.json --merge
+    python3 vault.py export backup.json.gz
+    python3 vault.py import chrome.csv --column description=notes
+
+数据文件默认与图形界面相同（受 VAULT_BACKEND 影响），可用 --data 指定；
+保险库已加密时从环境变量 VAULT_PASSWORD 读取主密码，没有设置则在终端提示输入。
+"""
+
+import argparse
+import csv
+import getpass
+import json
+import logging
+import lzma
+import os
+import sys
+
+from vault_crypto import KEY_FILE, InvalidPasswordError
+from vault_engine import CSV_COLUMNS, ImportFormatError, ImportReader, VaultEngine, csv_columns
+
+
+def _open(args):
+    engine = VaultEngine(args.data, key_file=args.key_file)
+    if engine.is_encrypted():
+        password = os.environ.get('VAULT_PASSWORD')
+        if password is None:
+            password = getpass.getpass("主密码: ")
+        engine.unlock(password)
+    return engine
+
+
+def cmd_search(engine, args):
+    engine.load(fill_passwords=args.show_passwords)
+    matches = engine.search(args.query)
+    for site in matches:
+        for account in site.get('accounts', []):
+            fields = [site.get('website', ''), account.get('username', '')]
+            if args.show_passwords:
+                fields.append(account.get('password', ''))
+            fields.append(account.get('description', ''))
+            print('\t'.join(str(field) for field in fields))
+    print(f"找到 {len(matches)} 个网站/应用，{sum(len(site['accounts']) for site in matches)} 个账户",
+          file=sys.stderr)
+
+
+def _progress(done, total):
+    if sys.stderr.isatty():
+        print(f"\r导入中... {done * 100 // total if total else 100}%", end='', file=sys.stderr, flush=True)
+
+
+def cmd_import(engine, args):
+    mode = "replace" if args.replace else "merge"
+    # 先校验整个文件，格式有误时不做任何修改
+    ImportReader(args.file, args.columns).scan()
+    engine.load()
+    # 流式导入：逐个网站解析、校验并合并
+    result = engine.import_file(args.file, mode, _progress, columns=args.columns)
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    if mode == "replace":
+        print(f"替换了所有数据：网站 {result.imported_count} 个，账户 {engine.account_count()} 个")
+    else:
+        print(f"新增网站 {result.imported_count} 个，合并网站 {result.merged_count} 个，"
+              f"当前共 {len(engine.passwords)} 个网站、{engine.account_count()} 个账户")
+        print(result.report.summary())
+        for website, username, existing, imported in result.report.conflicts:
+            print(f"  保留较新的现有记录: {website} / {username}（现有 {existing}，导入 {imported}）")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(result.report.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def cmd_export(engine, args):
+    engine.load()
+    info = engine.export(args.file, columns=args.columns)
+    print(f"已导出 {info['total_websites']} 个网站、{info['total_accounts']} 个账户到 {args.file}")
+
+
+def _column(text):
+    """解析 --column 的 字段=列名"""
+    field, sep, column = text.partition('=')
+    if not sep or not column:
+        raise argparse.ArgumentTypeError(f"格式应为 字段=列名：{text}")
+    return field, column
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='vault', description="密码保险库命令行工具")
+    parser.add_argument('--data', help="数据文件（默认 passwords.json，受 VAULT_BACKEND 影响）")
+    parser.add_argument('--key-file', default=KEY_FILE, help="密钥文件（默认 vault.key）")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="按网站名、账号或描述搜索")
+    search.add_argument('query')
+    search.add_argument('--show-passwords', action='store_true', help="同时输出密码")
+    search.set_defaults(func=cmd_search)
+
+    column_help = (f"CSV 列映射 字段=列名，可重复；字段为 {', '.join(CSV_COLUMNS)}，"
+                   f"默认 {','.join(CSV_COLUMNS.values())}")
+
+    import_parser = commands.add_parser('import', help="从JSON或CSV文件导入（可以是 .json.gz / .csv.xz 等）")
+    import_parser.add_argument('file')
+    import_parser.add_argument('--column', type=_column, action='append', default=[], help=column_help)
+    mode = import_parser.add_mutually_exclusive_group()
+    mode.add_argument('--merge', action='store_true', help="与现有数据合并（默认）")
+    mode.add_argument('--replace', action='store_true', help="替换所有现有数据")
+    import_parser.add_argument('--report', help="把合并报告（新增、更新、未变化、冲突）写入JSON文件")
+    import_parser.set_defaults(func=cmd_import)
+
+    export = commands.add_parser('export', help="导出所有数据（.json、.csv 或文本，再加 .gz / .xz 扩展名时压缩）")
+    export.add_argument('file')
+    export.add_argument('--column', type=_column, action='append', default=[], help=column_help)
+    export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    # 存储等模块的提示和错误输出到标准错误，标准输出只留给命令的结果
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args.columns = dict(getattr(args, 'column', []))
+    try:
+        csv_columns(args.columns)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        engine = _open(args)
+    except InvalidPasswordError:
+        print("主密码错误", file=sys.stderr)
+        return 1
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    status = 0
+    try:
+        args.func(engine, args)
+    except json.JSONDecodeError as e:
+        print(f"JSON文件格式错误：{e}", file=sys.stderr)
+        status = 1
+    except (ImportFormatError, OSError, EOFError, lzma.LZMAError, csv.Error) as e:
+        # EOFError / LZMAError：压缩文件不完整或已损坏
+        print(f"操作失败：{e}", file=sys.stderr)
+        status = 1
+    finally:
+        # 写入所有待保存的修改（写盘失败时已重试一次）
+        try:
+            engine.close()
+        except Exception as e:
+            print(f"保存失败，修改没有写入：{e}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 系统认证
+功能: 可替换的认证后端。Touch ID 通过常驻的辅助程序完成：程序只启动一次，
+     之后每次认证通过标准输入 / 输出的一行命令和一行结果通信；
+     可用性检查的结果按辅助程序文件的哈希缓存，下次启动无需再探测
+
+辅助程序的行协议（touchid_test --serve、touchid_fake.py --serve）:
+    启动后输出 TOUCHID_READY
+    PROBE        -> TOUCHID_AVAILABLE 或 TOUCHID_NOT_AVAILABLE[: 原因]
+    AUTH 原因    -> TOUCHID_SUCCESS / TOUCHID_CANCELLED / ... 等认证结果
+    QUIT         退出（标准输入结束时同样退出）
+
+环境变量 VAULT_AUTH_HELPER 可以指定其他辅助程序（如 touchid_fake.py），
+在没有 Touch ID 的系统上测试认证流程。
+
+用法（测量认证的进程启动次数和耗时）:
+    VAULT_AUTH_HELPER=touchid_fake.py python3 vault_auth.py -n 5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TOUCHID_SOURCE = os.path.join(APP_DIR, 'touchid_test.m')
+TOUCHID_BINARY = os.path.join(APP_DIR, 'touchid_test')
+
+# 可用性缓存文件（只保存辅助程序的哈希，不含任何密码信息）
+AUTH_CACHE_FILE = "auth_cache.json"
+
+HELPER_READY = "TOUCHID_READY"
+AUTH_AVAILABLE = "TOUCHID_AVAILABLE"
+AUTH_SUCCESS = "TOUCHID_SUCCESS"
+AUTH_CANCELLED = "TOUCHID_CANCELLED"
+AUTH_NOT_AVAILABLE = "TOUCHID_NOT_AVAILABLE"
+AUTH_NOT_ENROLLED = "TOUCHID_NOT_ENROLLED"
+AUTH_ERROR = "TOUCHID_ERROR"
+
+# 认证结果 -> 提示文字
+AUTH_MESSAGES = {
+    AUTH_CANCELLED: "用户取消了Touch ID验证",
+    "TOUCHID_FALLBACK": "用户选择了密码验证",
+    AUTH_NOT_AVAILABLE: "Touch ID不可用",
+    AUTH_NOT_ENROLLED: "未设置Touch ID",
+    "TOUCHID_LOCKOUT": "Touch ID被锁定",
+}
+
+# 等待辅助程序的时间（秒）：启动、可用性检查、一次认证（需要用户操作）
+HELPER_START_TIMEOUT = 5
+PROBE_TIMEOUT = 3
+AUTH_TIMEOUT = 60
+
+
+class AuthHelperError(Exception):
+    """辅助程序无法启动、没有响应或提前退出"""
+
+
+def file_hash(path):
+    """文件内容的 SHA-256（十六进制），文件不存在时返回 None"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def auth_message(code):
+    """认证结果的提示文字"""
+    return AUTH_MESSAGES.get(code, f"Touch ID验证错误: {code}")
+
+
+class AuthStats:
+    """认证统计：辅助程序启动次数、可用性检查次数和每次认证的耗时"""
+
+    def __init__(self):
+        self.spawns = 0
+        self.probes = 0
+        self.probes_cached = 0
+        self.auths = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        # 最近一次认证期间启动辅助程序的次数（常驻后应为 0）
+        self.last_spawns = 0
+
+    def record_auth(self, latency, spawns):
+        self.auths += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.last_spawns = spawns
+
+    def summary(self):
+        """返回便于打印或展示的统计字典（耗时单位：毫秒）"""
+        avg = self.total_latency / self.auths if self.auths else 0.0
+        return {
+            'auths': self.auths,
+            'spawns': self.spawns,
+            'probes': self.probes,
+            'probes_cached': self.probes_cached,
+            'last_spawns': self.last_spawns,
+            'avg_latency_ms': round(avg * 1000, 2),
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+            'last_latency_ms': round(self.last_latency * 1000, 2),
+        }
+
+
+class AvailabilityCache:
+    """按辅助程序哈希缓存的可用性
+
+    只缓存“可用”：不可用时（如还没有录入指纹）每次启动都重新检查，
+    录入后不需要清除缓存；认证时报告不可用会清除缓存。
+    """
+
+    def __init__(self, path=AUTH_CACHE_FILE):
+        self.path = path
+
+    def is_available(self, helper_hash):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return isinstance(data, dict) and data.get('helper') == helper_hash and data.get('available') is True
+
+    def set_available(self, helper_hash):
+        self._write({'helper': helper_hash, 'available': True,
+                     'checked': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _write(self, data):
+        try:
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_file, self.path)
+        except OSError as e:
+            # 缓存只影响启动速度，写不进去也不影响认证
+            print(f"无法写入认证缓存: {e}")
+
+
+class Authenticator:
+    """认证后端接口：没有可用的系统认证时使用，认证总是失败"""
+
+    name = "none"
+
+    def __init__(self):
+        self.stats = AuthStats()
+
+    def available(self):
+        return False
+
+    def authenticate(self, reason, cancelled=None):
+        """进行一次认证，返回认证结果（AUTH_SUCCESS 表示通过）
+
+        cancelled 是这次请求的 threading.Event：调用方取消时设置它再调用 cancel()，
+        请求还没开始时设置也不会丢失，authenticate() 直接返回 AUTH_CANCELLED。
+        """
+        return AUTH_NOT_AVAILABLE
+
+    def cancel(self):
+        """取消进行中的认证（可以从其他线程调用），authenticate() 返回 AUTH_CANCELLED"""
+
+    def close(self):
+        pass
+
+
+class HelperAuthenticator(Authenticator):
+    """通过常驻辅助程序认证
+
+    command 是启动辅助程序的命令（会加上 --serve），helper_file 是用于计算
+    缓存哈希的文件。认证在调用线程中等待结果（图形界面在工作线程中调用）；
+    同一时间只处理一个请求，cancel() 结束辅助程序来中断正在等待的认证。
+    """
+
+    name = "helper"
+
+    def __init__(self, command, helper_file, cache_file=AUTH_CACHE_FILE):
+        super().__init__()
+        self.command = list(command)
+        self.helper_file = helper_file
+        self.cache = AvailabilityCache(cache_file)
+        self._hash = None
+        self._process = None
+        self._lines = None
+        self._lock = threading.Lock()
+        # 进行中的认证请求的取消标志（每个请求一个）；没有进行中的认证时为 None
+        self._cancelled = None
+
+    def available(self):
+        """辅助程序是否报告可用（已缓存时不启动辅助程序）"""
+        with self._lock:
+            return self._available()
+
+    def authenticate(self, reason, cancelled=None):
+        start = time.perf_counter()
+        if cancelled is None:
+            cancelled = threading.Event()
+        with self._lock:
+            self._cancelled = cancelled
+            try:
+                spawns = self.stats.spawns
+                if cancelled.is_set():
+                    # 等待锁期间已被取消：不再发送请求
+                    code = AUTH_CANCELLED
+                elif self._available():
+                    # 原因只能占一行
+                    code = self._request("AUTH " + ' '.join(reason.split()), AUTH_TIMEOUT)
+                    if code.startswith((AUTH_NOT_AVAILABLE, AUTH_NOT_ENROLLED)):
+                        self.cache.clear()
+                else:
+                    code = AUTH_NOT_AVAILABLE
+                if cancelled.is_set():
+                    code = AUTH_CANCELLED
+                self.stats.record_auth(time.perf_counter() - start, self.stats.spawns - spawns)
+            finally:
+                self._cancelled = None
+        return code
+
+    def cancel(self):
+        # 不等待锁：认证线程正阻塞在读取结果上，结束辅助程序后它会立即返回。
+        # 没有进行中的认证时什么也不做（常驻的辅助程序留给下一次认证）；
+        # 还没开始的请求由调用方设置它自己的取消标志
+        cancelled = self._cancelled
+        if cancelled is None:
+            return
+        cancelled.set()
+        self._terminate()
+
+    def close(self):
+        """通知辅助程序退出（认证或可用性检查进行中时直接结束它，不等待用户操作）"""
+        if not self._lock.acquire(blocking=False):
+            self.cancel()
+            self._terminate()
+            return
+        try:
+            process = self._process
+            self._process = None
+        finally:
+            self._lock.release()
+        if process is None:
+            return
+        try:
+            process.stdin.write("QUIT\n")
+            process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+    def helper_hash(self):
+        if self._hash is None:
+            self._hash = file_hash(self.helper_file)
+        return self._hash
+
+    def _available(self):
+        helper_hash = self.helper_hash()
+        if helper_hash is None:
+            return False
+        if self.cache.is_available(helper_hash):
+            self.stats.probes_cached += 1
+            return True
+        self.stats.probes += 1
+        available = self._request("PROBE", PROBE_TIMEOUT).startswith(AUTH_AVAILABLE)
+        if available:
+            self.cache.set_available(helper_hash)
+        return available
+
+    def _request(self, line, timeout):
+        """发送一行命令并等待一行结果；辅助程序出错时重启它并返回 AUTH_ERROR"""
+        try:
+            self._ensure_process()
+            self._process.stdin.write(line + '\n')
+            self._process.stdin.flush()
+            return self._read(timeout)
+        except (OSError, AuthHelperError) as e:
+            cancelled = self._cancelled
+            if cancelled is None or not cancelled.is_set():
+                print(f"认证程序出错: {e}")
+            self._kill()
+            return AUTH_ERROR
+
+    def _ensure_process(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        self._kill()
+        self.stats.spawns += 1
+        self._process = subprocess.Popen(self.command + ['--serve'], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, text=True, encoding='utf-8',
+                                         bufsize=1)
+        # 读取在单独的线程中进行，等待结果时可以设置超时
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines, args=(self._process.stdout, self._lines),
+                         daemon=True).start()
+        ready = self._read(HELPER_START_TIMEOUT)
+        if ready != HELPER_READY:
+            raise AuthHelperError(f"辅助程序不支持常驻模式: {ready}")
+
+    @staticmethod
+    def _read_lines(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _read(self, timeout):
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise AuthHelperError("辅助程序没有响应") from None
+        if line is None:
+            raise AuthHelperError("辅助程序已退出")
+        return line.strip()
+
+    def _terminate(self):
+        """结束正在运行的辅助程序（不等待锁，等待结果的线程随即返回）"""
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _kill(self):
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+class TouchIDAuthenticator(HelperAuthenticator):
+    """macOS Touch ID：辅助程序 touchid_test 不存在或比源文件旧时先用 clang 编译"""
+
+    name = "touchid"
+
+    def __init__(self, cache_file=AUTH_CACHE_FILE):
+        super().__init__([TOUCHID_BINARY], TOUCHID_BINARY, cache_file)
+        self._binary_ready = None
+
+    def _available(self):
+        if self._binary_ready is None:
+            self._binary_ready = self._ensure_binary()
+        return self._binary_ready and super()._available()
+
+    def _ensure_binary(self):
+        if os.path.exists(TOUCHID_BINARY) and not (
+                os.path.exists(TOUCHID_SOURCE)
+                and os.path.getmtime(TOUCHID_SOURCE) > os.path.getmtime(TOUCHID_BINARY)):
+            return True
+        if not os.path.exists(TOUCHID_SOURCE):
+            print("TouchID源文件不存在")
+            return False
+        print("TouchID程序不存在或已过期，正在编译...")
+        try:
+            result = subprocess.run([
+                'clang',
+                '-framework', 'Foundation',
+                '-framework', 'LocalAuthentication',
+                TOUCHID_SOURCE,
+                '-o', TOUCHID_BINARY
+            ], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"编译TouchID程序失败: {e}")
+            return False
+        if result.returncode != 0:
+            print(f"编译TouchID程序失败: {result.stderr}")
+            return False
+        # 程序变了，缓存的可用性随哈希一起失效
+        self._hash = None
+        return True
+
+
+def open_authenticator(cache_file=AUTH_CACHE_FILE):
+    """按环境选择认证后端：VAULT_AUTH_HELPER 指定的辅助程序、macOS 的 Touch ID，否则不可用"""
+    helper = os.environ.get('VAULT_AUTH_HELPER')
+    if helper:
+        helper = os.path.abspath(helper)
+        command = [sys.executable, helper] if helper.endswith('.py') else [helper]
+        return HelperAuthenticator(command, helper, cache_file)
+    if platform.system() == 'Darwin':
+        return TouchIDAuthenticator(cache_file)
+    return Authenticator()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量系统认证的进程启动次数和耗时")
+    parser.add_argument('-n', '--count', type=int, default=3, help="认证次数")
+    parser.add_argument('--cache-file', default=AUTH_CACHE_FILE)
+    args = parser.parse_args(argv)
+
+    authenticator = open_authenticator(args.cache_file)
+    try:
+        for i in range(args.count):
+            code = authenticator.authenticate("测量认证耗时")
+            print(f"第 {i + 1} 次: {code}  "
+                  f"启动进程 {authenticator.stats.last_spawns} 次，"
+                  f"{authenticator.stats.last_latency * 1000:.1f} 毫秒")
+    finally:
+        authenticator.close()
+    print(json.dumps({'backend': authenticator.name, **authenticator.stats.summary()},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 内存映射的二进制存储格式
+功能: 文件头 + 定长偏移表 + 变长记录，用 mmap 打开，记录只在用到时才解码；
+     修改一条记录只需追加新内容并更新它在偏移表中的条目
+
+文件布局:
+    文件头   HEADER   魔数、版本、标志、已用条目数、条目容量、数据末尾偏移
+                      （标志的高8位是数据结构版本，0 表示没有记录）
+    偏移表   ENTRY × 容量   记录偏移、键长度、状态、元数据长度、密码数据长度
+    记录区   键 + 元数据（网站、账号、描述、时间、密码长度）+ 密码数据
+
+用法（转换现有的 passwords.json）:
+    python3 vault_binary.py passwords.json passwords.vault
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from vault_migrations import SCHEMA_VERSION, migrate
+from vault_storage import (SaveScheduler, SaveStats, assign_passwords, atomic_write, dump_record,
+                           is_lazy, merge_duplicate_sites, open_store, site_key)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'VLTB'
+VERSION = 1
+# 魔数、版本、标志、已用条目数、条目容量、数据末尾偏移
+HEADER = struct.Struct('<4sHHIIQ')
+# 记录偏移、键长度、状态、元数据长度、密码数据长度
+ENTRY = struct.Struct('<QHBxII')
+
+FLAG_ENCRYPTED = 1
+SCHEMA_SHIFT = 8
+ENTRY_LIVE = 1
+
+MIN_CAPACITY = 1024
+# 废弃的记录超过该大小且多于有效记录时重建文件
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class BinaryStore:
+    """二进制存储，接口与 JournalStore 相同
+
+    加载时只解码元数据（lazy=True 时不读取密码数据）；put() 把新记录追加到
+    文件末尾并改写偏移表中对应的一个条目。首次打开时自动从 passwords.json 转换。
+    """
+
+    def __init__(self, data_file, on_error=None, cipher=None, legacy_file=None):
+        self.data_file = data_file
+        self.legacy_file = legacy_file or os.path.splitext(data_file)[0] + '.json'
+        self.on_error = on_error
+        self.cipher = cipher
+        self.stats = SaveStats()
+        self.schema_version = None
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._scheduler = None
+
+        self._file = None
+        self._mm = None
+        self._flags = 0
+        # 键 -> 偏移表中的条目序号
+        self._slots = {}
+        self._entries = []
+        self._count = 0
+        self._capacity = 0
+        self._data_end = 0
+        self._live_bytes = 0
+
+    def load(self, lazy=False):
+        """打开文件并解码所有记录的元数据，返回网站列表"""
+        self.flush()
+        self._close_file()
+        if not os.path.exists(self.data_file):
+            sites = []
+            self._flags = 0
+            if os.path.exists(self.legacy_file):
+                sites = self._load_legacy()
+            self._write_file([self._encode(site) for site in sites])
+            for path in (self.legacy_file, self.legacy_file + '.journal'):
+                if os.path.exists(path):
+                    os.replace(path, path + '.migrated')
+        self._open_file()
+
+        if bool(self._flags & FLAG_ENCRYPTED) != (self.cipher is not None):
+            if self.cipher is None:
+                raise ValueError("保险库已加密，需要主密码才能打开")
+            # 设置主密码后，把明文文件整体转换为加密格式
+            sites = self._read_all(lazy=False)
+            self._close_file()
+            self._write_file([self._encode(site) for site in sites])
+            self._open_file()
+
+        self.schema_version = (self._flags >> SCHEMA_SHIFT) or None
+        return self._read_all(lazy)
+
+    def set_schema_version(self, version):
+        """记录数据结构版本（只改写文件头）"""
+        self.schema_version = version
+        with self._lock:
+            self._pending.append(('schema', version))
+        self._ensure_scheduler().mark_dirty()
+
+    def fill_passwords(self, sites):
+        """从文件中读取延迟加载账户的密码（原地填入）"""
+        lazy_sites = [site for site in sites
+                      if any(is_lazy(account) for account in site.get('accounts', []))]
+        if not lazy_sites:
+            return
+        self.flush()
+        with self._lock:
+            for site in lazy_sites:
+                slot = self._slots.get(self._key(site_key(site)))
+                if slot is not None:
+                    stored = self._decode(slot, lazy=False)
+                    assign_passwords(site['accounts'], stored.get('accounts', []))
+
+    def put(self, site):
+        """新增或替换一个网站记录"""
+        with self._lock:
+            self._pending.append(('put', dump_record(site)))
+        self._ensure_scheduler().mark_dirty()
+
+    def delete(self, website):
+        """删除一个网站记录"""
+        with self._lock:
+            self._pending.append(('del', website))
+        self._ensure_scheduler().mark_dirty()
+
+    def rewrite(self, sites):
+        """用完整列表重写文件（同名网站会被合并，sites 被原地更新）"""
+        self.fill_passwords(sites)
+        merge_duplicate_sites(sites)
+        records = [dump_record(site) for site in sites]
+        with self._lock:
+            self._pending = [('rewrite', records)]
+        self._ensure_scheduler().mark_dirty()
+
+    def flush(self):
+        """立即写入所有待保存的修改"""
+        if self._scheduler:
+            self._scheduler.flush()
+
+    def close(self):
+        """写入剩余修改并关闭文件"""
+        if self._scheduler:
+            self._scheduler.close()
+            self._scheduler = None
+        self._close_file()
+
+    def _ensure_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = SaveScheduler(self._write_pending, on_error=self.on_error,
+                                            stats=self.stats)
+        return self._scheduler
+
+    def _key(self, website):
+        return self.cipher.record_id(website) if self.cipher else website
+
+    def _load_legacy(self):
+        legacy = open_store(self.legacy_file, cipher=self.cipher)
+        try:
+            sites = legacy.load()
+        finally:
+            legacy.close()
+        # 旧文件可能是早期的数据结构（如单账户记录），先升级再转换
+        migrate(sites, legacy.schema_version)
+        merge_duplicate_sites(sites)
+        self._flags = SCHEMA_VERSION << SCHEMA_SHIFT
+        logger.info("已从 %s 转换 %d 个网站到 %s", self.legacy_file, len(sites), self.data_file)
+        return sites
+
+    # ---- 读取 ----
+
+    def _open_file(self):
+        self._file = open(self.data_file, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._flags, self._count, self._capacity, self._data_end = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("无法识别的保险库文件格式")
+        table = self._mm[HEADER.size:HEADER.size + self._count * ENTRY.size]
+        self._entries = list(ENTRY.iter_unpack(table))
+        self._slots = {}
+        self._live_bytes = 0
+        for slot, (offset, key_len, state, meta_len, secret_len) in enumerate(self._entries):
+            if state & ENTRY_LIVE:
+                key = self._mm[offset:offset + key_len].decode('utf-8')
+                self._slots[key] = slot
+                self._live_bytes += key_len + meta_len + secret_len
+
+    def _remap(self):
+        if self._mm:
+            self._mm.close()
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close_file(self):
+        if self._mm:
+            self._mm.close()
+            self._mm = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _read_all(self, lazy):
+        with self._lock:
+            return [self._decode(slot, lazy) for slot in sorted(self._slots.values())]
+
+    def _raw(self, slot):
+        """(键, 元数据, 密码数据) 的原始字节"""
+        offset, key_len, _, meta_len, secret_len = self._entries[slot]
+        meta_start = offset + key_len
+        secret_start = meta_start + meta_len
+        return (self._mm[offset:meta_start], self._mm[meta_start:secret_start],
+                self._mm[secret_start:secret_start + secret_len])
+
+    def _decode(self, slot, lazy):
+        """解码一条记录；lazy=True 时不读取密码数据"""
+        key, meta, secret = self._raw(slot)
+        key = key.decode('utf-8')
+        site = json.loads(self._open(meta, key, 'meta'))
+        if not lazy:
+            passwords = json.loads(self._open(secret, key, 'secret'))
+            for account, password in zip(site.get('accounts', []), passwords):
+                if password is not None:
+                    account['password'] = password
+                    account.pop('password_length', None)
+        return site
+
+    def _open(self, data, key, part):
+        # 按文件头的标志解码，明文文件在转换为加密格式前也能读取
+        if self._flags & FLAG_ENCRYPTED:
+            return self.cipher.open(data.decode('ascii'), f"{key}|{part}")
+        return data.decode('utf-8')
+
+    # ---- 写入 ----
+
+    def _encode(self, site):
+        """网站记录 -> (键, 元数据, 密码数据) 字节"""
+        key = self._key(site_key(site))
+        accounts = []
+        passwords = []
+        for account in site.get('accounts', []):
+            if is_lazy(account):
+                raise ValueError(f"{site_key(site)} 的账户密码尚未加载，无法保存")
+            meta = {k: v for k, v in account.items() if k not in ('password', 'password_length')}
+            if 'password' in account:
+                meta['password_length'] = len(account['password'])
+            accounts.append(meta)
+            passwords.append(account.get('password'))
+        meta = dump_record(dict(site, accounts=accounts))
+        secret = dump_record(passwords)
+        if self.cipher:
+            meta = self.cipher.seal(meta, f"{key}|meta")
+            secret = self.cipher.seal(secret, f"{key}|secret")
+        return key.encode('utf-8'), meta.encode('utf-8'), secret.encode('utf-8')
+
+    def _write_file(self, records, reserve=0):
+        """把 (键, 元数据, 密码数据) 列表写成一个新文件（原子替换）
+
+        偏移表容量至少是记录数（加上即将新增的 reserve 条）的两倍。
+        """
+        capacity = MIN_CAPACITY
+        while capacity < (len(records) + reserve) * 2:
+            capacity *= 2
+        data_start = HEADER.size + capacity * ENTRY.size
+        flags = (FLAG_ENCRYPTED if self.cipher else 0) | (self._flags & ~FLAG_ENCRYPTED)
+
+        entries = []
+        offset = data_start
+        for key, meta, secret in records:
+            entries.append(ENTRY.pack(offset, len(key), ENTRY_LIVE, len(meta), len(secret)))
+            offset += len(key) + len(meta) + len(secret)
+
+        def chunks():
+            yield HEADER.pack(MAGIC, VERSION, flags, len(records), capacity, offset)
+            yield b''.join(entries)
+            yield bytes((capacity - len(records)) * ENTRY.size)
+            for key, meta, secret in records:
+                yield key + meta + secret
+
+        atomic_write(self.data_file, chunks(), binary=True)
+
+    def _write_pending(self):
+        """后台线程：追加记录、改写偏移表条目，必要时重建文件"""
+        with self._lock:
+            ops = self._pending
+            self._pending = []
+            if not ops:
+                return
+            try:
+                self._apply(ops)
+            except Exception:
+                # 操作先放回队列（重新打开文件也可能失败），再以磁盘上的内容为准
+                self._pending[:0] = ops
+                self._close_file()
+                self._open_file()
+                raise
+
+    def _apply(self, ops):
+        """执行一批操作
+
+        先把所有新记录追加到文件末尾并落盘，偏移表只在内存中修改；之后才改写磁盘上
+        变化的条目（更新、删除和新条目）和文件头，再次落盘。更新已有网站时条目本身就是
+        提交点，崩溃时条目要么还是旧的，要么指向已经落盘的数据。
+        """
+        # 条目序号 -> 尚未写到磁盘的新条目
+        dirty = {}
+        for i, (op, arg) in enumerate(ops):
+            if op == 'rewrite':
+                self._close_file()
+                self._write_file([self._encode(json.loads(raw)) for raw in arg])
+                self._open_file()
+                dirty.clear()
+                continue
+
+            if op == 'schema':
+                self._flags = (self._flags & ((1 << SCHEMA_SHIFT) - 1)) | (arg << SCHEMA_SHIFT)
+                continue
+
+            if op == 'del':
+                slot = self._slots.pop(self._key(arg), None)
+                if slot is not None:
+                    self._entries[slot] = self._entries[slot][:2] + (0,) + self._entries[slot][3:]
+                    dirty[slot] = self._entries[slot]
+                continue
+
+            site = json.loads(arg)
+            key = self._key(site_key(site))
+            slot = self._slots.get(key)
+            if any(is_lazy(account) for account in site.get('accounts', [])) and slot is not None:
+                # 延迟加载的账户沿用文件中已有的密码（记录可能是本批刚追加的，先重新映射）
+                if self._entries[slot][0] >= len(self._mm):
+                    self._file.flush()
+                    self._remap()
+                assign_passwords(site['accounts'], self._decode(slot, lazy=False).get('accounts', []))
+            record = self._encode(site)
+            if slot is None:
+                if self._count >= self._capacity:
+                    # 重建后的文件已包含内存中的所有条目
+                    self._rebuild(extra=len(ops) - i)
+                    dirty.clear()
+                slot = self._count
+                self._count += 1
+                self._entries.append(None)
+                self._slots[key] = slot
+
+            offset = self._data_end
+            self._file.seek(offset)
+            self._file.write(b''.join(record))
+            self._data_end += sum(len(part) for part in record)
+            self._entries[slot] = (offset, len(record[0]), ENTRY_LIVE, len(record[1]), len(record[2]))
+            dirty[slot] = self._entries[slot]
+
+        # 先让记录数据落盘，再改写偏移表和文件头，崩溃时最多留下未被引用的数据
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for slot in sorted(dirty):
+            self._write_entry(slot, dirty[slot])
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self._flags, self._count,
+                                     self._capacity, self._data_end))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._remap()
+        self._recount_live()
+
+        dead = self._data_end - HEADER.size - self._capacity * ENTRY.size - self._live_bytes
+        if dead > COMPACT_MIN_BYTES and dead > self._live_bytes:
+            self._rebuild()
+
+    def _write_entry(self, slot, entry):
+        self._file.seek(HEADER.size + slot * ENTRY.size)
+        self._file.write(ENTRY.pack(*entry))
+
+    def _recount_live(self):
+        self._live_bytes = sum(self._entries[slot][1] + self._entries[slot][3] + self._entries[slot][4]
+                               for slot in self._slots.values())
+
+    def _rebuild(self, extra=0):
+        """偏移表已满或废弃数据过多时，复制有效记录的原始字节重建文件（无需重新加密）"""
+        self._file.flush()
+        self._remap()
+        records = [self._raw(slot) for slot in sorted(self._slots.values())]
+        self._close_file()
+        self._write_file(records, reserve=extra)
+        self._open_file()
+
+
+def convert(json_file, vault_file, cipher=None):
+    """把 passwords.json（及其日志）转换为二进制格式"""
+    source = open_store(json_file, cipher=cipher)
+    try:
+        sites = source.load()
+    finally:
+        source.close()
+    target = BinaryStore(vault_file, cipher=cipher)
+    migrate(sites, source.schema_version)
+    target._flags = SCHEMA_VERSION << SCHEMA_SHIFT
+    merge_duplicate_sites(sites)
+    target._write_file([target._encode(site) for site in sites])
+    return len(sites)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("用法: python3 vault_binary.py passwords.json passwords.vault")
+        sys.exit(1)
+    count = convert(sys.argv[1], sys.argv[2])
+    print(f"已转换 {count} 个网站到 {sys.argv[2]}")
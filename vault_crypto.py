@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 加密
+功能: 主密码通过 PBKDF2 派生会话密钥（每次解锁只派生一次），
+     每条网站记录单独用 AES-256-GCM 加密；锁定期间会话密钥只以加密形式保留
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+except ImportError:  # 未安装 cryptography 时只能使用明文存储
+    AESGCM = None
+
+# 保存盐值和校验信息的密钥文件
+KEY_FILE = "vault.key"
+PBKDF2_ITERATIONS = 600000
+NONCE_SIZE = 12
+
+# 用来校验主密码是否正确的固定明文
+_CHECK_PLAINTEXT = "vault-key-check"
+_CHECK_AAD = "check"
+
+
+class InvalidPasswordError(Exception):
+    """主密码错误"""
+
+
+def crypto_available():
+    """是否安装了 cryptography"""
+    return AESGCM is not None
+
+
+class VaultCipher:
+    """会话密钥
+
+    加密密钥用于 AES-GCM，另一半密钥用于把网站名映射为不可逆的记录键，
+    这样磁盘上的日志和快照不会泄露网站名。
+    """
+
+    def __init__(self, key_material):
+        self._key_material = key_material
+        self._aead = AESGCM(key_material[:32])
+        self._id_key = key_material[32:]
+
+    @classmethod
+    def derive(cls, password, salt, iterations):
+        """从主密码派生会话密钥（较慢，每次解锁只做一次）"""
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=64,
+                         salt=salt, iterations=iterations)
+        return cls(kdf.derive(password.encode('utf-8')))
+
+    def seal(self, plaintext, aad):
+        """加密一条记录，返回 base64(nonce + 密文)"""
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = self._aead.encrypt(nonce, plaintext.encode('utf-8'), aad.encode('utf-8'))
+        return base64.b64encode(nonce + ciphertext).decode('ascii')
+
+    def open(self, token, aad):
+        """解密一条记录，记录被篡改或密钥错误时抛出 InvalidTag"""
+        data = base64.b64decode(token)
+        plaintext = self._aead.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], aad.encode('utf-8'))
+        return plaintext.decode('utf-8')
+
+    def record_id(self, name):
+        """网站名 -> 记录键"""
+        digest = hmac.new(self._id_key, name.encode('utf-8'), hashlib.sha256)
+        return digest.hexdigest()[:32]
+
+    def wrap(self):
+        """锁定时用：返回加密保存的会话密钥，之后不再需要这个对象"""
+        return WrappedKey(self._key_material)
+
+
+class WrappedKey:
+    """锁定期间保留的会话密钥：用一次性的随机密钥加密
+
+    取回时不必重新派生（PBKDF2），解锁速度与保险库大小和迭代次数无关。
+    包装密钥同样在进程内存中，这只让锁定期间内存中不出现明文的会话密钥；
+    是否允许用它解锁（例如锁定多久后必须重新输入主密码）由调用方决定。
+    """
+
+    def __init__(self, key_material):
+        self._wrapping_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(NONCE_SIZE)
+        self._token = nonce + AESGCM(self._wrapping_key).encrypt(nonce, key_material, b"session")
+        self.created = time.monotonic()
+
+    def age(self):
+        """加密保存以来经过的秒数"""
+        return time.monotonic() - self.created
+
+    def unwrap(self):
+        """取回会话密钥（VaultCipher），只能取回一次"""
+        if self._token is None:
+            raise ValueError("会话密钥已丢弃")
+        aead = AESGCM(self._wrapping_key)
+        key_material = aead.decrypt(self._token[:NONCE_SIZE], self._token[NONCE_SIZE:], b"session")
+        self.discard()
+        return VaultCipher(key_material)
+
+    def discard(self):
+        self._wrapping_key = self._token = None
+
+
+class KeyFile:
+    """vault.key：保存盐值、迭代次数和主密码校验值（不保存密钥本身）"""
+
+    def __init__(self, path=KEY_FILE):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def create(self, password):
+        """设置主密码，返回会话密钥"""
+        salt = os.urandom(16)
+        iterations = PBKDF2_ITERATIONS
+        cipher = VaultCipher.derive(password, salt, iterations)
+        info = {
+            'kdf': 'pbkdf2-sha256',
+            'iterations': iterations,
+            'salt': base64.b64encode(salt).decode('ascii'),
+            'check': cipher.seal(_CHECK_PLAINTEXT, _CHECK_AAD),
+        }
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        return cipher
+
+    def unlock(self, password):
+        """校验主密码并派生会话密钥"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        salt = base64.b64decode(info['salt'])
+        cipher = VaultCipher.derive(password, salt, info['iterations'])
+        try:
+            if cipher.open(info['check'], _CHECK_AAD) != _CHECK_PLAINTEXT:
+                raise InvalidPasswordError("主密码错误")
+        except InvalidTag:
+            raise InvalidPasswordError("主密码错误")
+        return cipher
@@ -0,0 +1,754 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 对话框
+功能: 设置 / 解锁主密码、添加和编辑账户、账户管理、删除账户、导入导出进度等对话框；
+     主窗口在第一次用到时才导入本模块，启动时不必加载这些类
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import time
+
+
+class VaultSetupDialog:
+    """保险库设置对话框"""
+    def __init__(self, parent, colors):
+        self.result = None
+        self.colors = colors
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("设置主密码")
+        self.dialog.geometry("520x450")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 居中显示
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets()
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
+        
+        # 标题
+        title_label = tk.Label(main_frame, text="🔐 设置主密码", 
+                              font=("SF Pro Display", 18, "bold"),
+                              fg=self.colors['text_primary'],
+                              bg=self.colors['light'])
+        title_label.pack(pady=(0, 10))
+        
+        desc_label = tk.Label(main_frame, text="请设置一个强密码来保护您的密码库", 
+                             font=("SF Pro Text", 11),
+                             fg=self.colors['text_secondary'],
+                             bg=self.colors['light'])
+        desc_label.pack(pady=(0, 30))
+        
+        # 密码输入框
+        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        password_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        tk.Label(password_frame, text="主密码:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.password_entry = tk.Entry(password_frame, show="*", 
+                                      font=("SF Pro Text", 12),
+                                      relief='flat', bd=1,
+                                      bg=self.colors['white'])
+        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 确认密码输入框
+        confirm_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        confirm_frame.pack(fill=tk.X, pady=(0, 30))
+        
+        tk.Label(confirm_frame, text="确认密码:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.confirm_entry = tk.Entry(confirm_frame, show="*", 
+                                     font=("SF Pro Text", 12),
+                                     relief='flat', bd=1,
+                                     bg=self.colors['white'])
+        self.confirm_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 按钮
+        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        button_frame.pack(fill=tk.X)
+        
+        cancel_btn = tk.Button(button_frame, text="取消", 
+                              font=("SF Pro Text", 12, 'bold'),
+                              bg=self.colors['surface'],
+                              fg='#262730',
+                              relief='flat', bd=1,
+                              cursor='hand2',
+                              command=self.cancel)
+        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
+        
+        ok_btn = tk.Button(button_frame, text="确定", 
+                          font=("SF Pro Text", 12, "bold"),
+                          bg=self.colors['surface'],
+                          fg='#262730',
+                          relief='flat', bd=1,
+                          cursor='hand2',
+                          command=self.ok)
+        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
+        
+        # 绑定回车键
+        self.dialog.bind('<Return>', lambda e: self.ok())
+        self.password_entry.focus()
+    
+    def ok(self):
+        """确定按钮"""
+        password = self.password_entry.get()
+        confirm = self.confirm_entry.get()
+        
+        if not password:
+            messagebox.showerror("错误", "请输入主密码")
+            return
+        
+        if password != confirm:
+            messagebox.showerror("错误", "两次输入的密码不一致")
+            return
+        
+        if len(password) < 6:
+            messagebox.showerror("错误", "密码长度至少6位")
+            return
+        
+        self.result = password
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """取消按钮"""
+        self.dialog.destroy()
+
+class VaultUnlockDialog:
+    """保险库解锁对话框"""
+    def __init__(self, parent, colors):
+        self.result = None
+        self.colors = colors
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("解锁保险库")
+        self.dialog.geometry("350x200")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 居中显示
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets()
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
+        
+        # 标题
+        title_label = tk.Label(main_frame, text="🔓 解锁保险库", 
+                              font=("SF Pro Display", 18, "bold"),
+                              fg=self.colors['text_primary'],
+                              bg=self.colors['light'])
+        title_label.pack(pady=(0, 20))
+        
+        # 密码输入框
+        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        password_frame.pack(fill=tk.X, pady=(0, 30))
+        
+        tk.Label(password_frame, text="主密码:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.password_entry = tk.Entry(password_frame, show="*", 
+                                      font=("SF Pro Text", 12),
+                                      relief='flat', bd=1,
+                                      bg=self.colors['white'])
+        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 按钮
+        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        button_frame.pack(fill=tk.X)
+        
+        cancel_btn = tk.Button(button_frame, text="取消", 
+                              font=("SF Pro Text", 12, 'bold'),
+                              bg=self.colors['surface'],
+                              fg='#262730',
+                              relief='flat', bd=1,
+                              cursor='hand2',
+                              command=self.cancel)
+        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
+        
+        ok_btn = tk.Button(button_frame, text="解锁", 
+                          font=("SF Pro Text", 12, "bold"),
+                          bg=self.colors['primary'],
+                          fg='#262730',
+                          relief='flat', bd=0,
+                          cursor='hand2',
+                          command=self.ok)
+        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
+        
+        # 绑定回车键
+        self.dialog.bind('<Return>', lambda e: self.ok())
+        self.password_entry.focus()
+    
+    def ok(self):
+        """确定按钮"""
+        password = self.password_entry.get()
+        
+        if not password:
+            messagebox.showerror("错误", "请输入主密码")
+            return
+        
+        self.result = password
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """取消按钮"""
+        self.dialog.destroy()
+
+class PasswordDialog:
+    """密码编辑对话框"""
+    def __init__(self, parent, colors, title, password_data=None):
+        self.result = None
+        self.colors = colors
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("600x640")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 居中显示
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets(password_data)
+        self.dialog.wait_window()
+    
+    def create_widgets(self, password_data):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
+        
+        # 标题
+        title_label = tk.Label(main_frame, text="📝 密码信息", 
+                              font=("SF Pro Display", 16, "bold"),
+                              fg=self.colors['text_primary'],
+                              bg=self.colors['light'])
+        title_label.pack(pady=(0, 20))
+        
+        # 网站/应用
+        website_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        website_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        tk.Label(website_frame, text="网站/应用:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.website_entry = tk.Entry(website_frame, 
+                                     font=("SF Pro Text", 12),
+                                     relief='flat', bd=1,
+                                     bg=self.colors['white'])
+        self.website_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 账号
+        username_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        username_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        tk.Label(username_frame, text="账号:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.username_entry = tk.Entry(username_frame, 
+                                      font=("SF Pro Text", 12),
+                                      relief='flat', bd=1,
+                                      bg=self.colors['white'])
+        self.username_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 密码
+        password_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        password_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        tk.Label(password_frame, text="密码:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.password_entry = tk.Entry(password_frame, show="*", 
+                                      font=("SF Pro Text", 12),
+                                      relief='flat', bd=1,
+                                      bg=self.colors['white'])
+        self.password_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 显示/隐藏密码按钮
+        toggle_btn = tk.Button(password_frame, text="👁️ 显示密码", 
+                              font=("SF Pro Text", 10, 'bold'),
+                              bg=self.colors['surface'],
+                              fg=self.colors['text'],
+                              relief='flat', bd=1,
+                              cursor='hand2',
+                              command=self.toggle_password_visibility)
+        toggle_btn.pack(anchor=tk.W, pady=(5, 0), ipadx=12, ipady=6)
+        
+        # 描述
+        desc_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        desc_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        tk.Label(desc_frame, text="描述 (可选):", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        
+        self.desc_entry = tk.Entry(desc_frame, 
+                                  font=("SF Pro Text", 12),
+                                  relief='flat', bd=1,
+                                  bg=self.colors['white'])
+        self.desc_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        
+        # 按钮
+        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        button_frame.pack(fill=tk.X, pady=(20, 0))
+        
+        cancel_btn = tk.Button(button_frame, text="取消", 
+                              font=("SF Pro Text", 12, 'bold'),
+                              bg=self.colors['surface'],
+                              fg='#262730',
+                              relief='flat', bd=1,
+                              cursor='hand2',
+                              command=self.cancel)
+        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
+        
+        ok_btn = tk.Button(button_frame, text="确定", 
+                          font=("SF Pro Text", 12, "bold"),
+                          bg=self.colors['surface'],
+                          fg='#262730',
+                          relief='flat', bd=1,
+                          cursor='hand2',
+                          command=self.ok)
+        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
+        
+        # 如果提供了现有数据，填充表单
+        if password_data:
+            self.website_entry.insert(0, password_data.get('website', ''))
+            self.username_entry.insert(0, password_data.get('username', ''))
+            self.password_entry.insert(0, password_data.get('password', ''))
+            self.desc_entry.insert(0, password_data.get('description', ''))
+        
+        # 绑定回车键
+        self.dialog.bind('<Return>', lambda e: self.ok())
+        self.website_entry.focus()
+    
+    def toggle_password_visibility(self):
+        """切换密码显示/隐藏"""
+        if self.password_entry.cget('show') == '*':
+            self.password_entry.config(show='')
+        else:
+            self.password_entry.config(show='*')
+    
+    def ok(self):
+        """确定按钮"""
+        website = self.website_entry.get().strip()
+        username = self.username_entry.get().strip()
+        password = self.password_entry.get().strip()
+        description = self.desc_entry.get().strip()
+        
+        if not website:
+            messagebox.showerror("错误", "请输入网站/应用名称")
+            return
+        
+        if not username:
+            messagebox.showerror("错误", "请输入账号")
+            return
+        
+        if not password:
+            messagebox.showerror("错误", "请输入密码")
+            return
+        
+        self.result = {
+            'website': website,
+            'username': username,
+            'password': password,
+            'description': description
+        }
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """取消按钮"""
+        self.dialog.destroy()
+
+class AccountManagerDialog:
+    """账户管理对话框"""
+    def __init__(self, parent, colors, website, accounts):
+        self.result = None
+        self.colors = colors
+        self.website = website
+        self.accounts = accounts.copy()
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"管理 {website} 的账户")
+        self.dialog.geometry("720x560")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 居中显示
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets()
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
+        
+        # 标题
+        title_label = tk.Label(main_frame, text=f"📱 {self.website} 账户管理", 
+                              font=("SF Pro Display", 16, "bold"),
+                              fg=self.colors['text_primary'],
+                              bg=self.colors['light'])
+        title_label.pack(pady=(0, 20))
+
+        # 可编辑的网站/应用名称
+        website_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        website_frame.pack(fill=tk.X, pady=(0, 15))
+        tk.Label(website_frame, text="网站/应用:", 
+                font=("SF Pro Text", 12),
+                fg=self.colors['text_primary'],
+                bg=self.colors['light']).pack(anchor=tk.W)
+        self.website_entry = tk.Entry(website_frame, 
+                                     font=("SF Pro Text", 12),
+                                     relief='flat', bd=1,
+                                     bg=self.colors['white'])
+        self.website_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
+        self.website_entry.insert(0, self.website)
+        
+        # 账户列表
+        list_frame = tk.Frame(main_frame, bg=self.colors['white'], relief='flat', bd=0)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
+        
+        # 创建Treeview显示账户
+        columns = ('账号', '密码', '描述', '创建时间')
+        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
+        
+        self.tree.heading('账号', text='账号')
+        self.tree.heading('密码', text='密码')
+        self.tree.heading('描述', text='描述')
+        self.tree.heading('创建时间', text='创建时间')
+        
+        self.tree.column('账号', width=180)
+        self.tree.column('密码', width=140)
+        self.tree.column('描述', width=220)
+        self.tree.column('创建时间', width=150)
+        
+        # 滚动条
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 更新账户列表
+        self.update_account_list()
+        
+        # 按钮区域
+        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        button_frame.pack(fill=tk.X)
+        
+        # 左侧按钮
+        left_buttons = tk.Frame(button_frame, bg=self.colors['light'])
+        left_buttons.pack(side=tk.LEFT)
+        
+        add_btn = tk.Button(left_buttons, text="➕ 添加账户", 
+                           font=("SF Pro Text", 11, 'bold'),
+                           bg=self.colors['surface'],
+                           fg=self.colors['text'],
+                           relief='flat', bd=1,
+                           cursor='hand2',
+                           command=self.add_account)
+        add_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=15, ipady=8)
+        
+        edit_btn = tk.Button(left_buttons, text="✏️ 编辑", 
+                            font=("SF Pro Text", 11, 'bold'),
+                            bg=self.colors['surface'],
+                            fg=self.colors['text'],
+                            relief='flat', bd=1,
+                            cursor='hand2',
+                            command=self.edit_account)
+        edit_btn.pack(side=tk.LEFT, padx=(0, 10), ipadx=15, ipady=8)
+        
+        delete_btn = tk.Button(left_buttons, text="🗑️ 删除", 
+                              font=("SF Pro Text", 11, 'bold'),
+                              bg=self.colors['danger'],
+                              fg=self.colors['white'],
+                              relief='flat', bd=0,
+                              cursor='hand2',
+                              command=self.delete_account)
+        delete_btn.pack(side=tk.LEFT, ipadx=15, ipady=8)
+        
+        # 右侧按钮
+        right_buttons = tk.Frame(button_frame, bg=self.colors['light'])
+        right_buttons.pack(side=tk.RIGHT, padx=10)
+        
+        cancel_btn = tk.Button(right_buttons, text="取消", 
+                              font=("SF Pro Text", 11, 'bold'),
+                              bg='#6C757D',
+                              fg='#262730',
+                              relief='flat', bd=0,
+                              cursor='hand2',
+                              command=self.cancel)
+        cancel_btn.pack(side=tk.LEFT, padx=(10, 0), ipadx=25, ipady=8)
+        
+        ok_btn = tk.Button(right_buttons, text="确定", 
+                          font=("SF Pro Text", 11, "bold"),
+                          bg=self.colors['surface'],
+                          fg='#262730',
+                          relief='flat', bd=1,
+                          cursor='hand2',
+                          command=self.ok)
+        ok_btn.pack(side=tk.LEFT, ipadx=25, ipady=8)
+    
+    def update_account_list(self):
+        """更新账户列表"""
+        # 清空现有项目
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        
+        # 添加账户项目
+        for account in self.accounts:
+            username = account.get('username', '')
+            password = '•' * len(account.get('password', ''))
+            description = account.get('description', '')
+            created_time = account.get('created_time', '')
+            
+            self.tree.insert('', 'end', values=(username, password, description, created_time))
+    
+    def add_account(self):
+        """添加账户"""
+        dialog = PasswordDialog(self.dialog, self.colors, "添加账户")
+        if dialog.result:
+            new_account = {
+                'username': dialog.result['username'],
+                'password': dialog.result['password'],
+                'description': dialog.result['description'],
+                'created_time': time.strftime('%Y-%m-%d %H:%M')
+            }
+            self.accounts.append(new_account)
+            self.update_account_list()
+    
+    def edit_account(self):
+        """编辑账户"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择要编辑的账户")
+            return
+        
+        item = self.tree.item(selection[0])
+        username = str(item['values'][0])
+        
+        # 找到对应的账户
+        account = None
+        for acc in self.accounts:
+            if acc.get('username') == username:
+                account = acc
+                break
+        
+        if account:
+            dialog = PasswordDialog(self.dialog, self.colors, "编辑账户", account)
+            if dialog.result:
+                account.update(dialog.result)
+                account['modified_time'] = time.strftime('%Y-%m-%d %H:%M')
+                self.update_account_list()
+    
+    def delete_account(self):
+        """删除账户"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择要删除的账户")
+            return
+        
+        item = self.tree.item(selection[0])
+        username = str(item['values'][0])
+        
+        if messagebox.askyesno("确认删除", f"确定要删除账户 '{username}' 吗？"):
+            self.accounts = [acc for acc in self.accounts if acc.get('username') != username]
+            self.update_account_list()
+    
+    def ok(self):
+        """确定按钮"""
+        new_website = self.website_entry.get().strip() or self.website
+        self.result = {
+            'website': new_website,
+            'accounts': self.accounts
+        }
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """取消按钮"""
+        self.dialog.destroy()
+
+class AccountDeleteDialog:
+    """账户删除选择对话框"""
+    def __init__(self, parent, colors, website, accounts):
+        self.result = None
+        self.colors = colors
+        self.website = website
+        self.accounts = accounts.copy()
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"选择要删除的账户 - {website}")
+        self.dialog.geometry("500x400")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 居中显示
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets()
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=30)
+        
+        # 标题
+        title_label = tk.Label(main_frame, text=f"🗑️ 选择要删除的账户", 
+                              font=("SF Pro Display", 16, "bold"),
+                              fg=self.colors['text_primary'],
+                              bg=self.colors['light'])
+        title_label.pack(pady=(0, 10))
+        
+        desc_label = tk.Label(main_frame, text=f"网站/应用: {self.website}", 
+                             font=("SF Pro Text", 12),
+                             fg=self.colors['text_secondary'],
+                             bg=self.colors['light'])
+        desc_label.pack(pady=(0, 20))
+        
+        # 账户列表
+        list_frame = tk.Frame(main_frame, bg=self.colors['white'], relief='flat', bd=0)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
+        
+        # 创建Checkbox列表
+        self.checkboxes = []
+        for i, account in enumerate(self.accounts):
+            var = tk.BooleanVar()
+            username = account.get('username', '')
+            description = account.get('description', '')
+            
+            checkbox_frame = tk.Frame(list_frame, bg=self.colors['white'])
+            checkbox_frame.pack(fill=tk.X, padx=10, pady=5)
+            
+            cb = tk.Checkbutton(checkbox_frame, 
+                               text=f"{username} {f'({description})' if description else ''}",
+                               variable=var,
+                               font=("SF Pro Text", 11),
+                               bg=self.colors['white'],
+                               fg=self.colors['text_primary'])
+            cb.pack(anchor=tk.W)
+            
+            self.checkboxes.append((var, account))
+        
+        # 按钮区域
+        button_frame = tk.Frame(main_frame, bg=self.colors['light'])
+        button_frame.pack(fill=tk.X)
+        
+        cancel_btn = tk.Button(button_frame, text="取消", 
+                              font=("SF Pro Text", 11, 'bold'),
+                              bg=self.colors['surface'],
+                              fg='#262730',
+                              relief='flat', bd=1,
+                              command=self.cancel)
+        cancel_btn.pack(side=tk.RIGHT, padx=(10, 0), ipadx=20, ipady=6)
+        
+        ok_btn = tk.Button(button_frame, text="删除选中", 
+                          font=("SF Pro Text", 11, "bold"),
+                          bg=self.colors['danger'],
+                          fg=self.colors['white'],
+                          relief='flat', bd=0,
+                          cursor='hand2',
+                          command=self.ok)
+        ok_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
+    
+    def ok(self):
+        """确定按钮"""
+        # 获取未选中的账户（保留的账户）
+        remaining_accounts = []
+        for var, account in self.checkboxes:
+            if not var.get():  # 如果未选中，则保留
+                remaining_accounts.append(account)
+        
+        self.result = remaining_accounts
+        self.dialog.destroy()
+    
+    def cancel(self):
+        """取消按钮"""
+        self.dialog.destroy()
+
+class ImportProgressDialog:
+    """导入进度对话框（不阻塞，进度由主窗口从队列中取出后更新）"""
+    def __init__(self, parent, colors, title, on_cancel):
+        self.colors = colors
+        self.on_cancel = on_cancel
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("420x170")
+        self.dialog.resizable(False, False)
+        self.dialog.configure(bg=colors['light'])
+        
+        # 导入期间不能修改数据
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        self.create_widgets(title)
+    
+    def create_widgets(self, title):
+        """创建对话框组件"""
+        main_frame = tk.Frame(self.dialog, bg=self.colors['light'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=25, pady=20)
+        
+        self.text_label = tk.Label(main_frame, text=f"{title}...",
+                                   font=("SF Pro Text", 12),
+                                   fg=self.colors['text_primary'],
+                                   bg=self.colors['light'])
+        self.text_label.pack(anchor=tk.W, pady=(0, 10))
+        
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
+        self.progress.pack(fill=tk.X, pady=(0, 15))
+        
+        self.cancel_btn = tk.Button(main_frame, text="取消",
+                                    font=("SF Pro Text", 12, 'bold'),
+                                    bg=self.colors['surface'],
+                                    fg='#262730',
+                                    relief='flat', bd=1,
+                                    cursor='hand2',
+                                    command=self.cancel)
+        self.cancel_btn.pack(side=tk.RIGHT, ipadx=20, ipady=6)
+    
+    def update_progress(self, fraction, text):
+        """更新进度（只在Tk线程中调用）"""
+        self.progress['value'] = fraction * 100
+        self.text_label.config(text=text)
+    
+    def cancel(self):
+        """取消按钮：通知工作线程停止，结束后由主窗口关闭对话框"""
+        self.on_cancel()
+        self.cancel_btn.config(state='disabled', text="正在取消...")
+    
+    def close(self):
+        self.dialog.grab_release()
+        self.dialog.destroy()
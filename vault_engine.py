@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 数据引擎
+功能: 加载、保存、搜索、增删改、导入和导出，不依赖 Tkinter；
+     图形界面和命令行工具（vault.py）都通过它操作数据
+"""
+
+import contextlib
+import csv
+import gzip
+import io
+import json
+import logging
+import lzma
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from vault_crypto import KEY_FILE, KeyFile, crypto_available
+from vault_index import SiteList, VaultIndex, fold
+from vault_merge import MergeReport, SiteMerger
+from vault_migrations import SCHEMA_VERSION, migrate
+from vault_model import Account, Site, sites_from_dicts
+from vault_storage import JSONStream, ensure_ids, merge_duplicate_sites, new_id, open_store
+
+logger = logging.getLogger(__name__)
+
+APP_VERSION = "2.0.0"
+
+# 流式导入时每处理多少个网站报告一次进度
+IMPORT_PROGRESS_EVERY = 1000
+# 流式导出时每批取回密码并一次写入的网站数
+EXPORT_BATCH_SIZE = 1000
+# 按扩展名选择的压缩格式
+COMPRESSION_MODULES = {'.gz': gzip, '.xz': lzma}
+# CSV 导入时每批读取的行数，同一批中同名网站的行合并为一个网站
+CSV_BATCH_ROWS = 1000
+# CSV 的默认列（与浏览器密码管理器导出的 name,url,username,password,note 相同）：
+# 保险库字段 -> CSV 列名；url 保存在账户上
+CSV_COLUMNS = {
+    'website': 'name',
+    'url': 'url',
+    'username': 'username',
+    'password': 'password',
+    'description': 'note',
+}
+
+
+class ImportFormatError(Exception):
+    """导入文件的格式不正确"""
+
+
+class ImportCancelled(Exception):
+    """导入被取消"""
+
+
+def default_data_file():
+    """数据文件路径（VAULT_BACKEND=sqlite / binary 时使用SQLite或二进制存储，首次打开会从 passwords.json 迁移）"""
+    backend = os.environ.get('VAULT_BACKEND')
+    if backend == 'sqlite':
+        return "passwords.db"
+    if backend == 'binary':
+        return "passwords.vault"
+    return "passwords.json"
+
+
+def count_accounts(sites):
+    return sum(len(item.get('accounts', [])) for item in sites)
+
+
+def split_compression(file_path):
+    """返回 (压缩模块或 None, 去掉压缩扩展名后的小写文件名)，如 backup.json.gz -> (gzip, backup.json)"""
+    base, ext = os.path.splitext(file_path.lower())
+    module = COMPRESSION_MODULES.get(ext)
+    return (module, base) if module else (None, file_path.lower())
+
+
+def is_csv_file(file_path):
+    return split_compression(file_path)[1].endswith('.csv')
+
+
+def csv_columns(columns=None):
+    """默认列映射加上 columns 中的改动（保险库字段 -> CSV 列名），字段名不对时抛出 ValueError"""
+    mapping = dict(CSV_COLUMNS)
+    for field, column in (columns or {}).items():
+        if field not in CSV_COLUMNS:
+            raise ValueError(f"未知的字段: {field}（可用: {', '.join(CSV_COLUMNS)}）")
+        mapping[field] = column
+    return mapping
+
+
+def _site_name_from_url(url):
+    """没有网站名时用网址的主机名（去掉 www.）"""
+    host = urlsplit(url).hostname if '://' in url else None
+    if not host:
+        return url
+    return host[4:] if host.startswith('www.') else host
+
+
+def open_compressed(raw, file_path, mode='rb'):
+    """按扩展名在已打开的二进制文件外包一层 gzip / xz；不压缩时原样返回（关闭时不会关闭 raw）"""
+    module, _ = split_compression(file_path)
+    if module is None:
+        return contextlib.nullcontext(raw)
+    return module.open(raw, mode)
+
+
+def validate_import_site(item, i):
+    """校验导入的第 i 个网站（从0开始），格式不对时抛出 ImportFormatError"""
+    if not isinstance(item, dict):
+        raise ImportFormatError(f"第 {i+1} 项数据格式不正确：必须是对象")
+    if 'website' not in item:
+        raise ImportFormatError(f"第 {i+1} 项缺少 'website' 字段")
+    if 'accounts' not in item:
+        raise ImportFormatError(f"第 {i+1} 项缺少 'accounts' 字段")
+    if not isinstance(item['accounts'], list):
+        raise ImportFormatError(f"第 {i+1} 项的 'accounts' 必须是列表")
+
+    for j, account in enumerate(item['accounts']):
+        if not isinstance(account, dict):
+            raise ImportFormatError(f"第 {i+1} 项的第 {j+1} 个账户格式不正确")
+        for field in ('username', 'password'):
+            if field not in account:
+                raise ImportFormatError(f"第 {i+1} 项的第 {j+1} 个账户缺少 '{field}' 字段")
+
+
+class ImportReader:
+    """流式读取导入文件
+
+    逐个解析并校验 passwords 数组中的网站，内存中只有当前这一个网站，
+    峰值内存与文件大小无关。支持导出文件 {"export_info": {...}, "passwords": [...]}、
+    直接的网站数组和单个网站对象三种格式。
+    JSON 语法错误时抛出 json.JSONDecodeError，格式不对时抛出 ImportFormatError。
+
+    扩展名为 .csv 时按浏览器密码管理器的 CSV 格式读取，每行一个账户；
+    columns 可以修改列映射（保险库字段 -> CSV 列名，见 CSV_COLUMNS），列名不区分大小写。
+    """
+
+    def __init__(self, file_path, columns=None):
+        self.file_path = file_path
+        self.columns = csv_columns(columns)
+        self.total_bytes = os.path.getsize(file_path)
+        # 导出文件中的 export_info（读到它之后才有）
+        self.export_info = None
+
+    def sites(self, progress=None, cancelled=None):
+        """逐个产生校验过的网站
+
+        progress(已读字节, 总字节) 定期调用；cancelled() 返回 True 时抛出 ImportCancelled。
+        """
+        # 进度按已读的文件字节计算，压缩文件也与 total_bytes 对应
+        with open(self.file_path, 'rb') as raw, open_compressed(raw, self.file_path) as f:
+            if is_csv_file(self.file_path):
+                items = self._csv_sites(io.TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+            else:
+                items = self._json_sites(JSONStream(f))
+            for i, item in enumerate(items):
+                if cancelled and cancelled():
+                    raise ImportCancelled()
+                validate_import_site(item, i)
+                yield item
+                if progress and i % IMPORT_PROGRESS_EVERY == 0:
+                    progress(raw.tell(), self.total_bytes)
+        if progress:
+            progress(self.total_bytes, self.total_bytes)
+
+    def _json_sites(self, stream):
+        ch = stream.peek()
+        if ch == '[':
+            return stream.array()
+        if ch == '{':
+            return self._object_sites(stream)
+        raise ImportFormatError("文件格式不正确：必须是JSON对象")
+
+    def _csv_sites(self, f):
+        """按批读取CSV行，同一批中同名网站的行合并为一个网站"""
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ImportFormatError("CSV文件是空的")
+        positions = {name.strip().casefold(): i for i, name in enumerate(header)}
+        fields = {field: positions[column.casefold()] for field, column in self.columns.items()
+                  if column.casefold() in positions}
+        if 'website' not in fields and 'url' not in fields:
+            raise ImportFormatError(f"CSV文件缺少网站列（{self.columns['website']} 或 {self.columns['url']}）")
+        for field, label in (('username', "账号"), ('password', "密码")):
+            if field not in fields:
+                raise ImportFormatError(f"CSV文件缺少{label}列（{self.columns[field]}）")
+
+        batch = {}
+        rows = 0
+        for row in reader:
+            if not any(row):
+                continue
+            values = {field: row[i] if i < len(row) else '' for field, i in fields.items()}
+            url = values.pop('url', '')
+            website = values.pop('website', '').strip() or _site_name_from_url(url.strip())
+            if not website:
+                raise ImportFormatError(f"CSV第 {reader.line_num} 行没有网站名和网址")
+            account = {k: v for k, v in values.items() if v or k in ('username', 'password')}
+            if url:
+                account['url'] = url
+            site = batch.get(website)
+            if site is None:
+                site = batch[website] = {'website': website, 'accounts': []}
+            site['accounts'].append(account)
+            rows += 1
+            if rows >= CSV_BATCH_ROWS:
+                yield from batch.values()
+                batch = {}
+                rows = 0
+        yield from batch.values()
+
+    def _object_sites(self, stream):
+        stream.expect('{')
+        header = {}
+        found = False
+        if stream.peek() == '}':
+            stream.expect('}')
+        else:
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key == 'passwords' and stream.peek() == '[':
+                    found = True
+                    yield from stream.array()
+                else:
+                    header[key] = stream.value()
+                if stream.peek() == '}':
+                    stream.expect('}')
+                    break
+                stream.expect(',')
+        self.export_info = header.get('export_info')
+        if found:
+            return
+        if 'passwords' in header:
+            raise ImportFormatError("密码数据必须是列表格式")
+        if 'website' not in header:
+            raise ImportFormatError("无法识别的JSON格式")
+        # 单个网站对象
+        yield header
+
+    def scan(self, progress=None, cancelled=None):
+        """校验整个文件并统计，返回 (网站数量, 账户总数, 导出时间)"""
+        websites = accounts = 0
+        for site in self.sites(progress, cancelled):
+            websites += 1
+            accounts += len(site['accounts'])
+        export_time = "未知"
+        if isinstance(self.export_info, dict):
+            export_time = self.export_info.get('export_time', export_time)
+        return websites, accounts, export_time
+
+
+class StagedImport:
+    """stage_import 准备好的导入结果（commit_import 之后即为导入的结果）"""
+
+    def __init__(self, mode, passwords, index, imported_count, merged_count, changed_items, report):
+        self.mode = mode
+        self.passwords = passwords
+        self.index = index
+        self.imported_count = imported_count
+        self.merged_count = merged_count
+        self.changed_items = changed_items
+        # MergeReport：新增、更新、未变化和时间冲突的账户
+        self.report = report
+
+
+def _now():
+    return time.strftime('%Y-%m-%d %H:%M')
+
+
+def resident_memory():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:  # macOS 等没有 /proc 的系统
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(os.getpid())],
+                                capture_output=True, text=True, timeout=5).stdout
+        return int(output.strip()) * 1024
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def memory_usage():
+    """(常驻内存字节数或 None, Python 已分配的内存块数)"""
+    return resident_memory(), sys.getallocatedblocks()
+
+
+class LockReport:
+    """锁定前后的内存（memory_usage() 的结果）"""
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+
+    def summary(self):
+        (rss_before, blocks_before), (rss_after, blocks_after) = self.before, self.after
+        text = f"Python 内存块 {blocks_before} -> {blocks_after}"
+        if rss_before is not None and rss_after is not None:
+            freed = rss_before - rss_after
+            text = (f"常驻内存 {rss_before / 1048576:.1f} MB -> {rss_after / 1048576:.1f} MB"
+                    + (f"（释放 {freed / 1048576:.1f} MB）" if freed > 0 else "") + "，" + text)
+        return "锁定前后内存：" + text
+
+
+class VaultEngine:
+    """一个保险库的数据和操作
+
+    passwords 是网站记录列表，index 是与之同步的索引；
+    修改方法会同时更新列表、索引并交给存储保存（实际写盘在后台线程合并执行），
+    返回受影响的网站记录，调用方据此刷新显示。
+    """
+
+    def __init__(self, data_file=None, key_file=KEY_FILE, on_error=None, lazy_load=True):
+        self.data_file = data_file or default_data_file()
+        self.key_file = KeyFile(key_file)
+        self.on_error = on_error
+        self.store = open_store(self.data_file, on_error=on_error)
+        # 网站记录列表（SiteList：删除网站不必扫描整个列表）
+        self.passwords = SiteList()
+        # 网站 / 账户索引，所有修改 passwords 的地方都要同步更新
+        self.index = VaultIndex()
+        # 延迟加载：只读取网站、账号、描述、时间和密码长度，密码在用到时再读取
+        # （SQLite / 二进制后端因此加载更快；JSON 后端仍要解析和解密全部记录，
+        # 只是加密时不把明文密码留在内存中，见 JournalStore.load）
+        self.lazy_load = lazy_load
+        # 最近一次加载时的数据结构迁移结果（没有迁移时为 None）
+        self.migration = None
+        # 是否已锁定（lock() 之后、resume() 之前）
+        self.locked = False
+        # 锁定期间保留的会话密钥（WrappedKey，未加密或已丢弃时为 None）
+        self.wrapped_key = None
+
+    # ---- 解锁 / 加载 / 保存 ----
+
+    def is_encrypted(self):
+        """是否已经设置了主密码"""
+        return self.key_file.exists()
+
+    def unlock(self, password):
+        """校验主密码，主密钥每次会话只派生一次，之后缓存在存储对象中
+
+        主密码错误时抛出 InvalidPasswordError。
+        """
+        if not crypto_available():
+            raise RuntimeError("保险库已加密，但未安装 cryptography，无法打开")
+        self.store.cipher = self.key_file.unlock(password)
+
+    def set_master_password(self, password):
+        """首次使用时设置主密码，已有的明文数据会在加载后整体加密"""
+        self.store.cipher = self.key_file.create(password)
+
+    def load(self, fill_passwords=False):
+        """从存储中加载全部网站"""
+        self.passwords = self.store.load(lazy=self.lazy_load and not fill_passwords)
+        if fill_passwords:
+            self.store.fill_passwords(self.passwords)
+
+        # 旧版本保存的数据按版本升级（版本已是最新时不做任何检查）；
+        # 迁移摘要写入日志（stderr），不混入命令行工具的标准输出
+        self.migration = self.migrate_data_structure()
+        if self.migration is not None and self.migration.total:
+            logger.info(self.migration.summary())
+        # 内存中使用紧凑的 Site / Account 记录
+        self.passwords = SiteList(sites_from_dicts(self.passwords))
+        self.index.rebuild(self.passwords)
+        return self.passwords
+
+    def migrate_data_structure(self):
+        """把数据升级到当前的数据结构版本并保存，返回 MigrationResult（无需迁移时为 None）"""
+        result = migrate(self.passwords, self.store.schema_version)
+        if result is None:
+            return None
+        if result.changed:
+            # 只保存有改动的网站（整体重写会取回所有延迟加载的密码）
+            self.save(changed=result.changed)
+        self.store.set_schema_version(SCHEMA_VERSION)
+        return result
+
+    def save(self, changed=None, removed=None):
+        """保存密码数据
+
+        传入 changed（修改过的网站记录）或 removed（被删除的网站名）时，
+        只向存储写入这些记录；否则重写全部数据。
+        """
+        if changed is None and removed is None:
+            self.store.rewrite(self.passwords)
+            return
+        for website in removed or ():
+            self.store.delete(website)
+        for item in changed or ():
+            self.store.put(item)
+
+    def fill_passwords(self, sites=None):
+        """取回延迟加载的密码（默认全部网站）"""
+        self.store.fill_passwords(self.passwords if sites is None else sites)
+
+    def close(self):
+        """写入所有待保存的修改并关闭存储"""
+        self.store.close()
+
+    # ---- 锁定 ----
+
+    def lock(self):
+        """锁定：写入待保存的修改，清空内存中的网站记录和索引
+
+        存储换成一个新打开、尚未加载的对象；加密时会话密钥只以 WrappedKey 的形式保留，
+        resume() 用它解锁而不必重新派生主密钥。界面持有的记录需要调用方自己清掉。
+        """
+        cipher = self.store.cipher
+        self.store.close()
+        stats = self.store.stats
+        self.store = open_store(self.data_file, on_error=self.on_error)
+        self.store.stats = stats
+        self.wrapped_key = cipher.wrap() if cipher else None
+        self.passwords = SiteList()
+        self.index = VaultIndex()
+        self.locked = True
+
+    def expire_session(self, max_age):
+        """锁定超过 max_age 秒（None 表示不限制）后丢弃保留的会话密钥"""
+        if self.wrapped_key is not None and max_age is not None and self.wrapped_key.age() >= max_age:
+            self.wrapped_key.discard()
+            self.wrapped_key = None
+
+    def resume(self, max_age=None):
+        """锁定后用保留的会话密钥解锁，之后照常 load()
+
+        未加密的保险库总是返回 True；会话密钥已丢弃或锁定超过 max_age 秒时返回 False，
+        此时需要用 unlock(主密码) 重新派生。无论结果如何，保险库都不再处于锁定状态。
+        """
+        self.locked = False
+        self.expire_session(max_age)
+        wrapped, self.wrapped_key = self.wrapped_key, None
+        if wrapped is not None:
+            self.store.cipher = wrapped.unwrap()
+            return True
+        return not self.is_encrypted()
+
+    @property
+    def stats(self):
+        return self.store.stats
+
+    def account_count(self):
+        return count_accounts(self.passwords)
+
+    # ---- 查询 ----
+
+    def search(self, query):
+        """返回网站名、账号或描述匹配查询的网站（有账户的），查询为空时返回全部"""
+        return [site for site in self.index.search.search(query) if site.get('accounts')]
+
+    # ---- 修改 ----
+
+    def add_account(self, website, username, password, description=''):
+        """添加账户，网站不存在时新建；返回 (网站记录, 是否新建了网站)"""
+        account = {
+            'id': new_id(),
+            'username': username,
+            'password': password,
+            'created_time': _now(),
+            'description': description
+        }
+        site = self.index.find_site(website)
+        if site:
+            self.index.add_account(site, Account.from_dict(account))
+            created = False
+        else:
+            site = Site.from_dict({'id': new_id(), 'website': website, 'accounts': [account]})
+            self.passwords.append(site)
+            self.index.add_site(site)
+            created = True
+        self.save(changed=[site])
+        return site, created
+
+    def edit_account(self, site, account, website, username, password, description=''):
+        """修改一个账户，网站名变化时把账户搬到目标网站（合并或新建）
+
+        返回 (修改过的网站列表, 被删除的网站列表)。
+        """
+        changed = []
+        removed = []
+        if fold(website) == fold(site['website']):
+            # 网站名未变化，原地更新
+            account['username'] = username
+            account['password'] = password
+            account['description'] = description
+            account['modified_time'] = _now()
+            self.index.update_site(site)
+            changed.append(site)
+        else:
+            # 从原网站移除该账户
+            site['accounts'] = [acc for acc in site.get('accounts', []) if acc is not account]
+            self.index.update_site(site)
+            moved_account = Account.from_dict({
+                'id': account['id'],
+                'username': username,
+                'password': password,
+                'description': description,
+                'created_time': account.get('created_time', _now()),
+                'modified_time': _now()
+            })
+            target = self.index.find_site(website)
+            if target:
+                # 若存在相同用户名则覆盖，否则追加
+                existing = self.index.find_account(target, username)
+                if existing is not None:
+                    # 覆盖内容但保留目标账户的ID（ID是表格中的项目ID）
+                    moved_account.pop('id', None)
+                    existing.update(moved_account)
+                    self.index.update_site(target)
+                else:
+                    self.index.add_account(target, moved_account)
+            else:
+                target = Site.from_dict({'id': new_id(), 'website': website, 'accounts': [moved_account]})
+                self.passwords.append(target)
+                self.index.add_site(target)
+            changed.append(target)
+            # 如果原网站下没有账户了，删除原网站
+            if not site['accounts']:
+                self._remove(site)
+                removed.append(site)
+            else:
+                changed.append(site)
+        self.save(changed=changed, removed=[item['website'] for item in removed])
+        return changed, removed
+
+    def update_site(self, site, website, accounts):
+        """替换网站的账户列表，网站名变化时重命名或合并到已存在的网站
+
+        返回保存了账户的网站记录（合并时是目标网站，原网站已删除）。
+        """
+        accounts = [Account.from_dict(acc) for acc in accounts]
+        old_website = site['website']
+        if fold(website) == fold(old_website):
+            site['accounts'] = accounts
+            site['modified_time'] = _now()
+            self.index.update_site(site)
+            result = site
+        else:
+            target = self.index.find_site(website)
+            if target:
+                # 合并账户（相同用户名覆盖）
+                for acc in accounts:
+                    existing = self.index.find_account(target, acc.get('username', ''))
+                    if existing is not None:
+                        acc.pop('id', None)
+                        existing.update(acc)
+                    else:
+                        self.index.add_account(target, acc)
+                self.index.update_site(target)
+                self._remove(site)
+                target['modified_time'] = _now()
+                result = target
+            else:
+                # 直接重命名
+                site['accounts'] = accounts
+                self.index.rename_site(site, website)
+                site['modified_time'] = _now()
+                result = site
+        # 新增的账户还没有ID
+        ensure_ids([result])
+        if result is site and site['website'] == old_website:
+            self.save(changed=[result])
+        else:
+            self.save(changed=[result], removed=[old_website])
+        return result
+
+    def set_accounts(self, site, accounts):
+        """只保留给定的账户，没有账户时删除整个网站；返回网站是否被删除"""
+        site['accounts'] = list(accounts)
+        if not site['accounts']:
+            self.delete_site(site)
+            return True
+        self.index.update_site(site)
+        self.save(changed=[site])
+        return False
+
+    def delete_site(self, site):
+        """删除网站及其所有账户"""
+        self._remove(site)
+        self.save(removed=[site['website']])
+
+    def _remove(self, site):
+        self.passwords.remove(site)
+        self.index.remove_site(site)
+
+    # ---- 导入 / 导出 ----
+
+    def import_file(self, file_path, import_mode, progress=None, columns=None):
+        """流式导入文件：网站逐个解析、校验并合并，不把整个文件读入内存
+
+        最后只保存一次；columns 是 CSV 文件的列映射（见 ImportReader）。
+        """
+        return self.import_sites(ImportReader(file_path, columns).sites(progress), import_mode)
+
+    def import_sites(self, import_passwords, import_mode):
+        """导入网站（列表或逐个产生网站的迭代器，import_mode 为 "replace" 或 "merge"）并保存
+
+        返回 StagedImport（新增和合并的网站数、有改动的网站、合并报告）。
+        """
+        return self.commit_import(self.stage_import(import_passwords, import_mode))
+
+    def stage_import(self, import_passwords, import_mode, progress=None, cancelled=None):
+        """准备导入结果，不修改当前数据（可以在工作线程中运行）
+
+        合并由 SiteMerger 完成：被改动的网站先复制一份再修改，原来的记录保持不变，
+        取消或出错时直接丢弃结果即可。progress(已处理, 合并, 新增) 定期调用；
+        cancelled() 返回 True 时抛出 ImportCancelled。
+        工作线程运行期间调用方不能修改数据（图形界面用模态进度对话框保证）。
+        """
+        def check(processed, merged, added):
+            if cancelled and cancelled():
+                raise ImportCancelled()
+            if progress and processed % IMPORT_PROGRESS_EVERY == 0:
+                progress(processed, merged, added)
+
+        if import_mode == "replace":
+            # 替换所有数据
+            passwords = []
+            for import_item in import_passwords:
+                check(len(passwords), 0, len(passwords))
+                passwords.append(Site.from_dict(import_item))
+            # 同名网站合并为一条（与存储重写时一致；CSV 中不相邻的同名网站会分在不同批次）
+            merge_duplicate_sites(passwords)
+            ensure_ids(passwords)
+            if progress:
+                progress(len(passwords), 0, len(passwords))
+            report = MergeReport()
+            report.added_sites = [site['website'] for site in passwords]
+            report.added = [(site['website'], str(account.get('username', '')))
+                            for site in passwords for account in site.get('accounts', [])]
+            passwords = SiteList(passwords)
+            return StagedImport(import_mode, passwords, VaultIndex(passwords),
+                                len(passwords), 0, passwords, report)
+
+        # 合并数据：按网站名和用户名查哈希表，一次遍历完成
+        merger = SiteMerger(self.passwords, self.store.fill_passwords)
+        processed = 0
+        for import_item in import_passwords:
+            check(processed, merger.merged_count, merger.imported_count)
+            processed += 1
+            merger.merge(import_item)
+
+        if progress:
+            progress(processed, merger.merged_count, merger.imported_count)
+        passwords = SiteList(merger.passwords)
+        return StagedImport(import_mode, passwords, VaultIndex(passwords),
+                            merger.imported_count, merger.merged_count, merger.changed_items,
+                            merger.report)
+
+    def commit_import(self, staged):
+        """换入 stage_import 准备好的数据并保存，返回 staged"""
+        self.passwords = staged.passwords
+        self.index = staged.index
+        if staged.mode == "replace":
+            self.save()
+        else:
+            self.save(changed=staged.changed_items)
+        return staged
+
+    def export(self, file_path, columns=None):
+        """流式导出所有数据：.json 为可重新导入的JSON，.csv 为浏览器密码管理器格式的CSV
+        （每个账户一行，columns 修改列映射，见 CSV_COLUMNS），其他扩展名为便于阅读的文本；
+        再加 .gz 或 .xz 扩展名（如 backup.json.gz）时压缩写入
+
+        网站按批取回密码、序列化后整批写入，不会把整个保险库复制一份；
+        密码只填在导出用的副本里，延迟加载的网站导出后仍不占用密码的内存。
+        统计在同一遍中累计：JSON 的 export_info 写在 passwords 之后，文本的账户总数写在末尾。
+        返回 export_info。
+        """
+        _, base = split_compression(file_path)
+        as_json = base.endswith('.json')
+        as_csv = base.endswith('.csv')
+        columns = csv_columns(columns)
+        export_info = {
+            "export_time": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "total_websites": 0,
+            "total_accounts": 0,
+            "app_version": APP_VERSION
+        }
+
+        with open(file_path, 'wb') as raw, open_compressed(raw, file_path, 'wb') as binary, \
+                io.TextIOWrapper(binary, encoding='utf-8', newline='' if as_csv else None) as f:
+            writer = csv.writer(f)
+            if as_json:
+                f.write('{"passwords": [')
+            elif as_csv:
+                writer.writerow(columns.values())
+            else:
+                f.write("密码保险库 - 数据导出\n")
+                f.write("=" * 50 + "\n")
+                f.write(f"导出时间: {export_info['export_time']}\n")
+                f.write(f"网站数量: {len(self.passwords)}\n")
+                f.write("=" * 50 + "\n\n")
+
+            for batch in self._export_batches():
+                chunks = []
+                for website_data in batch:
+                    if as_json:
+                        chunks.append(',\n' if export_info['total_websites'] else '\n')
+                        chunks.append(json.dumps(website_data, ensure_ascii=False))
+                    elif as_csv:
+                        chunks.extend(_csv_rows(website_data, columns))
+                    else:
+                        _format_text_site(website_data, chunks)
+                    export_info['total_websites'] += 1
+                    export_info['total_accounts'] += len(website_data.get('accounts', []))
+                if as_csv:
+                    writer.writerows(chunks)
+                else:
+                    f.write(''.join(chunks))
+
+            if as_json:
+                f.write('\n],\n"export_info": ')
+                f.write(json.dumps(export_info, ensure_ascii=False))
+                f.write('}\n')
+            elif not as_csv:
+                f.write("=" * 50 + "\n")
+                f.write(f"账户总数: {export_info['total_accounts']}\n")
+        return export_info
+
+    def _export_batches(self):
+        """按批产生带完整密码的网站副本（普通 dict）"""
+        for start in range(0, len(self.passwords), EXPORT_BATCH_SIZE):
+            batch = [Site.from_dict(site).to_dict()
+                     for site in self.passwords[start:start + EXPORT_BATCH_SIZE]]
+            self.store.fill_passwords(batch)
+            yield batch
+
+
+def _csv_rows(website_data, columns):
+    """一个网站的CSV行（每个账户一行，列顺序与 columns 相同）"""
+    website = website_data.get('website', '')
+    for account in website_data.get('accounts', []):
+        values = {'website': website, 'url': account.get('url', '')}
+        for field in ('username', 'password', 'description'):
+            values[field] = account.get(field, '')
+        yield [values[field] for field in columns]
+
+
+def _format_text_site(website_data, chunks):
+    """把一个网站的文本导出内容追加到 chunks"""
+    accounts = website_data.get('accounts', [])
+    chunks.append(f"🌐 网站: {website_data.get('website', '')}\n"
+                  f"   账户数量: {len(accounts)}\n"
+                  + "-" * 40 + "\n")
+    for i, account in enumerate(accounts, 1):
+        chunks.append(f"   账户 {i}:\n"
+                      f"     用户名: {account.get('username', '')}\n"
+                      f"     密码: {account.get('password', '')}\n"
+                      f"     描述: {account.get('description', '无')}\n"
+                      f"     创建时间: {account.get('created_time', '未知')}\n"
+                      "\n")
+    chunks.append("\n")
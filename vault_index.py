@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 内存索引
+功能: 按网站名和 (网站, 用户名) 常数时间查找记录，替代对整个列表的线性扫描；
+     所有修改路径都通过索引登记，索引与数据列表保持一致；
+     另有搜索用的三元组倒排索引，随网站索引一起更新；
+     数据列表 SiteList 记录每个网站的位置，删除也是常数时间
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+
+def fold(text):
+    """网站名比较时使用的规范形式（不区分大小写）"""
+    return str(text).casefold()
+
+
+# 空位多于这个数并且超过有效记录数时压缩 SiteList
+COMPACT_MIN_HOLES = 64
+
+
+class SiteList:
+    """网站记录列表：记录每个网站的位置，删除只留下空位（常数时间）
+
+    空位多于有效记录时才整体压缩一次（均摊常数时间）。迭代、len、真值判断与普通列表相同；
+    下标、切片和切片赋值（如 merge_duplicate_sites 的原地更新）会先压缩掉空位。
+    """
+
+    def __init__(self, sites=()):
+        self._items = list(sites)
+        self._holes = 0
+        self._reindex()
+
+    def _reindex(self):
+        # id(网站记录) -> 在 _items 中的位置
+        self._pos = {id(site): i for i, site in enumerate(self._items)}
+
+    def _compact(self):
+        if self._holes:
+            self._items = [site for site in self._items if site is not None]
+            self._holes = 0
+            self._reindex()
+
+    def append(self, site):
+        self._pos[id(site)] = len(self._items)
+        self._items.append(site)
+
+    def remove(self, site):
+        """移除一个网站记录（按对象而不是按内容，不在列表中时抛出 ValueError）"""
+        position = self._pos.pop(id(site), None)
+        if position is None:
+            raise ValueError("网站记录不在列表中")
+        self._items[position] = None
+        self._holes += 1
+        if self._holes > COMPACT_MIN_HOLES and self._holes * 2 > len(self._items):
+            self._compact()
+
+    def __len__(self):
+        return len(self._items) - self._holes
+
+    def __iter__(self):
+        if not self._holes:
+            return iter(self._items)
+        return (site for site in self._items if site is not None)
+
+    def __getitem__(self, index):
+        self._compact()
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        self._compact()
+        self._items[index] = value
+        self._reindex()
+
+    def __repr__(self):
+        return f"SiteList({list(self)!r})"
+
+
+class VaultIndex:
+    """网站 / 账户索引
+
+    网站按 casefold 后的名称索引（同名不同大小写的网站按出现顺序排列，
+    find_site 返回第一个）；每个网站的账户按用户名索引，重名时返回第一个。
+    索引只保存对原记录的引用，账户字段的原地修改（如填入密码）无需通知索引，
+    但增删网站、增删账户、修改用户名或网站名后必须调用对应的方法。
+    """
+
+    def __init__(self, sites=None):
+        # casefold 网站名 -> [网站记录, ...]
+        self._sites = {}
+        # id(网站记录) -> {用户名: 账户}
+        self._accounts = {}
+        self.search = SearchIndex()
+        if sites:
+            self.rebuild(sites)
+
+    def rebuild(self, sites):
+        """按完整列表重建索引"""
+        self._sites = {}
+        self._accounts = {}
+        self.search.rebuild([])
+        for site in sites:
+            self.add_site(site)
+
+    def find_site(self, website):
+        """按网站名查找（不区分大小写）"""
+        matches = self._sites.get(fold(website))
+        return matches[0] if matches else None
+
+    def get_site(self, website):
+        """按网站名精确查找"""
+        website = str(website)
+        for site in self._sites.get(fold(website), ()):
+            if str(site.get('website', '')) == website:
+                return site
+        return None
+
+    def find_account(self, site, username):
+        """在网站下按用户名查找账户"""
+        if site is None:
+            return None
+        return self._accounts.get(id(site), {}).get(str(username))
+
+    def add_site(self, site):
+        """登记一个新网站（调用方负责把它加入数据列表）"""
+        self._sites.setdefault(fold(site.get('website', '')), []).append(site)
+        self.update_site(site)
+
+    def remove_site(self, site):
+        """注销一个网站（调用方负责把它从数据列表中移除）"""
+        self._unlink(site)
+        self._accounts.pop(id(site), None)
+        self.search.remove_site(site)
+
+    def rename_site(self, site, website):
+        """修改网站名并更新索引（在搜索结果中的位置不变）"""
+        self._unlink(site)
+        site['website'] = website
+        self._sites.setdefault(fold(website), []).append(site)
+        self.update_site(site)
+
+    def update_site(self, site):
+        """网站的账户列表、用户名或描述有变化后重建该网站的索引"""
+        accounts = {}
+        for account in site.get('accounts', []):
+            accounts.setdefault(str(account.get('username', '')), account)
+        self._accounts[id(site)] = accounts
+        self.search.update_site(site)
+
+    def add_account(self, site, account):
+        """向网站追加一个账户并登记"""
+        site.setdefault('accounts', []).append(account)
+        self.update_site(site)
+
+    def _unlink(self, site):
+        key = fold(site.get('website', ''))
+        matches = self._sites.get(key, [])
+        matches[:] = [item for item in matches if item is not site]
+        if not matches:
+            self._sites.pop(key, None)
+
+    def __len__(self):
+        return len(self._accounts)
+
+
+# 从单词开头取两个字符；中日韩文字没有空格分词，每个字都算作一个开头
+_word_prefix = re.compile(r'(?=((?:(?<!\w)\w|[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff])\w?))')
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _search_keys(fields):
+    """字段 -> (三元组集合, 前缀集合)"""
+    trigrams = set()
+    prefixes = set()
+    for field in fields:
+        trigrams |= _trigrams(field)
+        for prefix in _word_prefix.findall(field):
+            prefixes.add(prefix)
+            prefixes.add(prefix[:1])
+        prefixes.add(field[:1])
+        prefixes.add(field[:2])
+    return trigrams, prefixes
+
+
+def _intersect(postings):
+    """求若干个有序倒排表的交集，从最短的开始"""
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if not result:
+            break
+        if len(other) > 16 * len(result):
+            # 长度悬殊时逐个二分查找，不必扫描长表
+            result = [seq for seq in result if _contains(other, seq)]
+        else:
+            result = sorted(set(result).intersection(other))
+    return result
+
+
+def _contains(postings, seq):
+    i = bisect_left(postings, seq)
+    return i < len(postings) and postings[i] == seq
+
+
+class SearchIndex:
+    """搜索框使用的倒排索引
+
+    对 casefold 后的网站名、用户名和描述建立三元组（trigram）倒排表：
+    三个字符以上的查询取各三元组倒排表的交集，再逐个确认候选记录确实包含查询串；
+    一两个字符的查询使用前缀索引，匹配以它开头的字段或单词。
+    倒排表是按序号排序的紧凑整数数组（每项 4 字节），
+    结果按网站加入索引的先后顺序返回，与数据列表的顺序一致。
+
+    索引在第一次搜索时才建立，不拖慢解锁；此前的增删只记录网站的先后顺序。
+    保留上一次的查询结果：新查询包含上一次的查询串时（继续输入），
+    只需在上一次的结果中确认，不必再查倒排表。
+    """
+
+    def __init__(self, sites=None):
+        self.rebuild(sites or [])
+
+    def rebuild(self, sites):
+        """按完整列表重建索引（推迟到第一次搜索时）"""
+        # 三元组 / 前缀 -> 有序的序号数组
+        self._trigrams = {}
+        self._prefixes = {}
+        # id(网站记录) -> 序号；序号 -> (网站记录, casefold 后的字段)
+        self._seq_of = {}
+        self._entries = {}
+        self._next_seq = 0
+        # 尚未建立索引时按顺序记录的网站：id(网站记录) -> 网站记录
+        self._unindexed = {id(site): site for site in sites}
+        # 上一次的 (查询, 结果)，数据有修改时作废
+        self._last = None
+
+    def _ensure_built(self):
+        if self._unindexed is None:
+            return
+        sites = self._unindexed.values()
+        self._unindexed = None
+        # 先收集到列表再转换为数组，比逐个插入快得多
+        tables = ({}, {})
+        for seq, site in enumerate(sites):
+            fields = self._fields(site)
+            self._seq_of[id(site)] = seq
+            self._entries[seq] = (site, fields)
+            for table, keys in zip(tables, _search_keys(fields)):
+                for key in keys:
+                    postings = table.get(key)
+                    if postings is None:
+                        table[key] = [seq]
+                    else:
+                        postings.append(seq)
+        self._trigrams = {key: array('I', postings) for key, postings in tables[0].items()}
+        self._prefixes = {key: array('I', postings) for key, postings in tables[1].items()}
+        self._next_seq = len(self._entries)
+
+    @staticmethod
+    def _fields(site):
+        fields = [fold(site.get('website', ''))]
+        for account in site.get('accounts', []):
+            fields.append(fold(account.get('username', '')))
+            fields.append(fold(account.get('description', '')))
+        return tuple(field for field in fields if field)
+
+    def add_site(self, site, seq=None):
+        """登记一个网站（seq 为 None 时排在最后）"""
+        self._last = None
+        if self._unindexed is not None:
+            self._unindexed[id(site)] = site
+            return
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        fields = self._fields(site)
+
+        for table, keys in zip((self._trigrams, self._prefixes), _search_keys(fields)):
+            for key in keys:
+                postings = table.get(key)
+                if postings is None:
+                    table[key] = array('I', (seq,))
+                elif postings[-1] < seq:
+                    postings.append(seq)
+                else:
+                    postings.insert(bisect_left(postings, seq), seq)
+        self._seq_of[id(site)] = seq
+        self._entries[seq] = (site, fields)
+
+    def remove_site(self, site):
+        """注销一个网站，返回它的序号"""
+        self._last = None
+        if self._unindexed is not None:
+            self._unindexed.pop(id(site), None)
+            return None
+        seq = self._seq_of.pop(id(site), None)
+        if seq is None:
+            return None
+        # 倒排表的键从字段重新计算，不必为每个网站另存一份
+        keys = _search_keys(self._entries.pop(seq)[1])
+        for table, table_keys in zip((self._trigrams, self._prefixes), keys):
+            for key in table_keys:
+                postings = table[key]
+                del postings[bisect_left(postings, seq)]
+                if not postings:
+                    del table[key]
+        return seq
+
+    def update_site(self, site):
+        """网站名、用户名或描述有变化后重新登记（保持原来的顺序）"""
+        if self._unindexed is not None:
+            self._unindexed.setdefault(id(site), site)
+            self._last = None
+            return
+        self.add_site(site, self.remove_site(site))
+
+    def candidates(self, query):
+        """返回可能匹配的有序序号列表（三个字符以上的查询还需要 search 逐个确认）"""
+        self._ensure_built()
+        if len(query) < 3:
+            return self._prefixes.get(query, ())
+        return _intersect([self._trigrams.get(gram, ()) for gram in _trigrams(query)])
+
+    def matches(self, site, query):
+        """单个网站是否匹配查询（与 search 的规则相同）"""
+        query = fold(query)
+        if not query:
+            return True
+        fields = self._fields(site)
+        if len(query) < 3:
+            return query in _search_keys(fields)[1]
+        return any(query in field for field in fields)
+
+    def search(self, query):
+        """返回匹配查询的网站记录列表"""
+        query = fold(query)
+        self._ensure_built()
+        if not query:
+            return [entry[0] for _, entry in sorted(self._entries.items())]
+        entries = self._entries
+        last = self._last
+        if last and len(last[0]) >= 3 and last[0] in query:
+            # 继续输入：结果只会变少，在上一次的结果中确认即可
+            # （一两个字的查询按前缀匹配，结果不是子串匹配的超集，不能这样缩小）
+            seq_of = self._seq_of
+            candidates = [seq_of[id(site)] for site in last[1]]
+            verify = True
+        else:
+            candidates = self.candidates(query)
+            # 前缀和单个三元组的倒排表本身就是准确结果，不需要确认
+            verify = len(query) > 3
+        if verify:
+            matches = [entries[seq][0] for seq in candidates
+                       if any(query in field for field in entries[seq][1])]
+        else:
+            matches = [entries[seq][0] for seq in candidates]
+        self._last = (query, matches)
+        return matches
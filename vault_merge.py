@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 导入合并
+功能: 对现有网站按 casefold 后的网站名、对被合并网站的账户按用户名各建立一次哈希表，
+     导入的网站逐个查表合并，总耗时与网站和账户数成线性；
+     合并结果记录在报告中（新增、更新、未变化、时间冲突），而不是直接覆盖现有账户
+"""
+
+import time
+
+from vault_index import fold
+from vault_model import Account, Site, parse_time
+from vault_storage import new_id
+
+
+def account_time(account):
+    """账户最后修改的时间（秒），没有时间或格式无法识别时返回 None"""
+    value, _ = parse_time(account.get('modified_time') or account.get('created_time'))
+    return value if isinstance(value, int) else None
+
+
+class MergeReport:
+    """合并报告
+
+    added / updated / unchanged 的每一项是 (网站名, 用户名)；
+    conflicts 的每一项是 (网站名, 用户名, 现有账户的时间, 导入账户的时间)，
+    即现有账户比导入的更新，这些账户保留现有内容不被覆盖。
+    """
+
+    def __init__(self):
+        self.added_sites = []
+        self.added = []
+        self.updated = []
+        self.unchanged = []
+        self.conflicts = []
+
+    def summary(self):
+        text = (f"新增网站 {len(self.added_sites)} 个，新增账户 {len(self.added)} 个，"
+                f"更新 {len(self.updated)} 个，未变化 {len(self.unchanged)} 个")
+        if self.conflicts:
+            text += f"，{len(self.conflicts)} 个账户的现有记录较新，已保留"
+        return text
+
+    def to_dict(self):
+        return {
+            'added_sites': self.added_sites,
+            'added': [list(item) for item in self.added],
+            'updated': [list(item) for item in self.updated],
+            'unchanged': [list(item) for item in self.unchanged],
+            'conflicts': [{'website': website, 'username': username,
+                           'existing_time': existing, 'imported_time': imported}
+                          for website, username, existing, imported in self.conflicts],
+        }
+
+
+class SiteMerger:
+    """把导入的网站逐个合并进现有网站列表，不修改原来的记录
+
+    passwords 是合并后的网站列表：被合并的网站在第一次用到时复制一份替换到原位置，
+    新网站追加在后面。现有记录的ID保持不变，导入的记录没有ID或ID重复时分配新ID。
+    fill_passwords(网站列表) 用于在比较前取回延迟加载的密码。
+    """
+
+    def __init__(self, sites, fill_passwords=None):
+        self.passwords = list(sites)
+        self.fill_passwords = fill_passwords
+        self.report = MergeReport()
+        self.imported_count = 0
+        self.merged_count = 0
+        # 有改动的网站（副本和新增的网站）
+        self.changed_items = []
+        # casefold 网站名 -> 在 passwords 中的位置（同名时取第一个，与添加账户时的查找一致）
+        self._positions = {}
+        for position, site in enumerate(self.passwords):
+            self._positions.setdefault(fold(site.get('website', '')), position)
+        # 已复制的网站的位置 -> {用户名: 账户}
+        self._accounts = {}
+        self._seen_ids = {record.get('id') for site in self.passwords
+                          for record in [site] + site.get('accounts', [])}
+
+    def merge(self, import_item):
+        """合并一个导入的网站"""
+        key = fold(import_item['website'])
+        position = self._positions.get(key)
+        if position is None:
+            self._add_site(import_item, key)
+            return
+        self.merged_count += 1
+        site = self.passwords[position]
+        accounts = self._accounts.get(position)
+        if accounts is None:
+            # 第一次合并到这个网站：取回密码以便比较，再复制
+            if self.fill_passwords:
+                self.fill_passwords([site])
+            site = Site.from_dict(site.to_dict())
+            self.passwords[position] = site
+            self.changed_items.append(site)
+            accounts = {}
+            for account in site['accounts']:
+                accounts.setdefault(str(account.get('username', '')), account)
+            self._accounts[position] = accounts
+
+        website = site['website']
+        for import_account in import_item['accounts']:
+            username = str(import_account['username'])
+            existing = accounts.get(username)
+            if existing is None:
+                # 添加新账户，确保有创建时间
+                account = self._new_account(import_account)
+                site['accounts'].append(account)
+                accounts[username] = account
+                self.report.added.append((website, username))
+                continue
+
+            fields = {k: v for k, v in import_account.items() if k != 'id'}
+            if all(existing.get(k) == v for k, v in fields.items()):
+                self.report.unchanged.append((website, username))
+                continue
+            existing_time = account_time(existing)
+            imported_time = account_time(import_account)
+            if existing_time is not None and imported_time is not None and existing_time > imported_time:
+                # 现有账户比导入的更新，不覆盖
+                self.report.conflicts.append((website, username,
+                                              existing.get('modified_time') or existing.get('created_time'),
+                                              import_account.get('modified_time') or import_account.get('created_time')))
+                continue
+            # 更新密码和其他信息（保留现有账户的ID）
+            existing.update(fields)
+            self.report.updated.append((website, username))
+
+    def _add_site(self, import_item, key):
+        """添加新网站，之后导入的同名网站合并到这里"""
+        self.imported_count += 1
+        site = Site.from_dict({k: v for k, v in import_item.items() if k != 'accounts'})
+        self._assign_id(site)
+        site['accounts'] = [self._new_account(account) for account in import_item['accounts']]
+        position = len(self.passwords)
+        self.passwords.append(site)
+        self.changed_items.append(site)
+        self._positions[key] = position
+        accounts = {}
+        for account in site['accounts']:
+            accounts.setdefault(str(account.get('username', '')), account)
+        self._accounts[position] = accounts
+        self.report.added_sites.append(site['website'])
+        self.report.added.extend((site['website'], str(account.get('username', '')))
+                                 for account in site['accounts'])
+
+    def _new_account(self, import_account):
+        account = Account.from_dict(import_account)
+        self._assign_id(account)
+        if 'created_time' not in account:
+            account['created_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        return account
+
+    def _assign_id(self, record):
+        if not record.get('id') or record['id'] in self._seen_ids:
+            record['id'] = new_id()
+        self._seen_ids.add(record['id'])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 数据结构版本迁移
+功能: 数据文件中记录数据结构版本，版本已是最新时加载不做任何检查；
+     旧数据按版本顺序经过一串迁移步骤，所有步骤在同一遍遍历中逐个网站完成
+
+版本:
+    1  每条记录直接包含 website / username / password（单账户）
+    2  每个网站一条记录，账户放在 accounts 列表中
+    3  每个网站和账户都有固定的ID
+
+添加新版本: 用 @migration(版本号, 说明) 注册一个函数 func(网站, 上下文)，
+把上一版本的一个网站原地转换为新版本，有改动时返回 True；
+上下文是本次迁移所有步骤共用的字典（用于跨网站的状态，例如已用过的ID）。
+"""
+
+import time
+
+from vault_storage import flat_to_accounts, new_id
+
+# 版本号 -> (说明, 迁移函数)
+MIGRATIONS = {}
+
+
+def migration(version, description):
+    """注册从 version-1 升级到 version 的迁移步骤"""
+    def register(func):
+        MIGRATIONS[version] = (description, func)
+        return func
+    return register
+
+
+@migration(2, "单账户记录转换为多账户")
+def split_accounts(site, context):
+    # 旧格式直接包含 website / username / password；加载时与同名网站合并过的记录
+    # 已经有 accounts，单账户字段同样要转换
+    return flat_to_accounts(site)
+
+
+@migration(3, "给网站和账户分配固定ID")
+def assign_ids(site, context):
+    seen = context.setdefault('ids', set())
+    assigned = False
+    for record in [site] + site.get('accounts', []):
+        if not record.get('id') or record['id'] in seen:
+            record['id'] = new_id()
+            assigned = True
+        seen.add(record['id'])
+    return assigned
+
+
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+class MigrationResult:
+    """一次迁移的结果：版本、有改动的网站和各步骤耗时（秒）"""
+
+    def __init__(self, from_version, to_version, total):
+        self.from_version = from_version
+        self.to_version = to_version
+        self.total = total
+        self.changed = []
+        self.step_counts = {}
+        self.step_seconds = {}
+        self.seconds = 0.0
+
+    def summary(self):
+        steps = '，'.join(f"{MIGRATIONS[version][0]} {self.step_counts[version]} 个"
+                         f"（{self.step_seconds[version]:.3f}秒）"
+                         for version in sorted(self.step_counts))
+        source = f"版本 {self.from_version}" if self.from_version else "未标记版本的数据"
+        return (f"数据结构从{source}升级到版本 {self.to_version}：检查 {self.total} 个网站，"
+                f"修改 {len(self.changed)} 个，用时 {self.seconds:.3f}秒"
+                + (f"（{steps}）" if steps else ""))
+
+
+def migrate(sites, from_version):
+    """把 sites（字典列表）原地升级到 SCHEMA_VERSION
+
+    from_version 为 None 表示数据文件中没有版本（早期版本保存的数据），
+    此时所有步骤都要执行，每个步骤只修改确实是旧格式的网站。
+    版本已是最新时返回 None；比程序支持的版本新时抛出 ValueError。
+    """
+    if from_version == SCHEMA_VERSION:
+        return None
+    if from_version is not None and from_version > SCHEMA_VERSION:
+        raise ValueError(f"数据文件的数据结构版本 {from_version} 比程序支持的 {SCHEMA_VERSION} 新，请升级程序")
+
+    steps = [(version, MIGRATIONS[version][1]) for version in sorted(MIGRATIONS)
+             if version > (from_version or 1)]
+    result = MigrationResult(from_version, SCHEMA_VERSION, len(sites))
+    counts = dict.fromkeys((version for version, _ in steps), 0)
+    seconds = dict.fromkeys(counts, 0.0)
+    context = {}
+    clock = time.perf_counter
+    start = clock()
+    for site in sites:
+        changed = False
+        for version, step in steps:
+            step_start = clock()
+            if step(site, context):
+                counts[version] += 1
+                changed = True
+            seconds[version] += clock() - step_start
+        if changed:
+            result.changed.append(site)
+    result.seconds = clock() - start
+    result.step_counts = counts
+    result.step_seconds = seconds
+    return result
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 内存中的记录模型
+功能: 用带 __slots__ 的 Site / Account 代替字典保存网站和账户，
+     网站名和账号做字符串驻留，时间保存为整数秒；
+     记录仍然支持字典式访问（site['accounts']、account.get('password') 等），
+     与 JSON 布局之间可以无损转换
+
+用法（测量内存占用）:
+    python3 vault_model.py 100000 1000000
+"""
+
+import sys
+from collections.abc import MutableMapping
+from datetime import date
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def parse_time(text):
+    """'YYYY-MM-DD HH:MM[:SS]' -> (秒数, 是否带秒)
+
+    秒数按字面时间计算（不做时区换算），所以总能原样转换回去；
+    不是这种格式的值返回 (原值, False)，同样保持不变。
+    """
+    if (isinstance(text, str) and len(text) in (16, 19) and text[4] == '-' and text[7] == '-'
+            and text[10] == ' ' and text[13] == ':' and (len(text) == 16 or text[16] == ':')):
+        digits = text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:19]
+        if digits.isascii() and digits.isdigit():
+            hour, minute = int(text[11:13]), int(text[14:16])
+            second = int(text[17:19]) if len(text) == 19 else 0
+            if hour < 24 and minute < 60 and second < 60:
+                try:
+                    days = date(int(text[:4]), int(text[5:7]), int(text[8:10])).toordinal()
+                except ValueError:
+                    return text, False
+                return (days - _EPOCH_ORDINAL) * 86400 + hour * 3600 + minute * 60 + second, len(text) == 19
+    return text, False
+
+
+def format_time(value, with_seconds=False):
+    """parse_time 的逆过程"""
+    if not isinstance(value, int):
+        return value
+    days, rest = divmod(value, 86400)
+    day = date.fromordinal(days + _EPOCH_ORDINAL)
+    hour, rest = divmod(rest, 3600)
+    minute, second = divmod(rest, 60)
+    text = f"{day.year:04d}-{day.month:02d}-{day.day:02d} {hour:02d}:{minute:02d}"
+    return f"{text}:{second:02d}" if with_seconds else text
+
+
+class _Record(MutableMapping):
+    """按字典方式访问带 __slots__ 的记录
+
+    _FIELDS: JSON 键 -> 属性名；_TIMES: 时间字段的 JSON 键 -> (属性名, 标志位)，
+    标志位记录原值是否带秒。值为 None 的属性表示 JSON 中没有这个键，
+    不认识的键放在 extra 字典里。
+    """
+
+    __slots__ = ()
+    _FIELDS = {}
+    _TIMES = {}
+    _INTERNED = ()
+
+    def __getitem__(self, key):
+        attr = self._FIELDS.get(key)
+        if attr is not None:
+            value = getattr(self, attr)
+        elif key in self._TIMES:
+            attr, flag = self._TIMES[key]
+            value = getattr(self, attr)
+            if value is not None:
+                value = format_time(value, self.flags & flag)
+        else:
+            value = None
+        if value is None:
+            # 值为 None 的已知字段也保存在 extra 中
+            if self.extra and key in self.extra:
+                return self.extra[key]
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self.extra and key in self.extra:
+            self.__delitem__(key)
+        attr = self._FIELDS.get(key)
+        if attr is not None and value is not None:
+            if key in self._INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, attr, self._convert(key, value))
+        elif key in self._TIMES and value is not None:
+            attr, flag = self._TIMES[key]
+            value, with_seconds = parse_time(value)
+            setattr(self, attr, value)
+            self.flags = self.flags | flag if with_seconds else self.flags & ~flag
+        else:
+            if attr is not None or key in self._TIMES:
+                # None 不能和“没有这个键”区分，放进 extra 保存
+                self.__delitem__(key, missing_ok=True)
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key, missing_ok=False):
+        attr = self._FIELDS.get(key) or self._TIMES.get(key, (None,))[0]
+        if attr is not None and getattr(self, attr) is not None:
+            setattr(self, attr, None)
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+        elif not missing_ok:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, attr in self._FIELDS.items():
+            if getattr(self, attr) is not None:
+                yield key
+        for key, (attr, _) in self._TIMES.items():
+            if getattr(self, attr) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # 记录按身份比较（list.remove、index 等），需要比较内容时用 to_dict()
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def _convert(self, key, value):
+        return value
+
+    def to_dict(self):
+        """转换为 JSON 布局的字典"""
+        return dict(self.items())
+
+    def copy(self):
+        return self.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Account(_Record):
+    """一个账户"""
+
+    __slots__ = ('id', 'username', 'password', 'password_length', 'description',
+                 'created', 'modified', 'flags', 'extra')
+    _FIELDS = {'id': 'id', 'username': 'username', 'password': 'password',
+               'password_length': 'password_length', 'description': 'description'}
+    _TIMES = {'created_time': ('created', 1), 'modified_time': ('modified', 2)}
+    _INTERNED = ('username',)
+
+    def __init__(self):
+        self.id = self.username = self.password = self.password_length = None
+        self.description = self.created = self.modified = self.extra = None
+        self.flags = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, Account):
+            return data
+        account = cls()
+        for key, value in data.items():
+            account[key] = value
+        return account
+
+
+class Site(_Record):
+    """一个网站及其账户"""
+
+    __slots__ = ('id', 'website', 'accounts', 'modified', 'flags', 'extra')
+    _FIELDS = {'id': 'id', 'website': 'website', 'accounts': 'accounts'}
+    _TIMES = {'modified_time': ('modified', 2)}
+    _INTERNED = ('website',)
+
+    def __init__(self):
+        self.id = self.website = self.accounts = self.modified = self.extra = None
+        self.flags = 0
+
+    def _convert(self, key, value):
+        if key == 'accounts' and isinstance(value, list):
+            return [Account.from_dict(account) if isinstance(account, dict) else account
+                    for account in value]
+        return value
+
+    def to_dict(self):
+        data = super().to_dict()
+        if isinstance(data.get('accounts'), list):
+            data['accounts'] = [account.to_dict() if isinstance(account, _Record) else account
+                                for account in data['accounts']]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, Site):
+            return data
+        site = cls()
+        for key, value in data.items():
+            site[key] = value
+        return site
+
+
+def sites_from_dicts(sites):
+    """JSON 布局的网站列表 -> Site 列表"""
+    return [Site.from_dict(site) for site in sites]
+
+
+def sites_to_dicts(sites):
+    """Site 列表 -> JSON 布局的网站列表"""
+    return [site.to_dict() if isinstance(site, _Record) else site for site in sites]
+
+
+def to_json(obj):
+    """json.dump 的 default 参数：把记录对象转换为字典"""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _synthetic_sites(accounts):
+    """测量用的数据：每个网站 2 个账户，账号在网站之间有重复（同一个邮箱用在多个网站）"""
+    sites = []
+    for i in range(0, accounts, 2):
+        sites.append({
+            'id': f'{i:016x}',
+            'website': f'site{i // 2}.example.com',
+            'accounts': [{
+                'id': f'{i + j:016x}',
+                'username': f'user{(i + j) % 5000}@example.com',
+                'password': f'p@ss-{i + j:08d}',
+                'description': '',
+                'created_time': '2025-01-01 10:00',
+                'modified_time': '2025-01-02 11:30',
+            } for j in range(2)],
+        })
+    return sites
+
+
+def measure_memory(accounts):
+    """返回 (字典表示, Site 表示) 每个账户平均占用的字节数"""
+    import gc
+    import json
+    import tracemalloc
+
+    # 从 JSON 文本加载，和实际加载保险库时一样每条记录都是独立的字符串对象
+    text = json.dumps(_synthetic_sites(accounts))
+    results = []
+    for build in (json.loads, lambda raw: sites_from_dicts(json.loads(raw))):
+        gc.collect()
+        tracemalloc.start()
+        data = build(text)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.append(size / accounts)
+        del data
+    return tuple(results)
+
+
+if __name__ == '__main__':
+    for count in map(int, sys.argv[1:] or ['100000']):
+        as_dicts, as_sites = measure_memory(count)
+        print(f"{count} 个账户: 字典 {as_dicts:.0f} 字节/账户, "
+              f"Site/Account {as_sites:.0f} 字节/账户 ({as_sites / as_dicts:.0%})")
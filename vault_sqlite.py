@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - SQLite 存储后端
+功能: 网站和账户分表存储，按网站名（忽略大小写）和 (网站, 账号) 建索引；
+     修改一个账户只写一行，首次打开时自动从 passwords.json 迁移
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from vault_migrations import SCHEMA_VERSION, migrate
+from vault_storage import (SaveScheduler, SaveStats, assign_passwords, dump_record, is_lazy,
+                           merge_duplicate_sites, open_store, site_key)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    id INTEGER PRIMARY KEY,
+    website TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sites_website ON sites(website);
+CREATE INDEX IF NOT EXISTS idx_sites_website_lower ON sites(lower(website));
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES sites(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    username TEXT,
+    password TEXT,
+    description TEXT,
+    created_time TEXT,
+    modified_time TEXT,
+    extra TEXT,
+    password_length INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_site_username ON accounts(site_id, username);
+"""
+
+# accounts 表中有独立列的字段，其余字段放进 extra（JSON）
+ACCOUNT_FIELDS = ('username', 'password', 'description', 'created_time', 'modified_time')
+
+INSERT_ACCOUNT = (
+    "INSERT INTO accounts (site_id, position, username, password, description, "
+    "created_time, modified_time, extra, password_length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class SQLiteStore:
+    """SQLite 存储，接口与 JournalStore 相同
+
+    put() 会和数据库中该网站现有的账户逐行比较，只写入变化的行。
+    设置 cipher 时密码列按账户单独加密；网站名和账号需要建索引，保持明文。
+    数据结构版本保存在 PRAGMA user_version 中（0 表示没有记录）。
+
+    同一个连接由后台保存线程和调用线程（Tk、导入工作线程）共用，
+    所有使用连接的地方都持有 _db_lock，读取不会和进行中的写事务交错。
+    """
+
+    def __init__(self, data_file, on_error=None, cipher=None, legacy_file=None):
+        self.data_file = data_file
+        self.legacy_file = legacy_file or os.path.splitext(data_file)[0] + '.json'
+        self.on_error = on_error
+        self.cipher = cipher
+        self.stats = SaveStats()
+        self.schema_version = None
+
+        # 待执行的操作：('put', 记录JSON) / ('del', 网站名) / ('rewrite', [记录JSON]) / ('schema', 版本)
+        self._pending = []
+        self._lock = threading.Lock()
+        # 保护连接：写事务和读取互斥（读取前先 flush()，不能在持有时等待保存）
+        self._db_lock = threading.RLock()
+        self._scheduler = None
+        self._conn = None
+
+    def load(self, lazy=False):
+        """读取所有网站和账户，返回网站列表
+
+        lazy=True 时不读取密码列，账户只带 password_length，
+        密码通过 fill_passwords() 按需从数据库读取。
+        """
+        self.flush()
+        with self._db_lock:
+            conn = self._connect()
+            if self._is_empty() and os.path.exists(self.legacy_file):
+                self._migrate_legacy()
+            self.schema_version = conn.execute("PRAGMA user_version").fetchone()[0] or None
+
+            sites = []
+            by_id = {}
+            for site_id, website, extra in conn.execute(
+                    "SELECT id, website, extra FROM sites ORDER BY position"):
+                site = {'website': website}
+                if extra:
+                    site.update(json.loads(extra))
+                site['accounts'] = []
+                by_id[site_id] = site
+                sites.append(site)
+
+            password_column = "NULL" if lazy else "password"
+            for row in conn.execute(
+                    "SELECT site_id, username, %s, description, created_time, modified_time, extra, "
+                    "password_length FROM accounts ORDER BY site_id, position" % password_column):
+                site = by_id.get(row[0])
+                if site is not None:
+                    account = self._account_from_row(site['website'], row[1:])
+                    if lazy:
+                        account['password_length'] = row[-1] or 0
+                    site['accounts'].append(account)
+        return sites
+
+    def fill_passwords(self, sites):
+        """从数据库读取延迟加载账户的密码（原地填入）"""
+        lazy_sites = [site for site in sites
+                      if any(is_lazy(account) for account in site.get('accounts', []))]
+        if not lazy_sites:
+            return
+        self.flush()
+        with self._db_lock:
+            conn = self._connect()
+            for site in lazy_sites:
+                website = site_key(site)
+                rows = conn.execute(
+                    "SELECT a.username, a.password FROM accounts a JOIN sites s ON a.site_id = s.id "
+                    "WHERE s.website = ? ORDER BY a.position", (website,)).fetchall()
+                stored = [{'username': username, 'password': self._open_password(website, username, password)}
+                          for username, password in rows if password is not None]
+                assign_passwords(site['accounts'], stored)
+
+    def put(self, site):
+        """新增或替换一个网站记录"""
+        with self._lock:
+            self._pending.append(('put', dump_record(site)))
+        self._ensure_scheduler().mark_dirty()
+
+    def delete(self, website):
+        """删除一个网站记录"""
+        with self._lock:
+            self._pending.append(('del', website))
+        self._ensure_scheduler().mark_dirty()
+
+    def rewrite(self, sites):
+        """用完整列表替换所有数据（同名网站会被合并，sites 被原地更新）"""
+        self.fill_passwords(sites)
+        merge_duplicate_sites(sites)
+        records = [dump_record(site) for site in sites]
+        with self._lock:
+            self._pending = [('rewrite', records)]
+        self._ensure_scheduler().mark_dirty()
+
+    def set_schema_version(self, version):
+        """记录数据结构版本"""
+        self.schema_version = version
+        with self._lock:
+            self._pending.append(('schema', int(version)))
+        self._ensure_scheduler().mark_dirty()
+
+    def flush(self):
+        """立即写入所有待保存的修改"""
+        if self._scheduler:
+            self._scheduler.flush()
+
+    def close(self):
+        """写入剩余修改并关闭数据库"""
+        if self._scheduler:
+            self._scheduler.close()
+            self._scheduler = None
+        with self._db_lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self):
+        """返回共用的连接（调用方持有 _db_lock）"""
+        if self._conn is None:
+            # 写入在后台保存线程中执行，读取在调用线程中执行
+            self._conn = sqlite3.connect(self.data_file, check_same_thread=False)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(accounts)")]
+            if 'password_length' not in columns:
+                self._conn.execute("ALTER TABLE accounts ADD COLUMN password_length INTEGER")
+        return self._conn
+
+    def _ensure_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = SaveScheduler(self._write_pending, on_error=self.on_error,
+                                            stats=self.stats)
+        return self._scheduler
+
+    def _is_empty(self):
+        return self._conn.execute("SELECT 1 FROM sites LIMIT 1").fetchone() is None
+
+    def _migrate_legacy(self):
+        """一次性从 passwords.json（及其日志）迁移，完成后把旧文件改名保留"""
+        legacy = open_store(self.legacy_file, cipher=self.cipher)
+        try:
+            sites = legacy.load()
+        finally:
+            legacy.close()
+        # 旧文件可能是早期的数据结构（如单账户记录），先升级再写入表中
+        migrate(sites, legacy.schema_version)
+        merge_duplicate_sites(sites)
+        with self._conn:
+            self._insert_sites(sites)
+            self._conn.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+        for path in (self.legacy_file, self.legacy_file + '.journal'):
+            if os.path.exists(path):
+                os.replace(path, path + '.migrated')
+        logger.info("已从 %s 迁移 %d 个网站到 %s", self.legacy_file, len(sites), self.data_file)
+
+    def _write_pending(self):
+        """后台线程：在一个事务中执行所有待写操作"""
+        with self._lock:
+            ops = self._pending
+            self._pending = []
+        if not ops:
+            return
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    for op, arg in ops:
+                        if op == 'put':
+                            self._put_site(json.loads(arg))
+                        elif op == 'del':
+                            conn.execute("DELETE FROM sites WHERE website = ?", (arg,))
+                        elif op == 'schema':
+                            conn.execute("PRAGMA user_version = %d" % arg)
+                        else:
+                            conn.execute("DELETE FROM accounts")
+                            conn.execute("DELETE FROM sites")
+                            self._insert_sites([json.loads(raw) for raw in arg])
+        except Exception:
+            # 事务已回滚，放回队列等待下次重试
+            with self._lock:
+                self._pending[:0] = ops
+            raise
+
+    def _insert_sites(self, sites):
+        conn = self._conn
+        for position, site in enumerate(sites):
+            cursor = conn.execute(
+                "INSERT INTO sites (website, position, extra) VALUES (?, ?, ?)",
+                (site_key(site), position, self._site_extra(site)))
+            conn.executemany(
+                INSERT_ACCOUNT,
+                [(cursor.lastrowid, i) + self._account_values(site_key(site), account)
+                 for i, account in enumerate(site.get('accounts', []))])
+
+    def _put_site(self, site):
+        """只写入与数据库中不同的行"""
+        conn = self._conn
+        website = site_key(site)
+        extra = self._site_extra(site)
+        row = conn.execute("SELECT id, extra FROM sites WHERE website = ?", (website,)).fetchone()
+        if row is None:
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM sites").fetchone()[0]
+            site_id = conn.execute(
+                "INSERT INTO sites (website, position, extra) VALUES (?, ?, ?)",
+                (website, position, extra)).lastrowid
+            existing = []
+        else:
+            site_id = row[0]
+            if row[1] != extra:
+                conn.execute("UPDATE sites SET extra = ? WHERE id = ?", (extra, site_id))
+            existing = conn.execute(
+                "SELECT id, position, username, password, description, created_time, "
+                "modified_time, extra, password_length FROM accounts WHERE site_id = ? ORDER BY position",
+                (site_id,)).fetchall()
+
+        # 同名账号按出现顺序一一对应
+        old_rows = {}
+        for old in existing:
+            old_rows.setdefault(old[2], []).append(old)
+
+        for position, account in enumerate(site.get('accounts', [])):
+            candidates = old_rows.get(account.get('username'))
+            old = candidates.pop(0) if candidates else None
+            if is_lazy(account) or 'password_length' in account:
+                # 延迟加载的账户沿用数据库中的密码
+                account = dict(account)
+                account.pop('password_length')
+                if 'password' not in account:
+                    if old is None or old[3] is None:
+                        raise ValueError(f"{website} 的账户密码尚未加载，无法保存")
+                    account['password'] = self._open_password(website, old[2], old[3])
+            if old is None:
+                conn.execute(INSERT_ACCOUNT, (site_id, position) + self._account_values(website, account))
+            elif old[1] != position or self._account_from_row(website, old[2:]) != account:
+                conn.execute(
+                    "UPDATE accounts SET position = ?, username = ?, password = ?, description = ?, "
+                    "created_time = ?, modified_time = ?, extra = ?, password_length = ? WHERE id = ?",
+                    (position,) + self._account_values(website, account) + (old[0],))
+
+        stale = [(old[0],) for rows in old_rows.values() for old in rows]
+        if stale:
+            conn.executemany("DELETE FROM accounts WHERE id = ?", stale)
+
+    @staticmethod
+    def _site_extra(site):
+        extra = {k: v for k, v in site.items() if k not in ('website', 'accounts')}
+        return dump_record(extra) if extra else None
+
+    def _account_values(self, website, account):
+        values = [account.get(field) for field in ACCOUNT_FIELDS]
+        length = len(values[1]) if values[1] is not None else None
+        if self.cipher and values[1] is not None:
+            values[1] = self.cipher.seal(values[1], self._password_aad(website, values[0]))
+        extra = {k: v for k, v in account.items()
+                 if k not in ACCOUNT_FIELDS and k != 'password_length'}
+        return tuple(values) + (dump_record(extra) if extra else None, length)
+
+    def _account_from_row(self, website, row):
+        """(username, password, ..., extra) 行 -> 账户字典"""
+        account = {}
+        for field, value in zip(ACCOUNT_FIELDS, row):
+            if value is not None:
+                account[field] = value
+        if 'password' in account:
+            account['password'] = self._open_password(website, account.get('username'), account['password'])
+        if row[len(ACCOUNT_FIELDS)]:
+            account.update(json.loads(row[len(ACCOUNT_FIELDS)]))
+        return account
+
+    def _open_password(self, website, username, stored):
+        if self.cipher:
+            return self.cipher.open(stored, self._password_aad(website, username))
+        return stored
+
+    @staticmethod
+    def _password_aad(website, username):
+        return f"{website}\0{username or ''}"
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 存储引擎
+功能: 快照 + 追加式操作日志，每次修改只追加一条小记录，而不是重写整个文件；
+     写入在后台线程中合并执行，快照通过临时文件原子替换
+"""
+
+import codecs
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+
+from vault_model import to_json
+
+logger = logging.getLogger(__name__)
+
+# 日志超过该大小（字节）后合并为新快照
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# 加密快照的格式标识
+ENCRYPTED_FORMAT = "vault-aead-1"
+
+# 最后一次修改后安静多久才写盘（秒），以及连续修改时最长的等待时间
+SAVE_DELAY = 0.5
+SAVE_MAX_DELAY = 5.0
+
+# 流式解析时每次从文件读取的字节数
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+# 带数据结构版本的明文快照的开头：{"schema":版本,"passwords":[...]}
+_plain_snapshot = re.compile(r'[ \t\n\r]*\{[ \t\n\r]*"schema"[ \t\n\r]*:[ \t\n\r]*(\d+)[ \t\n\r]*,'
+                             r'[ \t\n\r]*"passwords"[ \t\n\r]*:')
+
+
+def dump_record(obj):
+    """把单条记录序列化为紧凑的JSON文本"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=to_json)
+
+
+def iter_json_array(text, pos=0):
+    """逐个解析JSON数组（从 text[pos:] 开始）中的元素，返回 (对象, 原始文本)
+
+    保留每个元素的原始文本，合并快照时可以直接写回，无需重新序列化。
+    """
+    pos = _whitespace.match(text, pos).end()
+    if text[pos:pos + 1] != '[':
+        raise ValueError("快照格式不正确：必须是JSON数组")
+    pos = _whitespace.match(text, pos + 1).end()
+    if text[pos:pos + 1] == ']':
+        return
+    while True:
+        obj, end = _decoder.raw_decode(text, pos)
+        yield obj, text[pos:end]
+        pos = _whitespace.match(text, end).end()
+        ch = text[pos:pos + 1]
+        if ch == ',':
+            pos = _whitespace.match(text, pos + 1).end()
+        elif ch == ']':
+            return
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+
+
+class JSONStream:
+    """按块读取文件并逐个解析其中的JSON值
+
+    缓冲区只保留尚未解析的文本，解析数组时每次只产生一个元素，
+    内存占用取决于单个元素的大小，而不是整个文件。f 须以二进制方式打开。
+    """
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self._file = f
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        # 已从文件读取的字节数（用于显示进度）
+        self.bytes_read = 0
+
+    def _read(self, size):
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        self._eof = not data
+        self._buf = self._buf[self._pos:] + self._decoder.decode(data, final=self._eof)
+        self._pos = 0
+
+    def peek(self):
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            self._pos = _whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or self._eof:
+                return self._buf[self._pos:self._pos + 1]
+            self._read(self._chunk_size)
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise json.JSONDecodeError(f"Expecting '{ch}'", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """解析下一个完整的JSON值"""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self._buf, self._pos)
+                # 数字可能被缓冲区截断，后面还有字符时才能确定已经完整
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # 值跨过了缓冲区末尾：多读一些再试，读取量逐次加倍以免反复解析
+            self._read(size)
+            size *= 2
+
+    def array(self):
+        """逐个解析数组元素"""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self._pos += 1
+            if ch == ']':
+                return
+            if ch != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buf, self._pos - 1)
+
+
+def atomic_write(path, chunks, binary=False):
+    """写入临时文件并 fsync 后原子替换目标文件
+
+    写到一半崩溃时旧文件保持完整。
+    """
+    tmp_file = path + '.tmp'
+    with (open(tmp_file, 'wb') if binary else open(tmp_file, 'w', encoding='utf-8')) as f:
+        f.writelines(chunks)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def _fsync_dir(directory):
+    """把目录项的变化（rename）也落盘，Windows 上不支持则跳过"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def site_key(site):
+    """网站记录在存储中的键"""
+    return site.get('website', '')
+
+
+def new_id():
+    """生成网站 / 账户的唯一ID（保存在记录的 id 字段中）"""
+    return secrets.token_hex(8)
+
+
+def ensure_ids(sites):
+    """给没有ID或ID重复的网站和账户分配新ID，返回有改动的网站列表"""
+    seen = set()
+    changed = []
+    for site in sites:
+        assigned = False
+        for record in [site] + site.get('accounts', []):
+            if not record.get('id') or record['id'] in seen:
+                record['id'] = new_id()
+                assigned = True
+            seen.add(record['id'])
+        if assigned:
+            changed.append(site)
+    return changed
+
+
+def strip_passwords(sites):
+    """延迟加载：账户只保留密码长度，密码本身在需要时再从存储中取"""
+    for site in sites:
+        strip_site_passwords(site)
+
+
+def strip_site_passwords(site):
+    """strip_passwords 的单个网站版本（原地修改并返回 site）"""
+    for account in site.get('accounts', []):
+        password = account.pop('password', None)
+        if password is not None:
+            account['password_length'] = len(password)
+    return site
+
+
+def password_length(account):
+    """账户密码长度，兼容尚未取回密码的延迟加载账户"""
+    if 'password' in account:
+        return len(account['password'])
+    return account.get('password_length', 0)
+
+
+def is_lazy(account):
+    """账户密码是否尚未取回"""
+    return 'password' not in account and 'password_length' in account
+
+
+def assign_passwords(accounts, stored_accounts):
+    """把存储中的密码按账号填回延迟加载的账户（同名账号按出现顺序对应）"""
+    stored = {}
+    for account in stored_accounts:
+        if 'password' in account:
+            stored.setdefault(account.get('username'), []).append(account['password'])
+    for account in accounts:
+        candidates = stored.get(account.get('username'))
+        password = candidates.pop(0) if candidates else None
+        if is_lazy(account) and password is not None:
+            account['password'] = password
+            del account['password_length']
+
+
+def flat_to_accounts(site):
+    """把旧版（版本1）单账户记录原地转换为多账户格式，返回是否转换了
+
+    旧格式直接包含 website / username / password；记录上已有的账户（同名网站合并时
+    追加进来的）保留在转换出的账户之后。
+    """
+    if 'username' not in site or 'password' not in site:
+        return False
+    account = {
+        'username': site['username'],
+        'password': site['password'],
+        'created_time': site.get('created_time', time.strftime('%Y-%m-%d %H:%M')),
+        'description': ''
+    }
+    converted = {'website': site.get('website', '')}
+    if 'id' in site:
+        converted['id'] = site['id']
+    converted['accounts'] = [account] + site.get('accounts', [])
+    site.clear()
+    site.update(converted)
+    return True
+
+
+def merge_site(target, site):
+    """把同名网站 site 的账户追加到 target（旧版单账户记录先转换，账户不会丢失）"""
+    flat_to_accounts(target)
+    flat_to_accounts(site)
+    target.setdefault('accounts', []).extend(site.get('accounts', []))
+
+
+def merge_duplicate_sites(sites, key_func=site_key):
+    """把同一个键的网站合并为一条记录（账户追加到第一条），sites 被原地更新"""
+    unique = {}
+    for site in sites:
+        key = key_func(site)
+        if key in unique:
+            merge_site(unique[key], site)
+        else:
+            unique[key] = site
+    sites[:] = unique.values()
+    return unique
+
+
+def open_store(data_file, **kwargs):
+    """按数据文件扩展名选择存储后端
+
+    .db / .sqlite 使用 SQLite，.vault 使用内存映射的二进制格式，
+    其他使用快照 + 日志的JSON存储。
+    """
+    if data_file.endswith(('.db', '.sqlite')):
+        from vault_sqlite import SQLiteStore
+        return SQLiteStore(data_file, **kwargs)
+    if data_file.endswith('.vault'):
+        from vault_binary import BinaryStore
+        return BinaryStore(data_file, **kwargs)
+    return JournalStore(data_file, **kwargs)
+
+
+class SaveStats:
+    """保存统计：请求次数、实际写盘次数和写盘耗时"""
+
+    def __init__(self):
+        self.requests = 0
+        self.writes = 0
+        self.writes_avoided = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def record_write(self, latency):
+        self.writes += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def summary(self):
+        """返回便于打印或展示的统计字典（耗时单位：毫秒）"""
+        avg = self.total_latency / self.writes if self.writes else 0.0
+        return {
+            'requests': self.requests,
+            'writes': self.writes,
+            'writes_avoided': self.writes_avoided,
+            'errors': self.errors,
+            'avg_latency_ms': round(avg * 1000, 2),
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+            'last_latency_ms': round(self.last_latency * 1000, 2),
+        }
+
+
+class SaveScheduler:
+    """合并写盘请求的后台保存调度器
+
+    mark_dirty() 只标记脏状态；后台线程在最后一次修改后安静 delay 秒
+    （或首次修改后最多 max_delay 秒）时调用一次 flush_func，
+    这期间的所有修改合并为一次写盘。
+
+    flush_func 抛出异常时修改仍算待保存（存储会把失败的操作放回待写列表），
+    max_delay 秒后重试；连续失败时只在第一次通知 on_error（没有时记录日志）。
+    """
+
+    def __init__(self, flush_func, delay=SAVE_DELAY, max_delay=SAVE_MAX_DELAY,
+                 on_error=None, stats=None):
+        self.flush_func = flush_func
+        self.delay = delay
+        self.max_delay = max_delay
+        self.on_error = on_error
+        self.stats = stats or SaveStats()
+
+        self._cond = threading.Condition()
+        self._dirty_since = None
+        self._last_mark = None
+        self._flush_now = False
+        self._closed = False
+        # 已请求 / 已处理的修改代数，flush() 用来等待写盘完成
+        self._requested = 0
+        self._handled = 0
+        # 已开始的写盘次数、最近一次失败的是第几次，以及失败的异常
+        self._attempts = 0
+        self._failed_attempt = 0
+        self._failed = False
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="vault-saver", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """标记有待保存的修改"""
+        with self._cond:
+            now = time.monotonic()
+            self.stats.requests += 1
+            if self._dirty_since is None:
+                self._dirty_since = now
+            else:
+                self.stats.writes_avoided += 1
+            self._last_mark = now
+            self._requested += 1
+            self._cond.notify_all()
+
+    def flush(self):
+        """立即写入所有待保存的修改并等待完成，写盘失败时返回 False"""
+        with self._cond:
+            target = self._requested
+            if self._handled >= target:
+                return True
+            since = self._attempts
+            self._flush_now = True
+            self._cond.notify_all()
+            # 等到写盘成功，或者这次请求之后开始的一次写盘失败
+            while (self._handled < target and self._failed_attempt <= since
+                   and self._thread.is_alive()):
+                self._cond.wait()
+            return self._handled >= target
+
+    def close(self):
+        """写入剩余修改并停止后台线程
+
+        写盘失败时立即重试一次，仍然失败则抛出最后一次的异常（修改没有保存）。
+        """
+        saved = self.flush() or self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if not saved:
+            raise self.last_error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._dirty_since is None or (self._closed and self._failed):
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        continue
+                    if self._flush_now or self._closed:
+                        break
+                    # 上一次写盘失败时等 max_delay 秒再重试
+                    delay = self.max_delay if self._failed else self.delay
+                    deadline = min(self._last_mark + delay,
+                                   self._dirty_since + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._dirty_since = None
+                self._flush_now = False
+                self._attempts += 1
+                attempt = self._attempts
+                target = self._requested
+
+            start = time.perf_counter()
+            try:
+                self.flush_func()
+            except Exception as e:
+                with self._cond:
+                    self.stats.errors += 1
+                    first_failure = not self._failed
+                    self._failed = True
+                    self._failed_attempt = attempt
+                    self.last_error = e
+                    # 修改仍待保存：重新标记脏状态，_handled 不前进
+                    now = time.monotonic()
+                    if self._dirty_since is None:
+                        self._dirty_since = now
+                    self._last_mark = now
+                    self._cond.notify_all()
+                if first_failure:
+                    if self.on_error:
+                        self.on_error(e)
+                    else:
+                        logger.error("保存密码数据失败: %s", e)
+                continue
+
+            with self._cond:
+                self.stats.record_write(time.perf_counter() - start)
+                self._failed = False
+                self._handled = target
+                self._cond.notify_all()
+
+
+class JournalStore:
+    """快照 + 追加日志存储
+
+    passwords.json 是完整快照，每次修改只向 passwords.json.journal 追加一行
+    操作记录。加载时先读快照再重放日志，日志超过阈值后合并为新快照。
+    所有写盘都由 SaveScheduler 在后台线程完成。
+
+    设置了 cipher（VaultCipher）时，每个网站记录单独加密，记录键是网站名的
+    HMAC；修改一个账户只重新加密它所在的那一条记录。未设置时快照是
+    {"schema": 版本, "passwords": [...]}（与导出文件的布局相同），
+    旧版本保存的纯数组快照同样可以读取。
+
+    schema_version 是快照中记录的数据结构版本（没有记录时为 None），
+    由 set_schema_version() 修改。
+    """
+
+    def __init__(self, data_file, compact_bytes=JOURNAL_COMPACT_BYTES, on_error=None, cipher=None):
+        self.data_file = data_file
+        self.journal_file = data_file + '.journal'
+        self.compact_bytes = compact_bytes
+        self.on_error = on_error
+        self.cipher = cipher
+        self.stats = SaveStats()
+        self.schema_version = None
+
+        # 键 -> 记录的JSON文本（明文对象或加密后的字符串），按网站顺序排列
+        self._records = {}
+        # 尚未写盘的日志行，以及是否需要重写整个快照
+        self._pending = []
+        self._rewrite_pending = False
+        self._lock = threading.Lock()
+
+        # 日志文件只由后台保存线程读写
+        self._journal = None
+        self._journal_size = 0
+        self._scheduler = None
+
+    def load(self, lazy=False):
+        """读取快照并重放日志，返回网站列表
+
+        lazy 只对加密的保险库有效：每条记录解密后立即只保留 password_length，
+        明文密码不留在返回的记录中，用到时由 fill_passwords() 再解密取回。
+        记录是整体加密的，加载时仍要解析并解密全部记录，所以与 SQLite / 二进制后端
+        不同，这里延迟加载不会缩短加载时间。未加密时 _records 中本来就是含密码的原文，
+        去掉密码省不下内存，lazy 被忽略。
+        """
+        self.flush()
+        self._close_journal()
+
+        sites = {}
+        records = {}
+        needs_rewrite = False
+        self.schema_version = None
+        lazy = lazy and self.cipher is not None
+
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+            plain = _plain_snapshot.match(text)
+            if plain is None and text.lstrip().startswith('{'):
+                self._load_encrypted(json.loads(text), sites, records, lazy)
+            else:
+                if plain is not None:
+                    self.schema_version = int(plain.group(1))
+                for site, raw in iter_json_array(text, plain.end() if plain else 0):
+                    key = self._key(site_key(site))
+                    if key in sites:
+                        # 同名网站只能保留一条记录，把账户合并到第一条
+                        merge_site(sites[key], site)
+                        records[key] = self._encode(key, sites[key])
+                        needs_rewrite = True
+                    else:
+                        sites[key] = site
+                        # 明文快照在设置主密码后需要整体加密一次
+                        records[key] = self._encode(key, site) if self.cipher else raw
+                        needs_rewrite = needs_rewrite or self.cipher is not None
+
+        needs_rewrite = self._replay(self.journal_file, sites, records, lazy) or needs_rewrite
+
+        with self._lock:
+            self._records = records
+            self._pending = []
+            self._rewrite_pending = needs_rewrite
+        if needs_rewrite:
+            self._ensure_scheduler().mark_dirty()
+        sites = list(sites.values())
+        if lazy and needs_rewrite:
+            # 明文数据转换为加密格式时记录需要完整的密码，加密后再去掉
+            strip_passwords(sites)
+        return sites
+
+    def fill_passwords(self, sites):
+        """从存储的记录中取回延迟加载账户的密码（原地填入）"""
+        for site in sites:
+            if not any(is_lazy(account) for account in site.get('accounts', [])):
+                continue
+            stored = self._decode_stored(self._key(site_key(site)))
+            if stored is not None:
+                assign_passwords(site['accounts'], stored.get('accounts', []))
+
+    def _decode_stored(self, key):
+        with self._lock:
+            raw = self._records.get(key)
+        if raw is None:
+            return None
+        if self.cipher:
+            return json.loads(self.cipher.open(json.loads(raw), key))
+        return json.loads(raw)
+
+    def _load_encrypted(self, snapshot, sites, records, lazy=False):
+        if snapshot.get('format') != ENCRYPTED_FORMAT:
+            raise ValueError(f"无法识别的保险库格式: {snapshot.get('format')}")
+        if self.cipher is None:
+            raise ValueError("保险库已加密，需要主密码才能打开")
+        self.schema_version = snapshot.get('schema')
+        for key, token in snapshot.get('records', []):
+            sites[key] = self._open_record(token, key, lazy)
+            records[key] = dump_record(token)
+
+    def _open_record(self, token, key, lazy):
+        """解密一条记录；lazy 时立即去掉密码（记录中保留的是密文）"""
+        site = json.loads(self.cipher.open(token, key))
+        return strip_site_passwords(site) if lazy else site
+
+    def _replay(self, path, sites, records, lazy=False):
+        """重放一个日志文件，末尾写了一半的记录会被截掉
+
+        返回是否遇到了需要转换格式的明文记录。
+        """
+        if not os.path.exists(path):
+            return False
+        converted = False
+        good_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    break
+                key = op.get('key', '')
+                if op.get('op') == 'put':
+                    if 'rec' in op:
+                        if self.cipher is None:
+                            raise ValueError("保险库已加密，需要主密码才能打开")
+                        sites[key] = self._open_record(op['rec'], key, lazy)
+                        records[key] = dump_record(op['rec'])
+                    else:
+                        site = op['site']
+                        key = self._key(key)
+                        sites[key] = site
+                        records[key] = self._encode(key, site)
+                        converted = converted or self.cipher is not None
+                elif op.get('op') == 'del':
+                    if self.cipher and not op.get('hashed'):
+                        key = self._key(key)
+                    sites.pop(key, None)
+                    records.pop(key, None)
+                good_size += len(line)
+        if good_size != os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_size)
+        return converted
+
+    def put(self, site):
+        """新增或替换一个网站记录"""
+        key = self._key(site_key(site))
+        raw = self._encode(key, self._complete(key, site))
+        field = 'rec' if self.cipher else 'site'
+        line = '{"op":"put","key":%s,"%s":%s}\n' % (dump_record(key), field, raw)
+        with self._lock:
+            self._records[key] = raw
+            self._pending.append(line)
+        self._ensure_scheduler().mark_dirty()
+
+    def delete(self, website):
+        """删除一个网站记录"""
+        key = self._key(website)
+        with self._lock:
+            if self._records.pop(key, None) is None:
+                return
+            if self.cipher:
+                line = '{"op":"del","key":%s,"hashed":true}\n' % dump_record(key)
+            else:
+                line = '{"op":"del","key":%s}\n' % dump_record(key)
+            self._pending.append(line)
+        self._ensure_scheduler().mark_dirty()
+
+    def rewrite(self, sites):
+        """用完整列表重写快照（导入替换、数据迁移等批量操作）
+
+        同名网站会被合并为一条记录，sites 会被原地更新。
+        """
+        self.fill_passwords(sites)
+        unique = merge_duplicate_sites(sites, lambda site: self._key(site_key(site)))
+        records = {key: self._encode(key, self._complete(key, site)) for key, site in unique.items()}
+        with self._lock:
+            self._records = records
+            self._pending = []
+            self._rewrite_pending = True
+        self._ensure_scheduler().mark_dirty()
+
+    def set_schema_version(self, version):
+        """记录数据结构版本（版本保存在快照中，下次写盘时重写快照）"""
+        with self._lock:
+            self.schema_version = version
+            self._rewrite_pending = True
+        self._ensure_scheduler().mark_dirty()
+
+    def flush(self):
+        """立即写入所有待保存的修改"""
+        if self._scheduler:
+            self._scheduler.flush()
+
+    def close(self):
+        """写入剩余修改、停止后台线程并关闭日志"""
+        if self._scheduler:
+            self._scheduler.close()
+            self._scheduler = None
+        self._close_journal()
+
+    def _key(self, website):
+        """网站名 -> 记录键（加密时不在磁盘上暴露网站名）"""
+        return self.cipher.record_id(website) if self.cipher else website
+
+    def _complete(self, key, site):
+        """返回可写盘的记录：补回延迟加载账户的密码，去掉 password_length"""
+        accounts = site.get('accounts', [])
+        if not any('password_length' in account for account in accounts):
+            return site
+        accounts = [dict(account) for account in accounts]
+        if any(is_lazy(account) for account in accounts):
+            stored = self._decode_stored(key)
+            if stored is not None:
+                assign_passwords(accounts, stored.get('accounts', []))
+            if any(is_lazy(account) for account in accounts):
+                raise ValueError(f"{site_key(site)} 的账户密码尚未加载，无法保存")
+        for account in accounts:
+            account.pop('password_length', None)
+        return dict(site, accounts=accounts)
+
+    def _encode(self, key, site):
+        """序列化一条记录；加密时以记录键作为附加认证数据，记录不能被互换"""
+        raw = dump_record(site)
+        if self.cipher:
+            return dump_record(self.cipher.seal(raw, key))
+        return raw
+
+    def _ensure_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = SaveScheduler(self._write_pending, on_error=self.on_error,
+                                            stats=self.stats)
+        return self._scheduler
+
+    def _close_journal(self):
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    def _write_pending(self):
+        """后台线程：把待写日志追加到磁盘，必要时重写快照"""
+        with self._lock:
+            lines = self._pending
+            rewrite = self._rewrite_pending
+            self._pending = []
+            self._rewrite_pending = False
+            pending_size = sum(len(line) for line in lines)
+            if rewrite or self._journal_size + pending_size >= self.compact_bytes:
+                # 快照与日志在同一把锁内取出，二者保持一致
+                records = list(self._records.items())
+                encrypted = self.cipher is not None
+                schema = self.schema_version
+            else:
+                records = None
+
+        try:
+            if records is None:
+                self._append(lines)
+            else:
+                self._write_snapshot(records, encrypted, schema)
+        except Exception:
+            # 日志可能只写了一部分，下次改为重写完整快照
+            with self._lock:
+                self._rewrite_pending = True
+            raise
+
+    def _append(self, lines):
+        if not lines:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+            self._journal_size = self._journal.tell()
+        data = ''.join(lines).encode('utf-8')
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_size += len(data)
+
+    def _write_snapshot(self, records, encrypted, schema=None):
+        """写入新快照并清空日志
+
+        快照替换之后、日志清空之前崩溃也没有问题：重放的都是整条记录的
+        put/del，重复重放结果相同。没有数据结构版本时明文快照写成纯数组。
+        """
+        def chunks():
+            if encrypted:
+                if schema is None:
+                    yield '{"format":"%s","records":[\n' % ENCRYPTED_FORMAT
+                else:
+                    yield '{"format":"%s","schema":%d,"records":[\n' % (ENCRYPTED_FORMAT, schema)
+                for i, (key, raw) in enumerate(records):
+                    yield '%s[%s,%s]' % (',\n' if i else '', dump_record(key), raw)
+                yield '\n]}\n'
+            else:
+                yield '[\n' if schema is None else '{"schema":%d,"passwords":[\n' % schema
+                for i, (key, raw) in enumerate(records):
+                    yield ',\n' + raw if i else raw
+                yield '\n]\n' if schema is None else '\n]}\n'
+
+        atomic_write(self.data_file, chunks())
+        self._close_journal()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._journal_size = 0
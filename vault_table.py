@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码保险库 - 虚拟化表格
+功能: 行数很多时 Treeview 中只保留可见的若干行（外加少量余量），
+     滚动时把滚动位置换算为结果数组中的一段，重新绑定这些行的内容；
+     创建和滚动的开销与保险库大小无关
+"""
+
+import math
+import tkinter as tk
+from tkinter import ttk
+
+# 超过该行数时切换为虚拟模式，行数较少时直接插入全部行
+VIRTUAL_THRESHOLD = 2000
+# 可见行之外额外保留的行数
+MARGIN_ROWS = 10
+# 无法从样式中读取行高时使用的默认值（像素）
+DEFAULT_ROW_HEIGHT = 20
+# 组位置表累积这么多次（至少；行数多时为行数的平方根）行数变化后整体重建
+REINDEX_SHIFTS = 64
+
+
+class GroupPositions:
+    """组 -> 行列表中的位置（同一组的行是连续的）
+
+    一组的行数变化后，后面各组的位置不逐个修改，而是记下 (位置, 行数变化)，
+    查询时把前面的变化累加上；记录超过 max(REINDEX_SHIFTS, √行数) 条时按行列表整体重建。
+    查询和（均摊的）重建都是 O(√行数)，行数不变的修改不产生记录。
+    """
+
+    def __init__(self, row_group, rows=()):
+        self.row_group = row_group
+        self.rebuild(rows)
+
+    def rebuild(self, rows):
+        # id(组) -> [组, 起始位置, 行数]；起始位置是上次重建时的坐标，新组的坐标接在末尾
+        self._groups = {}
+        for i, row in enumerate(rows):
+            group = self.row_group(row)
+            entry = self._groups.get(id(group))
+            if entry is not None and entry[0] is group:
+                entry[2] += 1
+            else:
+                self._groups[id(group)] = [group, i, 1]
+        self._shifts = []
+        self._end = len(rows)
+        self._limit = max(REINDEX_SHIFTS, math.isqrt(len(rows)))
+
+    def span(self, group):
+        """group 的行在行列表中的范围 (start, end)，不在表中时返回 None"""
+        entry = self._groups.get(id(group))
+        if entry is None or entry[0] is not group:
+            return None
+        _, origin, count = entry
+        start = origin + sum(delta for position, delta in self._shifts if position < origin)
+        return start, start + count
+
+    def resize(self, group, count, rows):
+        """group 的行数已变为 count（不在表中的组追加在末尾，0 表示整组删除）
+
+        rows 是修改后的行列表，变化记录过多时用它重建。
+        """
+        entry = self._groups.get(id(group))
+        if entry is None or entry[0] is not group:
+            if count:
+                self._groups[id(group)] = [group, self._end, count]
+                self._end += count
+            return
+        delta = count - entry[2]
+        if count:
+            entry[2] = count
+        else:
+            del self._groups[id(group)]
+        if delta:
+            self._shifts.append((entry[1], delta))
+            if len(self._shifts) > self._limit:
+                self.rebuild(rows)
+
+
+class VirtualTable:
+    """包装一个 Treeview 和它的纵向滚动条
+
+    rows 是任意对象的列表，row_values(row) 返回该行在各列显示的值。
+    普通模式下每行对应一个 Treeview 项目；虚拟模式下 Treeview 只有固定数量的项目，
+    第 i 个项目显示 rows[top + i]，滚动条和鼠标滚轮都由这里接管。
+
+    行按 row_group(row) 分组（同一组的行是连续的，如同一网站的账户），
+    row_key(row) 是行的唯一身份，普通模式下直接用作 Treeview 的项目ID；
+    修改数据后用 update_group 只替换受影响的一组行。
+    """
+
+    def __init__(self, tree, scrollbar, row_values, row_key=id, row_group=id,
+                 threshold=VIRTUAL_THRESHOLD, margin=MARGIN_ROWS):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.row_key = row_key
+        self.row_group = row_group
+        self.threshold = threshold
+        self.margin = margin
+
+        self.rows = []
+        self._positions = GroupPositions(row_group)
+        self.virtual = False
+        # 虚拟模式下窗口第一行在 rows 中的位置
+        self.top = 0
+        # Treeview 项目ID -> 行（普通模式）；虚拟模式下按位置换算
+        self._item_rows = {}
+        self._pool = []
+        # 虚拟模式下选中行在 rows 中的位置（滚出窗口后仍然保留）
+        self._selected = None
+
+        self._row_height = self._lookup_row_height()
+        self._use_native_scroll()
+        tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        tree.bind('<Configure>', self._on_configure, add='+')
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            tree.bind(sequence, self._on_wheel)
+        tree.bind('<Up>', lambda e: self._on_arrow(-1))
+        tree.bind('<Down>', lambda e: self._on_arrow(1))
+        tree.bind('<Prior>', lambda e: self._on_arrow(-self._visible_rows()))
+        tree.bind('<Next>', lambda e: self._on_arrow(self._visible_rows()))
+
+    # ---- 公共接口 ----
+
+    def set_rows(self, rows):
+        """显示新的行列表（如搜索结果），尽量保留滚动位置"""
+        self.rows = rows
+        self._positions.rebuild(rows)
+        self._selected = None
+        virtual = len(rows) > self.threshold
+        if virtual != self.virtual:
+            self.virtual = virtual
+            self.top = 0
+            if virtual:
+                self._use_virtual_scroll()
+            else:
+                self._use_native_scroll()
+        self._clear()
+        if self.virtual:
+            self.top = self._clamp(self.top)
+            self._render()
+        else:
+            for row in rows:
+                iid = self.tree.insert('', 'end', iid=self._iid(row), values=self.row_values(row))
+                self._item_rows[iid] = row
+
+    def update_group(self, group, new_rows):
+        """用 new_rows 替换属于 group 的行（new_rows 为空表示删除这一组）
+
+        组不在表格中时追加到末尾。只对受影响的行调用 Treeview，
+        其他行的项目、滚动位置和选中状态都不变；组的位置从组位置表中查，不扫描全部行。
+        """
+        rows = self.rows
+        if not self.virtual:
+            self._detach_moved(group, new_rows)
+        start, end = self._positions.span(group) or (len(rows), len(rows))
+        old_rows = rows[start:end]
+        rows[start:end] = new_rows
+        self._positions.resize(group, len(new_rows), rows)
+
+        if (len(rows) > self.threshold) != self.virtual:
+            # 行数跨过了阈值，整体切换模式
+            self.set_rows(rows)
+        elif self.virtual:
+            self._shift_window(start, end, old_rows, new_rows)
+        else:
+            self._patch_items(group, start, old_rows, new_rows)
+
+    def _detach_moved(self, group, new_rows):
+        """普通模式：从其他组搬过来的行（如账户搬到另一个网站）先从原位置去掉
+
+        保证行列表和 Treeview 中的项目始终一一对应，后面按位置插入时不会错位。
+        """
+        for iid in map(self._iid, new_rows):
+            old = self._item_rows.get(iid)
+            if old is not None and self.row_group(old) is not group:
+                del self._item_rows[iid]
+                self.tree.delete(iid)
+                old_group = self.row_group(old)
+                start, end = self._positions.span(old_group)
+                position = next(i for i in range(start, end) if self.rows[i] is old)
+                del self.rows[position]
+                self._positions.resize(old_group, end - start - 1, self.rows)
+
+    def _patch_items(self, group, start, old_rows, new_rows):
+        """普通模式：同一身份的行沿用原来的项目，只更新内容和位置"""
+        new_iids = [self._iid(row) for row in new_rows]
+        keep = set(new_iids)
+        stale = [iid for iid in map(self._iid, old_rows) if iid not in keep]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._item_rows[iid]
+
+        for offset, (iid, row) in enumerate(zip(new_iids, new_rows)):
+            if iid in self._item_rows:
+                self.tree.item(iid, values=self.row_values(row))
+                self.tree.move(iid, '', start + offset)
+            else:
+                self.tree.insert('', start + offset, iid=iid, values=self.row_values(row))
+            self._item_rows[iid] = row
+
+    def _iid(self, row):
+        return str(self.row_key(row))
+
+    def _shift_window(self, start, end, old_rows, new_rows):
+        """虚拟模式：窗口上方的行数有变化时平移窗口，保持看到的还是原来那些行"""
+        delta = len(new_rows) - len(old_rows)
+        if end <= self.top:
+            self.top += delta
+        if self._selected is not None:
+            if self._selected >= end:
+                self._selected += delta
+            elif self._selected >= start:
+                # 选中的行在被替换的组里：按身份找回
+                key = self.row_key(old_rows[self._selected - start])
+                self._selected = next((start + offset for offset, row in enumerate(new_rows)
+                                       if self.row_key(row) == key), None)
+        self.top = self._clamp(self.top)
+        self._render()
+
+    def refresh(self):
+        """行内容有变化（如切换密码显示）后重新显示，不改变行列表"""
+        if self.virtual:
+            self._render()
+        else:
+            for iid, row in self._item_rows.items():
+                self.tree.item(iid, values=self.row_values(row))
+
+    def item_row(self, iid):
+        """Treeview 项目ID -> 行"""
+        if self.virtual:
+            index = self.top + self._pool.index(iid) if iid in self._pool else None
+            return self.rows[index] if index is not None and index < len(self.rows) else None
+        return self._item_rows.get(iid)
+
+    def selected_row(self):
+        """当前选中的行"""
+        if self.virtual:
+            return self.rows[self._selected] if self._selected is not None else None
+        selection = self.tree.selection()
+        return self._item_rows.get(selection[0]) if selection else None
+
+    # ---- 普通模式 / 虚拟模式切换 ----
+
+    def _use_native_scroll(self):
+        self.scrollbar.configure(command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+
+    def _use_virtual_scroll(self):
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand='')
+
+    def _clear(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._item_rows = {}
+        self._pool = []
+
+    # ---- 虚拟模式 ----
+
+    def _lookup_row_height(self):
+        try:
+            height = ttk.Style().lookup(self.tree.cget('style') or 'Treeview', 'rowheight')
+            return int(height) if height else DEFAULT_ROW_HEIGHT
+        except (tk.TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def _visible_rows(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # 还没有显示出来时按 Treeview 的 height 选项估算
+            return int(self.tree.cget('height'))
+        return max(1, height // self._row_height - 1)
+
+    def _clamp(self, top):
+        return max(0, min(top, len(self.rows) - self._visible_rows()))
+
+    def _render(self):
+        """把 rows[top:top + 窗口大小] 绑定到池中的项目"""
+        size = min(self._visible_rows() + self.margin, len(self.rows))
+        while len(self._pool) < size:
+            self._pool.append(self.tree.insert('', 'end'))
+        while len(self._pool) > size:
+            self.tree.delete(self._pool.pop())
+
+        for i, iid in enumerate(self._pool):
+            index = self.top + i
+            self.tree.item(iid, values=self.row_values(self.rows[index]) if index < len(self.rows) else ())
+        # 项目只是换了内容，选中状态要跟着行走
+        if self._selected is not None and 0 <= self._selected - self.top < len(self._pool):
+            self.tree.selection_set(self._pool[self._selected - self.top])
+        elif self.tree.selection():
+            self.tree.selection_set(())
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + self._visible_rows()) / total))
+
+    def _scroll_to(self, top):
+        top = self._clamp(top)
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * len(self.rows)))
+        elif action == 'scroll':
+            step = self._visible_rows() if unit == 'pages' else 1
+            self._scroll_to(self.top + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4:
+            delta = -3
+        elif event.num == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self._scroll_to(self.top + delta)
+        return 'break'
+
+    def _on_arrow(self, delta):
+        """上下键 / 翻页键：选中行移到窗口外时滚动窗口"""
+        if not self.virtual or not self.rows:
+            return None
+        index = self._selected
+        index = 0 if index is None else max(0, min(len(self.rows) - 1, index + delta))
+        self._selected = index
+        visible = self._visible_rows()
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + visible:
+            self.top = self._clamp(index - visible + 1)
+        self._render()
+        iid = self._pool[index - self.top]
+        self.tree.focus(iid)
+        return 'break'
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if self.virtual and selection and selection[0] in self._pool:
+            self._selected = self.top + self._pool.index(selection[0])
+
+    def _on_configure(self, event):
+        if self.virtual:
+            self.top = self._clamp(self.top)
+            self._render()